@@ -3,8 +3,23 @@ from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 
+from models.catalog_worker import CatalogWorker
 from models.continue_read_worker import ContinuousReadWorker
+from models.export_worker import ExportWorker
+from models.import_worker import ImportWorker
+from models.importers import SqliteImporter, get_importer
+from models.exporters import CsvExporter, ExcelExporter, SqliteExporter, NpzExporter, ResampledCsvExporter, \
+    SessionExporter, EXCEL_AVAILABLE
+from models.retention import RollupFile, ROLLUP_SUFFIX
+from models.rolling_export import RollingExporter
+from models.retention_worker import RetentionWorker
 from models.gauge_model import GaugeModel
+from models.app_paths import get_data_dir
+from models.recording_log import RecordingLog, LOG_SUFFIX
+from models.sqlite_recorder import SqliteRecorder, RECORDING_DATABASE
+from models.sample_store import SampleStore, SampleSlice
+from models.session_catalog import SessionCatalog
+from models.session_file import SessionFile, SESSION_SUFFIX
 from models.serial_auto_detect import AutoDetectWorker
 from models.serial_model import SerialModel
 from views.main_window import MainWindow
@@ -13,22 +28,18 @@ from views.dialogs import *
 from datetime import datetime
 
 import os
-import csv
-from datetime import datetime
 
-# 添加这些可选导入
-try:
-    import pandas as pd
-    import openpyxl
-    EXCEL_AVAILABLE = True
-except ImportError:
-    EXCEL_AVAILABLE = False
+# 会话样本在内存中保留的字节数上限，超出部分压缩转存到磁盘
+SAMPLE_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# 记录日志成组提交（fsync）间隔（秒），崩溃时最多丢失这段时间内的数据
+RECORDING_SYNC_INTERVAL = 1.0
+
+# 连续读取时同时实时写入 SQLite 记录数据库（可按时间范围查询）
+LIVE_SQLITE_RECORDING = True
 
-try:
-    import sqlite3
-    ACCESS_AVAILABLE = True
-except ImportError:
-    ACCESS_AVAILABLE = False
+# 全速率数据保留天数，更早的会话在启动时压缩为 1 秒 / 1 分钟汇总
+RETENTION_DAYS = 30
 
 
 class MainController(QObject):
@@ -42,6 +53,10 @@ class MainController(QObject):
         self.serial_model = SerialModel()
         self.view = MainWindow()
 
+        # 会话样本存储：表格、图表和导出共用的唯一数据来源
+        self.sample_store = SampleStore(GaugeReader.VALUE_SCALE, memory_budget=SAMPLE_MEMORY_BUDGET)
+        self.view.set_sample_store(self.sample_store)
+
         # 设置视图的控制器引用
         self.view.set_controller(self)
 
@@ -49,12 +64,29 @@ class MainController(QObject):
         self.setup_connections()
         self.setup_menu_connections()
 
-        # 初始化
-        self.initialize()
-
         # 连续读取相关
         self.read_thread = None
         self.read_worker = None
+        self.recorders = []  # 当前连续读取的记录写入端
+        self.catalog_threads = []  # 正在运行的会话目录更新线程
+        self.retention_thread = None
+        self.retention_worker = None
+        self.export_thread = None
+        self.export_worker = None
+        self.export_progress = None
+        self.import_thread = None
+        self.import_worker = None
+        self.import_progress = None
+        self.auto_export = {
+            'enabled': False,
+            'format': 'csv',
+            'directory': get_data_dir('exports'),
+            'rotate_minutes': 60,
+            'rotate_mb': 0,
+        }
+
+        # 初始化
+        self.initialize()
 
         # 存储所有打开的窗口实例
         self.open_windows = []
@@ -91,6 +123,108 @@ class MainController(QObject):
         interval_info = self.view.get_interval_info_text()
         self.view.update_status(f"就绪 - 请选择串口并连接设备 | {interval_info}")
 
+        # 在后台恢复上次未正常结束的记录，并把已结束但尚未登记的记录转换为会话文件
+        self.update_catalog(recover=True)
+
+        # 压缩超过保留期限的旧会话
+        self.start_retention(RETENTION_DAYS)
+
+    def handle_recordings_recovered(self, recovered, count):
+        """未正常结束的记录已恢复为会话文件"""
+        self.view.update_status(f"已从 {recovered} 个未正常结束的记录中恢复 {count} 条数据")
+        QMessageBox.information(
+            self.view, "恢复记录",
+            f"上次连续读取未正常结束，已从 {recovered} 个记录中恢复 {count} 条数据，\n"
+            f"恢复的数据已保存为会话文件，可通过“打开会话”查看。"
+        )
+
+    def start_recording(self, interval, slave_ids):
+        """为本次连续读取创建记录写入端（崩溃恢复日志、SQLite 记录）
+
+        Returns:
+            list: 创建成功的写入端，创建失败的写入端不影响读取
+        """
+        directory = get_data_dir('recordings')
+        metadata = {
+            'port': self.gauge_model._port,
+            'baudrate': self.gauge_model._baudrate,
+            'slave_ids': slave_ids,
+            'interval': interval,
+            'scale': self.sample_store.scale,
+            'start': datetime.now().isoformat(),
+        }
+
+        recorders = []
+        name = datetime.now().strftime("session_%Y%m%d_%H%M%S_%f") + LOG_SUFFIX
+        try:
+            recorders.append(RecordingLog(os.path.join(directory, name), metadata,
+                                          sync_interval=RECORDING_SYNC_INTERVAL))
+        except Exception as e:
+            print(f"无法创建记录日志: {e}")
+
+        if LIVE_SQLITE_RECORDING:
+            try:
+                recorders.append(SqliteRecorder(os.path.join(directory, RECORDING_DATABASE), metadata,
+                                                scale=self.sample_store.scale))
+            except Exception as e:
+                print(f"无法创建SQLite记录: {e}")
+
+        if self.auto_export['enabled']:
+            try:
+                recorders.append(RollingExporter(
+                    self.auto_export['directory'], self.auto_export['format'],
+                    rotate_seconds=self.auto_export['rotate_minutes'] * 60,
+                    rotate_bytes=self.auto_export['rotate_mb'] * 1024 * 1024,
+                    metadata=metadata, scale=self.sample_store.scale
+                ))
+            except Exception as e:
+                print(f"无法启动自动导出: {e}")
+                self.view.update_status(f"无法启动自动导出: {e}")
+        return recorders
+
+    def stop_recording(self, recorders=None):
+        """正常结束记录写入端
+
+        Args:
+            recorders: 要结束的写入端，默认为当前全部写入端
+        """
+        recorders = self.recorders if recorders is None else recorders
+        closed_logs = []
+        for recorder in recorders:
+            if isinstance(recorder, RecordingLog):
+                closed_logs.append(recorder.path)
+            recorder.close()
+        if recorders is self.recorders:
+            self.recorders = []
+
+        # 转换为会话文件并登记到会话目录
+        if closed_logs:
+            self.update_catalog(closed_logs)
+
+    def update_catalog(self, log_paths=None, recover=False):
+        """在后台把已关闭的记录日志转换为会话文件并登记到会话目录
+
+        Args:
+            log_paths: 要处理的日志，None 表示所有待处理的日志
+            recover: 是否先恢复未正常结束的记录日志（启动时）
+        """
+        thread = QThread()
+        worker = CatalogWorker(log_paths, recover)
+        worker.moveToThread(thread)
+
+        thread.started.connect(worker.run)
+        worker.sessionAdded.connect(
+            lambda path: self.view.update_status(f"会话已保存：{os.path.basename(path)}")
+        )
+        worker.recordingsRecovered.connect(self.handle_recordings_recovered)
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(worker.deleteLater)
+        thread.finished.connect(lambda: self.catalog_threads.remove((thread, worker)))
+        thread.finished.connect(thread.deleteLater)
+
+        self.catalog_threads.append((thread, worker))
+        thread.start()
+
     # ========== 事件处理方法 ==========
     def handle_connect(self, port, baudrate):
         """处理连接请求"""
@@ -264,16 +398,27 @@ class MainController(QObject):
             QMessageBox.warning(self.view, "警告", "请先连接设备！")
             return
 
+        if self.sample_store.readonly and self.is_file_busy():
+            return
+
         try:
             # 创建读取线程
+            self.ensure_live_store()
             self.read_thread = QThread()
-            self.read_worker = ContinuousReadWorker(self.serial_model, interval)
+            slave_ids = self.view.get_slave_ids()
+            self.stop_recording()
+            self.recorders = self.start_recording(interval, slave_ids)
+            self.read_worker = ContinuousReadWorker(self.serial_model, interval, slave_ids,
+                                                    recorders=self.recorders)
             self.read_worker.moveToThread(self.read_thread)
 
             # 连接信号
             self.read_thread.started.connect(self.read_worker.start_reading)
             self.read_worker.dataRead.connect(self.handle_continuous_data)
             self.read_worker.errorOccurred.connect(self.handle_continuous_read_error)
+            self.read_worker.recorderFailed.connect(self.handle_recorder_failed)
+            recorders = self.recorders
+            self.read_worker.finished.connect(lambda: self.stop_recording(recorders))
             self.read_worker.finished.connect(self.read_thread.quit)
             self.read_worker.finished.connect(self.read_worker.deleteLater)
             self.read_thread.finished.connect(self.read_thread.deleteLater)
@@ -284,7 +429,7 @@ class MainController(QObject):
             # 更新状态
             self.gauge_model.is_reading = True
             self.view.set_continuous_read_status(True)
-            self.view.update_status(f"正在连续读取 (间隔: {interval}s)")
+            self.view.update_status(f"正在连续读取 (间隔: {interval}s, 从站: {', '.join(map(str, slave_ids))})")
 
         except Exception as e:
             QMessageBox.critical(self.view, "启动错误", f"无法启动连续读取：{str(e)}")
@@ -301,24 +446,15 @@ class MainController(QObject):
         self.view.set_continuous_read_status(False)
         self.view.update_status("已停止读取")
 
-    def handle_continuous_data(self, value, timestamp):
+    def handle_continuous_data(self, value, timestamp, slave_id=1, raw=None):
         """处理连续读取的数据"""
         # 更新模型
         self.gauge_model.current_value = value
 
-        # 同时添加到表格和图表
-        self.view.add_data_to_table(timestamp, value)
-
-        # 为图表创建datetime对象
-        try:
-            # 解析时间戳字符串为datetime对象
-            today = datetime.now().date()
-            time_part = datetime.strptime(timestamp, "%H:%M:%S.%f").time()
-            dt = datetime.combine(today, time_part)
-            self.view.add_data_to_chart(dt, value)
-        except ValueError:
-            # 如果解析失败，使用当前时间
-            self.view.add_data_to_chart(datetime.now(), value)
+        # 写入会话样本存储，表格和图表在下一帧批量读取
+        if raw is None:
+            raw = round(value * self.sample_store.scale)
+        self.sample_store.append(int(timestamp * 1e9), raw, slave_id)
 
     def handle_continuous_read_error(self, error_msg):
         """处理连续读取错误"""
@@ -331,6 +467,12 @@ class MainController(QObject):
         QMessageBox.warning(self.view, "读取错误", f"连续读取过程中发生错误：{error_msg}")
         self.view.update_status(f"读取错误: {error_msg}")
 
+    def handle_recorder_failed(self, error_msg):
+        """处理记录写入端写入失败（读取继续，界面中的数据不受影响）"""
+        print(f"记录写入失败: {error_msg}")
+        self.view.update_status(error_msg)
+        QMessageBox.warning(self.view, "记录错误", f"{error_msg}\n连续读取继续进行，请检查磁盘空间或导出当前数据。")
+
     def handle_zero(self):
         """处理清零请求"""
         print("Controller: 处理清零请求")
@@ -352,6 +494,9 @@ class MainController(QObject):
                 return
             self.handle_stop_read()
 
+        if self.is_file_busy():
+            return
+
         # 获取当前数据条数（表格和图表）
         table_count = self.view.get_data_count()
         chart_count = self.view.get_chart_data_count()
@@ -369,7 +514,8 @@ class MainController(QObject):
                 success = self.serial_model.zero_device()
 
                 if success:
-                    # 清空表格数据和图表
+                    # 清空会话数据、表格和图表（表格模型负责清空存储）
+                    self.ensure_live_store()
                     self.view.clear_all_data()
 
                     # 更新当前值为0
@@ -485,21 +631,44 @@ class MainController(QObject):
         if self.gauge_model.is_connected:
             self.handle_disconnect()
 
+        # 取消正在进行的导出（未完成的文件会被删除）
+        if self.export_thread is not None:
+            self.export_worker.cancel()
+            self.export_thread.quit()
+            self.export_thread.wait()
+        if self.import_thread is not None:
+            self.import_worker.cancel()
+            self.import_thread.quit()
+            self.import_thread.wait()
+
+        # 结束记录并释放会话转存文件
+        self.stop_recording()
+        self.sample_store.close()
+
+        # 等待会话目录更新完成当前文件（未处理的日志下次启动时继续）
+        for thread, worker in list(self.catalog_threads):
+            worker.stop()
+            thread.quit()
+            thread.wait()
+        if self.retention_thread is not None:
+            self.retention_worker.stop()
+            self.retention_thread.quit()
+            self.retention_thread.wait()
+
         # 关闭窗口
         self.view.close()
         return True
 
-    def get_table_data(self):
-        """获取表格数据的辅助方法"""
-        table_data = []
-        table = self.view.tableWidget
-        for row in range(table.rowCount()):
-            row_data = []
-            for col in range(table.columnCount()):
-                item = table.item(row, col)
-                row_data.append(item.text() if item else "")
-            table_data.append(row_data)
-        return table_data
+    def get_export_metadata(self):
+        """获取导出用的会话信息（打开的会话文件取其记录时的串口参数）"""
+        metadata = dict(getattr(self.sample_store, 'metadata', None) or {})
+        if not metadata.get('port'):
+            metadata['port'] = self.gauge_model._port
+            metadata['baudrate'] = self.gauge_model._baudrate
+        metadata.setdefault('slave_ids', self.sample_store.channels())
+        metadata['scale'] = self.sample_store.scale
+        metadata['export_time'] = datetime.now().isoformat()
+        return metadata
 
     def setup_menu_connections(self):
         """设置菜单信号连接"""
@@ -518,6 +687,376 @@ class MainController(QObject):
         if hasattr(self.view, 'actionAccess'):
             self.view.actionAccess.triggered.connect(self.handle_export_access)
 
+        if hasattr(self.view, 'actionSession'):
+            self.view.actionSession.triggered.connect(self.handle_export_session)
+
+        if hasattr(self.view, 'actionNpz'):
+            self.view.actionNpz.triggered.connect(self.handle_export_npz)
+
+        if hasattr(self.view, 'actionRange'):
+            self.view.actionRange.triggered.connect(self.handle_export_range)
+
+        if hasattr(self.view, 'open_session_action'):
+            self.view.open_session_action.triggered.connect(self.handle_open_session)
+
+        if hasattr(self.view, 'import_file_action'):
+            self.view.import_file_action.triggered.connect(self.handle_import_file)
+
+        if hasattr(self.view, 'browse_sessions_action'):
+            self.view.browse_sessions_action.triggered.connect(self.handle_browse_sessions)
+
+        if hasattr(self.view, 'retention_action'):
+            self.view.retention_action.triggered.connect(self.handle_retention)
+
+        if hasattr(self.view, 'auto_export_action'):
+            self.view.auto_export_action.triggered.connect(self.handle_auto_export)
+
+    def set_sample_store(self, store):
+        """切换会话样本存储（表格、图表和导出随之切换）"""
+        if store is self.sample_store:
+            return
+        self.sample_store.close()
+        self.sample_store = store
+        self.view.set_sample_store(store)
+
+    def ensure_live_store(self):
+        """当前显示的是打开的会话文件时，切换回可写入的会话存储"""
+        if self.sample_store.readonly:
+            self.set_sample_store(SampleStore(GaugeReader.VALUE_SCALE, memory_budget=SAMPLE_MEMORY_BUDGET))
+
+    def start_retention(self, full_rate_days, notify=False):
+        """在后台按保留策略压缩旧会话
+
+        Args:
+            full_rate_days: 全速率数据保留天数
+            notify: 完成后是否弹窗报告结果
+        """
+        if self.retention_thread is not None:
+            return
+
+        self.retention_thread = QThread()
+        self.retention_worker = RetentionWorker(full_rate_days)
+        self.retention_worker.moveToThread(self.retention_thread)
+
+        self.retention_thread.started.connect(self.retention_worker.run)
+        self.retention_worker.progress.connect(
+            lambda done, total, name: self.view.update_status(f"正在压缩旧会话 ({done}/{total})：{name}")
+        )
+        self.retention_worker.finished.connect(lambda report: self.on_retention_finished(report, notify))
+        self.retention_worker.finished.connect(self.retention_thread.quit)
+        self.retention_worker.finished.connect(self.retention_worker.deleteLater)
+        self.retention_thread.finished.connect(self.on_retention_thread_finished)
+        self.retention_thread.finished.connect(self.retention_thread.deleteLater)
+
+        self.retention_thread.start()
+
+    def on_retention_thread_finished(self):
+        """压缩线程退出后释放引用"""
+        self.retention_thread = None
+        self.retention_worker = None
+
+    def on_retention_finished(self, report, notify):
+        """旧会话压缩完成回调"""
+        reclaimed = report['reclaimed_bytes'] / 1024 / 1024
+        message = f"已压缩 {report['sessions']} 个旧会话，释放 {reclaimed:.1f} MB"
+        if report['errors']:
+            message += f"，{len(report['errors'])} 个失败"
+        if report['sessions'] or report['errors'] or notify:
+            self.view.update_status(message)
+        if notify:
+            details = "\n".join(report['errors'][:10])
+            QMessageBox.information(self.view, "压缩旧会话", message + (f"\n\n{details}" if details else ""))
+
+    def handle_retention(self):
+        """处理压缩旧会话请求"""
+        if self.retention_thread is not None:
+            QMessageBox.information(self.view, "提示", "正在压缩旧会话，请稍候。")
+            return
+
+        days, ok = QInputDialog.getInt(
+            self.view, "压缩旧会话",
+            "保留全速率数据的天数（更早的会话只保留 1 秒 / 1 分钟汇总）：",
+            RETENTION_DAYS, 0, 3650
+        )
+        if ok:
+            self.start_retention(days, notify=True)
+
+    def handle_auto_export(self):
+        """处理自动导出设置"""
+        dialog = AutoExportDialog(self.auto_export, self.view)
+        if dialog.exec_() == QDialog.Accepted:
+            self.auto_export = dialog.get_settings()
+            if self.auto_export['enabled']:
+                self.view.update_status(f"已启用自动导出：{self.auto_export['directory']}")
+            else:
+                self.view.update_status("已关闭自动导出")
+
+    def handle_open_session(self):
+        """处理打开会话文件请求"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self.view, "打开会话文件", get_data_dir('sessions'),
+            f"会话文件 (*{SESSION_SUFFIX} *{ROLLUP_SUFFIX})"
+        )
+        if file_path:
+            self.open_session(file_path)
+
+    def handle_browse_sessions(self):
+        """处理浏览会话记录请求"""
+        try:
+            catalog = SessionCatalog()
+        except Exception as e:
+            QMessageBox.critical(self.view, "错误", f"无法打开会话目录：\n{str(e)}")
+            return
+
+        try:
+            dialog = SessionBrowserDialog(catalog, self.view)
+            if dialog.exec_() == QDialog.Accepted and dialog.selected_path:
+                self.open_session(dialog.selected_path)
+        finally:
+            catalog.close()
+
+    def open_session(self, file_path):
+        """打开会话文件显示到表格和图表"""
+        if self.gauge_model.is_reading:
+            QMessageBox.warning(self.view, "警告", "请先停止连续读取！")
+            return
+
+        if self.is_file_busy():
+            return
+
+        try:
+            if file_path.endswith(ROLLUP_SUFFIX):
+                # 已压缩的旧会话：显示 1 秒汇总的均值趋势
+                session = RollupFile(file_path).to_store('1s')
+            else:
+                session = SessionFile(file_path)
+        except Exception as e:
+            QMessageBox.critical(self.view, "打开失败", f"无法打开会话文件：\n{str(e)}")
+            return
+
+        self.set_sample_store(session)
+        self.view.update_status(f"已打开会话：{os.path.basename(file_path)}（{len(session)} 条数据）")
+
+    def is_file_busy(self):
+        """是否有导入或导出正在进行（是则提示用户）"""
+        if self.export_thread is None and self.import_thread is None:
+            return False
+        QMessageBox.information(self.view, "提示", "正在导入或导出数据，请等待完成或取消。")
+        return True
+
+    def handle_import_file(self):
+        """处理打开导出的数据文件（CSV / Excel / SQLite / NumPy）请求"""
+        if self.gauge_model.is_reading:
+            QMessageBox.warning(self.view, "警告", "请先停止连续读取！")
+            return
+
+        if self.is_file_busy():
+            return
+
+        file_path, _ = QFileDialog.getOpenFileName(
+            self.view, "打开数据文件", "",
+            "导出的数据文件 (*.csv *.xlsx *.db *.npz);;CSV文件 (*.csv);;Excel文件 (*.xlsx);;"
+            "SQLite数据库文件 (*.db);;NumPy数组文件 (*.npz)"
+        )
+        if not file_path:
+            return
+
+        importer = get_importer(file_path)
+        if importer is None:
+            QMessageBox.warning(self.view, "警告", "不支持的文件格式。")
+            return
+
+        options = {'scale': GaugeReader.VALUE_SCALE, 'memory_budget': SAMPLE_MEMORY_BUDGET}
+        if importer is SqliteImporter:
+            # 追加过多次导出的数据库：选择其中一个会话
+            try:
+                sessions = SqliteImporter.sessions(file_path)
+            except Exception as e:
+                QMessageBox.critical(self.view, "打开失败", f"无法读取数据库：\n{str(e)}")
+                return
+            if len(sessions) > 1:
+                items = ["全部会话"] + [f"{session_id}: {name}（{count} 条）" for session_id, name, count in sessions]
+                item, ok = QInputDialog.getItem(self.view, "选择会话", "数据库中有多个导出会话：", items, 1, False)
+                if not ok:
+                    return
+                if item != items[0]:
+                    options['session_id'] = sessions[items.index(item) - 1][0]
+
+        self.start_import(importer.load, file_path, **options)
+
+    def start_import(self, load_function, file_path, **options):
+        """在后台线程中导入数据文件，完成后显示到表格和图表
+
+        Args:
+            load_function: 导入函数 load(path, progress, **options)
+            file_path: 文件路径
+            options: 传给导入函数的其他参数
+        """
+        self.import_progress = QProgressDialog("正在导入...", "取消", 0, 1000, self.view)
+        self.import_progress.setWindowTitle("打开数据文件")
+        self.import_progress.setMinimumDuration(500)
+        self.import_progress.setAutoClose(False)
+        self.import_progress.setAutoReset(False)
+        self.import_progress.setValue(0)
+
+        self.import_thread = QThread()
+        self.import_worker = ImportWorker(load_function, file_path, **options)
+        self.import_worker.moveToThread(self.import_thread)
+
+        self.import_progress.canceled.connect(self.import_worker.cancel, Qt.DirectConnection)
+
+        self.import_thread.started.connect(self.import_worker.run)
+        self.import_worker.progress.connect(self.on_import_progress)
+        self.import_worker.finished.connect(lambda store: self.on_import_finished(file_path, store))
+        self.import_worker.errorOccurred.connect(self.on_import_failed)
+        self.import_worker.cancelled.connect(lambda: self.view.update_status("导入已取消"))
+        for signal in (self.import_worker.finished, self.import_worker.errorOccurred,
+                       self.import_worker.cancelled):
+            signal.connect(self.import_thread.quit)
+        self.import_thread.finished.connect(self.import_worker.deleteLater)
+        self.import_thread.finished.connect(self.on_import_thread_finished)
+        self.import_thread.finished.connect(self.import_thread.deleteLater)
+
+        self.view.update_status(f"正在导入：{os.path.basename(file_path)}")
+        self.import_thread.start()
+
+    def on_import_progress(self, done, total):
+        """更新导入进度"""
+        if self.import_progress is not None and total > 0:
+            self.import_progress.setValue(int(done * 1000 // total))
+
+    def on_import_thread_finished(self):
+        """导入线程退出后释放引用"""
+        self.import_thread = None
+        self.import_worker = None
+        if self.import_progress is not None:
+            self.import_progress.close()
+            self.import_progress.deleteLater()
+            self.import_progress = None
+
+    def on_import_finished(self, file_path, store):
+        """导入完成回调"""
+        if self.import_progress is not None:
+            self.import_progress.close()
+        if self.gauge_model.is_reading:
+            # 导入期间开始了连续读取，放弃导入结果
+            store.close()
+            return
+        self.set_sample_store(store)
+        self.view.update_status(f"已打开数据文件：{os.path.basename(file_path)}（{len(store)} 条数据）")
+
+    def on_import_failed(self, error_msg):
+        """导入失败回调"""
+        if self.import_progress is not None:
+            self.import_progress.close()
+        self.view.update_status(f"导入失败：{error_msg}")
+        QMessageBox.critical(self.view, "打开失败", f"无法打开数据文件：\n{error_msg}")
+
+    def start_export(self, export_function, file_path, format_name, remove_on_cancel=True, store=None, **options):
+        """在后台线程中导出当前会话数据，显示进度并可取消
+
+        Args:
+            export_function: 导出函数 export(store, path, progress, **options)
+            file_path: 目标文件路径
+            format_name: 格式名称（用于提示信息）
+            remove_on_cancel: 取消时是否删除目标文件
+            store: 要导出的样本来源，默认为当前会话（范围导出时为 SampleSlice）
+            options: 传给导出函数的其他参数
+        """
+        store = self.sample_store if store is None else store
+        total = len(store)
+
+        self.export_progress = QProgressDialog(f"正在导出{format_name}文件...", "取消", 0, max(total, 1), self.view)
+        self.export_progress.setWindowTitle("导出数据")
+        # 非模态：模态进度框的 setValue 会重入事件循环；导出期间冲突的操作由 is_file_busy 拦截
+        self.export_progress.setMinimumDuration(500)
+        self.export_progress.setAutoClose(False)
+        self.export_progress.setAutoReset(False)
+        self.export_progress.setValue(0)
+
+        self.export_thread = QThread()
+        self.export_worker = ExportWorker(export_function, store, file_path, remove_on_cancel, **options)
+        self.export_worker.moveToThread(self.export_thread)
+
+        # 取消按钮直接设置标志（导出线程忙碌时无法处理排队的信号）
+        self.export_progress.canceled.connect(self.export_worker.cancel, Qt.DirectConnection)
+
+        self.export_thread.started.connect(self.export_worker.run)
+        self.export_worker.progress.connect(self.on_export_progress)
+        self.export_worker.finished.connect(
+            lambda count: self.on_export_finished(file_path, format_name, count)
+        )
+        self.export_worker.errorOccurred.connect(
+            lambda error: self.on_export_failed(format_name, error)
+        )
+        self.export_worker.cancelled.connect(self.on_export_cancelled)
+        for signal in (self.export_worker.finished, self.export_worker.errorOccurred,
+                       self.export_worker.cancelled):
+            signal.connect(self.export_thread.quit)
+        self.export_thread.finished.connect(self.export_worker.deleteLater)
+        self.export_thread.finished.connect(self.on_export_thread_finished)
+        self.export_thread.finished.connect(self.export_thread.deleteLater)
+
+        self.view.update_status(f"正在导出{format_name}文件...")
+        self.export_thread.start()
+
+    def on_export_progress(self, done, total):
+        """更新导出进度"""
+        if self.export_progress is not None:
+            self.export_progress.setValue(done)
+            self.export_progress.setLabelText(f"正在导出... {done} / {total} 条")
+
+    def on_export_thread_finished(self):
+        """导出线程退出后释放引用"""
+        self.export_thread = None
+        self.export_worker = None
+        if self.export_progress is not None:
+            self.export_progress.close()
+            self.export_progress.deleteLater()
+            self.export_progress = None
+
+    def on_export_finished(self, file_path, format_name, count):
+        """导出完成回调"""
+        if self.export_progress is not None:
+            self.export_progress.close()
+        self.view.update_status(f"{format_name}文件导出成功：{os.path.basename(file_path)}（{count} 条数据）")
+        QMessageBox.information(self.view, "导出成功", f"数据已成功导出到：\n{file_path}")
+
+    def on_export_failed(self, format_name, error_msg):
+        """导出失败回调"""
+        if self.export_progress is not None:
+            self.export_progress.close()
+        self.view.update_status(f"{format_name}导出失败：{error_msg}")
+        QMessageBox.critical(self.view, "导出失败", f"{format_name}文件导出失败：\n{error_msg}")
+
+    def on_export_cancelled(self):
+        """导出取消回调"""
+        self.view.update_status("导出已取消")
+
+    def handle_export_session(self):
+        """处理会话文件导出（后台写入并登记到会话目录）"""
+        data_count = self.view.get_data_count()
+        if data_count == 0:
+            QMessageBox.information(self.view, "提示", "当前没有数据可以导出。")
+            return
+
+        if self.is_file_busy():
+            return
+
+        file_path, _ = QFileDialog.getSaveFileName(
+            self.view,
+            "保存会话文件",
+            f"千分表数据_{datetime.now().strftime('%Y%m%d_%H%M%S')}{SESSION_SUFFIX}",
+            f"会话文件 (*{SESSION_SUFFIX})"
+        )
+
+        if not file_path:
+            return
+
+        # 先写临时文件再替换，取消时原有文件保持不变
+        self.start_export(SessionExporter.export, file_path, "会话", remove_on_cancel=False,
+                          metadata=self.get_export_metadata())
+
     def handle_export_csv(self):
         """处理CSV导出"""
         data_count = self.view.get_data_count()
@@ -525,6 +1064,9 @@ class MainController(QObject):
             QMessageBox.information(self.view, "提示", "当前没有数据可以导出。")
             return
 
+        if self.is_file_busy():
+            return
+
         # 选择保存文件路径
         file_path, _ = QFileDialog.getSaveFileName(
             self.view,
@@ -536,29 +1078,7 @@ class MainController(QObject):
         if not file_path:
             return
 
-        try:
-            self.view.update_status("正在导出CSV文件...")
-
-            # 获取表格数据
-            table_data = self.get_table_data()
-
-            # 写入CSV文件
-            with open(file_path, 'w', newline='', encoding='utf-8-sig') as csvfile:
-                writer = csv.writer(csvfile)
-
-                # 写入表头
-                writer.writerow(['时间', '数值(mm)'])
-
-                # 写入数据
-                for row_data in table_data:
-                    writer.writerow(row_data)
-
-            self.view.update_status(f"CSV文件导出成功：{os.path.basename(file_path)}")
-            QMessageBox.information(self.view, "导出成功", f"数据已成功导出到：\n{file_path}")
-
-        except Exception as e:
-            self.view.update_status(f"CSV导出失败：{str(e)}")
-            QMessageBox.critical(self.view, "导出失败", f"CSV文件导出失败：\n{str(e)}")
+        self.start_export(CsvExporter.export, file_path, "CSV")
 
     def handle_export_excel(self):
         """处理Excel导出"""
@@ -566,9 +1086,9 @@ class MainController(QObject):
             QMessageBox.warning(
                 self.view,
                 "功能不可用",
-                "Excel导出功能需要安装pandas和openpyxl库。\n\n"
+                "Excel导出功能需要安装openpyxl库。\n\n"
                 "请运行以下命令安装：\n"
-                "pip install pandas openpyxl"
+                "pip install openpyxl"
             )
             return
 
@@ -577,6 +1097,9 @@ class MainController(QObject):
             QMessageBox.information(self.view, "提示", "当前没有数据可以导出。")
             return
 
+        if self.is_file_busy():
+            return
+
         # 选择保存文件路径
         file_path, _ = QFileDialog.getSaveFileName(
             self.view,
@@ -588,141 +1111,126 @@ class MainController(QObject):
         if not file_path:
             return
 
-        try:
-            self.view.update_status("正在导出Excel文件...")
+        self.start_export(ExcelExporter.export, file_path, "Excel")
 
-            # 获取表格数据
-            table_data = self.get_table_data()
+    def handle_export_access(self):
+        """处理Access数据库导出（使用SQLite作为替代）"""
+        data_count = self.view.get_data_count()
+        if data_count == 0:
+            QMessageBox.information(self.view, "提示", "当前没有数据可以导出。")
+            return
 
-            # 创建DataFrame
-            df = pd.DataFrame(table_data, columns=['时间', '数值(mm)'])
+        if self.is_file_busy():
+            return
 
-            # 写入Excel文件
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='千分表数据', index=False)
+        # 选择保存文件路径（已有文件可以追加）
+        file_path, _ = QFileDialog.getSaveFileName(
+            self.view,
+            "导出SQLite数据库文件",
+            f"千分表数据_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db",
+            "SQLite数据库文件 (*.db);;所有文件 (*.*)",
+            options=QFileDialog.DontConfirmOverwrite
+        )
 
-                # 获取工作表并设置格式
-                worksheet = writer.sheets['千分表数据']
+        if not file_path:
+            return
 
-                # 设置列宽
-                worksheet.column_dimensions['A'].width = 15  # 时间列
-                worksheet.column_dimensions['B'].width = 12  # 数值列
-                worksheet.column_dimensions['C'].width = 10  # 备注列
+        append = False
+        if os.path.exists(file_path):
+            box = QMessageBox(self.view)
+            box.setIcon(QMessageBox.Question)
+            box.setWindowTitle("文件已存在")
+            box.setText(f"{os.path.basename(file_path)} 已存在。\n\n"
+                        f"可以把当前数据作为新的会话追加到该数据库，或覆盖原文件。")
+            append_button = box.addButton("追加", QMessageBox.AcceptRole)
+            overwrite_button = box.addButton("覆盖", QMessageBox.DestructiveRole)
+            box.addButton("取消", QMessageBox.RejectRole)
+            box.setDefaultButton(append_button)
+            box.exec_()
+            if box.clickedButton() is append_button:
+                append = True
+            elif box.clickedButton() is not overwrite_button:
+                return
 
-                # 添加统计信息工作表
-                stats_data = [
-                    ['统计项目', '数值'],
-                    ['总记录数', len(table_data)],
-                    ['最大值', max([float(row[1]) for row in table_data]) if table_data else 0],
-                    ['最小值', min([float(row[1]) for row in table_data]) if table_data else 0],
-                    ['平均值', sum([float(row[1]) for row in table_data]) / len(table_data) if table_data else 0],
-                    ['导出时间', datetime.now().strftime('%Y-%m-%d %H:%M:%S')]
-                ]
+        self.start_export(SqliteExporter.export, file_path, "数据库",
+                          remove_on_cancel=not append, append=append, metadata=self.get_export_metadata())
 
-                stats_df = pd.DataFrame(stats_data[1:], columns=stats_data[0])
-                stats_df.to_excel(writer, sheet_name='统计信息', index=False)
+    def handle_export_npz(self):
+        """处理NumPy列式数组导出"""
+        data_count = self.view.get_data_count()
+        if data_count == 0:
+            QMessageBox.information(self.view, "提示", "当前没有数据可以导出。")
+            return
 
-            self.view.update_status(f"Excel文件导出成功：{os.path.basename(file_path)}")
-            QMessageBox.information(self.view, "导出成功", f"数据已成功导出到：\n{file_path}")
+        if self.is_file_busy():
+            return
 
-        except Exception as e:
-            self.view.update_status(f"Excel导出失败：{str(e)}")
-            QMessageBox.critical(self.view, "导出失败", f"Excel文件导出失败：\n{str(e)}")
+        file_path, _ = QFileDialog.getSaveFileName(
+            self.view,
+            "导出NumPy数组文件",
+            f"千分表数据_{datetime.now().strftime('%Y%m%d_%H%M%S')}{NpzExporter.SUFFIX}",
+            f"NumPy数组文件 (*{NpzExporter.SUFFIX})"
+        )
 
-    def handle_export_access(self):
-        """处理Access数据库导出（使用SQLite作为替代）"""
-        if not ACCESS_AVAILABLE:
-            QMessageBox.warning(
-                self.view,
-                "功能不可用",
-                "数据库导出功能需要sqlite3库支持。"
-            )
+        if not file_path:
             return
 
-        data_count = self.view.get_data_count()
-        if data_count == 0:
+        self.start_export(NpzExporter.export, file_path, "NumPy数组", metadata=self.get_export_metadata())
+
+    def handle_export_range(self):
+        """处理范围导出：只导出选定时间范围内、选定从站的数据（可选重采样）"""
+        if len(self.sample_store) == 0:
             QMessageBox.information(self.view, "提示", "当前没有数据可以导出。")
             return
 
-        # 选择保存文件路径
+        if self.is_file_busy():
+            return
+
+        formats = [("CSV文件", 'csv')]
+        if EXCEL_AVAILABLE:
+            formats.append(("Excel文件", 'xlsx'))
+        formats += [("SQLite数据库", 'db'), ("NumPy数组", 'npz')]
+
+        dialog = ExportRangeDialog(self.sample_store, formats, self.view.chart_widget.get_selected_range(), self.view)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        selection = dialog.get_selection()
+
+        # 通过时间戳索引定位切片，不扫描整个会话
+        store = SampleSlice(self.sample_store, selection['start_ns'], selection['end_ns'], selection['channels'])
+        if len(store) == 0:
+            QMessageBox.information(self.view, "提示", "选定范围内没有数据。")
+            return
+
+        exporters = {
+            'csv': (CsvExporter, "CSV", "CSV文件"),
+            'xlsx': (ExcelExporter, "Excel", "Excel文件"),
+            'db': (SqliteExporter, "数据库", "SQLite数据库文件"),
+            'npz': (NpzExporter, "NumPy数组", "NumPy数组文件"),
+        }
+        exporter, format_name, file_filter = exporters[selection['format']]
+        options = {}
+        if selection['resample'] is not None:
+            exporter, format_name = ResampledCsvExporter, "重采样CSV"
+            options.update(selection['resample'])
+        start, end = store.time_range()
+        stamp = f"{datetime.fromtimestamp(start / 1e9).strftime('%Y%m%d_%H%M%S')}-" \
+                f"{datetime.fromtimestamp(end / 1e9).strftime('%H%M%S')}"
         file_path, _ = QFileDialog.getSaveFileName(
             self.view,
-            "导出SQLite数据库文件",
-            f"千分表数据_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db",
-            "SQLite数据库文件 (*.db);;所有文件 (*.*)"
+            "导出选定范围",
+            f"千分表数据_{stamp}{exporter.SUFFIX}",
+            f"{file_filter} (*{exporter.SUFFIX})"
         )
 
         if not file_path:
             return
 
-        try:
-            self.view.update_status("正在导出数据库文件...")
-
-            # 获取表格数据
-            table_data = self.get_table_data()
-
-            # 创建SQLite数据库
-            conn = sqlite3.connect(file_path)
-            cursor = conn.cursor()
-
-            # 创建数据表
-            cursor.execute('''
-                           CREATE TABLE IF NOT EXISTS gauge_data
-                           (
-                               id
-                               INTEGER
-                               PRIMARY
-                               KEY
-                               AUTOINCREMENT,
-                               timestamp
-                               TEXT
-                               NOT
-                               NULL,
-                               value
-                               REAL
-                               NOT
-                               NULL,
-                               created_at
-                               DATETIME
-                               DEFAULT
-                               CURRENT_TIMESTAMP
-                           )
-                           ''')
-
-            # 插入数据
-            for row_data in table_data:
-                cursor.execute(
-                    'INSERT INTO gauge_data (timestamp, value) VALUES (?, ?)',
-                    row_data
-                )
-
-            # 创建统计视图
-            cursor.execute('''
-                           CREATE VIEW IF NOT EXISTS data_statistics AS
-                           SELECT COUNT(*)                     as total_records,
-                                  MAX(value)                   as max_value,
-                                  MIN(value)                   as min_value,
-                                  AVG(value)                   as avg_value,
-                                  datetime('now', 'localtime') as export_time
-                           FROM gauge_data
-                           ''')
-
-            # 提交并关闭
-            conn.commit()
-            conn.close()
-
-            self.view.update_status(f"数据库文件导出成功：{os.path.basename(file_path)}")
-            QMessageBox.information(
-                self.view,
-                "导出成功",
-                f"数据已成功导出到SQLite数据库：\n{file_path}\n\n"
-                f"注意：由于技术限制，导出为SQLite格式而非Access格式。\n"
-                f"SQLite数据库可以用多种工具打开，包括DB Browser for SQLite等。"
-            )
-
-        except Exception as e:
-            self.view.update_status(f"数据库导出失败：{str(e)}")
-            QMessageBox.critical(self.view, "导出失败", f"数据库文件导出失败：\n{str(e)}")
+        if exporter in (SqliteExporter, NpzExporter):
+            metadata = self.get_export_metadata()
+            metadata['slave_ids'] = store.channels()
+            options['metadata'] = metadata
+        self.start_export(exporter.export, file_path, format_name, store=store, **options)
 
     def change_device_baudrate(self, new_baudrate, detected_baudrate):
         """修改设备波特率"""
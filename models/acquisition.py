@@ -0,0 +1,125 @@
+import threading
+import time
+
+from models.exporters import EXPORT_HEADER, format_csv_rows
+from models.sample_sink import SampleSink
+
+
+class AcquisitionLoop:
+    """采集循环 - 按固定周期依次轮询各从站，把样本交给记录写入端（不依赖 Qt）
+
+    图形界面的连续读取线程和命令行采集共用这个循环。
+    周期按绝对时间安排，读取耗时不会累积成漂移；读取跟不上设定周期时不补读，从当前时间重新计时。
+    """
+
+    def __init__(self, interval, slave_ids=None, recorders=None, on_sample=None, on_recorder_error=None):
+        """
+        Args:
+            interval: 轮询周期（秒），每个周期依次读取所有从站
+            slave_ids: 轮询的从站地址列表
+            recorders: 记录写入端（SampleSink），在采集线程中直接追加
+            on_sample: 每个样本的回调 on_sample(时间戳ns, 原始计数, 从站地址)
+            on_recorder_error: 写入端写入失败时的回调 on_recorder_error(写入端, 异常)，
+                               失败的写入端从循环中移除，读取继续进行
+        """
+        self.interval = interval
+        self.slave_ids = list(slave_ids) if slave_ids else [1]
+        self.recorders = list(recorders or [])
+        self.on_sample = on_sample
+        self.on_recorder_error = on_recorder_error
+        self.cycles = 0
+        self._deadline = None
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self):
+        return not self._stop_event.is_set()
+
+    def stop(self):
+        """请求停止（线程安全，可在信号处理函数中调用）"""
+        self._stop_event.set()
+
+    def poll(self, reader):
+        """一个周期内依次读取所有从站"""
+        if self._deadline is None:
+            self._deadline = time.monotonic()
+        for slave_id in self.slave_ids:
+            raw = reader.read_raw(slave_id)
+            t_ns = time.time_ns()
+            for recorder in self.recorders:
+                recorder.append(t_ns, raw, slave_id)
+            if self.on_sample is not None:
+                self.on_sample(t_ns, raw, slave_id)
+        self.cycles += 1
+        self.check_recorders()
+
+    def check_recorders(self):
+        """移除写入失败的写入端并报告"""
+        failed = [recorder for recorder in self.recorders if recorder.failed]
+        for recorder in failed:
+            self.recorders.remove(recorder)
+            if self.on_recorder_error is not None:
+                self.on_recorder_error(recorder, recorder.error)
+
+    def wait(self):
+        """等待到下一个周期开始，停止时立即返回
+
+        Returns:
+            bool: 是否继续读取
+        """
+        self._deadline += self.interval
+        delay = self._deadline - time.monotonic()
+        if delay <= 0:
+            self._deadline = time.monotonic()
+            return self.running
+        return not self._stop_event.wait(delay)
+
+    def run(self, reader, duration=None):
+        """持续读取直到 stop() 或达到 duration（秒），读取出错时抛出异常"""
+        end = None if duration is None else time.monotonic() + duration
+        while self.running:
+            self.poll(reader)
+            if end is not None and time.monotonic() >= end:
+                break
+            if not self.wait():
+                break
+
+
+class CsvStreamSink(SampleSink):
+    """把样本按 CSV 文本成批写入文本流（标准输出或文件）"""
+
+    NAME = "CSV 输出"
+
+    def __init__(self, stream, scale=1000.0, commit_interval=0.2, header=True, close_stream=False, on_error=None):
+        """
+        Args:
+            stream: 文本流
+            scale: 原始计数与毫米的换算系数
+            commit_interval: 成批写入间隔（秒）
+            header: 是否先写表头
+            close_stream: 关闭时是否关闭文本流
+            on_error: 写入失败时的回调 on_error(异常)（例如管道被关闭时停止采集）
+        """
+        super().__init__(commit_interval)
+        self.stream = stream
+        self.scale = scale
+        self.close_stream = close_stream
+        self.on_error = on_error
+        if header:
+            stream.write(','.join(EXPORT_HEADER) + '\n')
+            stream.flush()
+        self.start()
+
+    def _write(self, samples):
+        t_ns, raw, channel, _ = zip(*samples)
+        try:
+            self.stream.write(format_csv_rows(t_ns, raw, channel, self.scale).replace('\r\n', '\n'))
+            self.stream.flush()
+        except Exception as e:
+            if self.on_error is not None:
+                self.on_error(e)
+            raise
+
+    def _finish(self):
+        if self.close_stream:
+            self.stream.close()
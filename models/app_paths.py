@@ -0,0 +1,22 @@
+import os
+
+
+def get_data_dir(*parts):
+    """获取程序数据目录（不存在时自动创建）
+
+    Windows 下位于 %LOCALAPPDATA%\\QilliTechReader，其他系统位于 ~/.qillitech_reader。
+
+    Args:
+        parts: 子目录名
+
+    Returns:
+        str: 目录路径
+    """
+    if os.name == 'nt' and os.environ.get('LOCALAPPDATA'):
+        base = os.path.join(os.environ['LOCALAPPDATA'], 'QilliTechReader')
+    else:
+        base = os.path.join(os.path.expanduser('~'), '.qillitech_reader')
+
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,200 @@
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from models.exporters import CsvExporter, ExcelExporter, SqliteExporter, NpzExporter
+from models.importers import NpzImporter, get_importer
+from models.recording_log import RecordingLogReader, LOG_SUFFIX
+from models.retention import RollupFile, ROLLUP_SUFFIX
+from models.sample_store import SampleStore
+from models.session_catalog import summarize
+from models.session_file import SessionFile, SESSION_SUFFIX
+
+
+# 转换目标格式 -> 扩展名
+TARGET_FORMATS = {
+    'csv': CsvExporter.SUFFIX,
+    'xlsx': ExcelExporter.SUFFIX,
+    'db': SqliteExporter.SUFFIX,
+    'npz': NpzExporter.SUFFIX,
+    'qsf': SESSION_SUFFIX,
+}
+
+SOURCE_SUFFIXES = (SESSION_SUFFIX, ROLLUP_SUFFIX, LOG_SUFFIX, '.csv', '.xlsx', '.db', '.npz')
+
+# 每个工作进程中样本存储的默认内存预算，超出部分压缩转存到磁盘
+WORKER_MEMORY_BUDGET = 256 * 1024 * 1024
+
+REPORT_NAME = 'convert_report.csv'
+
+REPORT_FIELDS = ['source', 'output', 'status', 'rows', 'channels', 'start', 'end', 'duration_s',
+                 'min_mm', 'max_mm', 'mean_mm', 'std_mm', 'seconds', 'error']
+
+
+def find_sources(paths):
+    """展开输入路径（目录中按扩展名查找可转换的文件）"""
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                sources += [os.path.join(root, name) for name in sorted(names)
+                            if name.lower().endswith(SOURCE_SUFFIXES) and name != REPORT_NAME]
+        else:
+            sources.append(path)
+    return sources
+
+
+def load_source(path, scale=1000.0, memory_budget=None):
+    """打开任意支持的会话或导出文件
+
+    Returns:
+        tuple: (样本来源, 会话信息)
+    """
+    lower = path.lower()
+    if lower.endswith(SESSION_SUFFIX):
+        session = SessionFile(path)
+        return session, dict(session.metadata)
+    if lower.endswith(ROLLUP_SUFFIX):
+        rollup = RollupFile(path)
+        return rollup.to_store('1s'), dict(rollup.metadata)
+    if lower.endswith(LOG_SUFFIX):
+        reader = RecordingLogReader(path)
+        store = SampleStore(reader.scale, memory_budget=memory_budget)
+        for chunk in reader.iter_chunks():
+            store.extend(chunk['t_ns'], chunk['raw'], chunk['channel'], chunk['flags'])
+        return store, dict(reader.metadata)
+
+    importer = get_importer(path)
+    if importer is None:
+        raise Exception(f"不支持的文件格式：{os.path.basename(path)}")
+    metadata = NpzImporter.metadata(path) if importer is NpzImporter else {}
+    return importer.load(path, scale=scale, memory_budget=memory_budget), metadata
+
+
+def export_store(store, path, target, metadata=None):
+    """把样本来源写入目标格式"""
+    if target == 'qsf':
+        SessionFile.write(path, store, metadata)
+    elif target == 'csv':
+        CsvExporter.export(store, path)
+    elif target == 'xlsx':
+        ExcelExporter.export(store, path)
+    elif target == 'db':
+        SqliteExporter.export(store, path, metadata=metadata)
+    elif target == 'npz':
+        NpzExporter.export(store, path, metadata=metadata)
+    else:
+        raise Exception(f"不支持的目标格式：{target}")
+
+
+def convert_file(source, target, out_dir, overwrite=False, scale=1000.0, memory_budget=WORKER_MEMORY_BUDGET):
+    """转换单个文件（在工作进程中执行）
+
+    Returns:
+        dict: 报告的一行（REPORT_FIELDS）
+    """
+    started = time.perf_counter()
+    name = os.path.splitext(os.path.basename(source))[0]
+    output = os.path.join(out_dir, name + TARGET_FORMATS[target])
+    result = {'source': source, 'output': output, 'status': 'ok'}
+
+    if os.path.abspath(output) == os.path.abspath(source):
+        result.update(status='skipped', error='输入与输出相同')
+        return result
+    if os.path.exists(output) and not overwrite:
+        result.update(status='skipped', error='输出文件已存在')
+        return result
+
+    store = None
+    try:
+        store, metadata = load_source(source, scale, memory_budget)
+        summary = summarize(store)
+
+        temp_path = output + '.part'
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        export_store(store, temp_path, target, metadata)
+        os.replace(temp_path, output)
+
+        result.update({
+            'rows': summary['count'],
+            'channels': ' '.join(str(channel) for channel in summary['channels']),
+            'start': _format_ns(summary['start_ns']),
+            'end': _format_ns(summary['end_ns']),
+            'duration_s': (summary['end_ns'] - summary['start_ns']) / 1e9 if summary['count'] else 0,
+            'min_mm': summary['min'],
+            'max_mm': summary['max'],
+            'mean_mm': summary['mean'],
+            'std_mm': summary['std'],
+        })
+    except Exception as e:
+        result.update(status='failed', error=str(e))
+        try:
+            os.remove(output + '.part')
+        except OSError:
+            pass
+    finally:
+        if store is not None:
+            store.close()
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def _format_ns(t_ns):
+    return datetime.fromtimestamp(t_ns / 1e9).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3] if t_ns is not None else ''
+
+
+def run_batch(sources, target, out_dir, workers=None, overwrite=False, scale=1000.0,
+              memory_budget=WORKER_MEMORY_BUDGET, progress=None):
+    """用进程池并行转换多个文件
+
+    每个文件在一个新的工作进程中转换（完成后进程退出，内存归还系统），
+    工作进程内的样本存储受 memory_budget 限制。
+
+    Args:
+        sources: 输入文件列表
+        target: 目标格式（TARGET_FORMATS 的键）
+        out_dir: 输出目录
+        workers: 进程数，默认为 CPU 核数
+        overwrite: 是否覆盖已存在的输出文件
+        scale: 文本格式输入的换算系数
+        memory_budget: 每个工作进程的样本存储内存预算（字节）
+        progress: 进度回调 progress(已完成数, 总数, 报告行)
+
+    Returns:
+        list: 报告行，顺序与 sources 相同
+    """
+    if target not in TARGET_FORMATS:
+        raise Exception(f"不支持的目标格式：{target}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    results = [None] * len(sources)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(sources) or 1))
+    # Python 3.11 起可以让每个进程只处理一个文件
+    options = {'max_tasks_per_child': 1} if sys.version_info >= (3, 11) else {}
+    with ProcessPoolExecutor(workers, **options) as pool:
+        futures = {
+            pool.submit(convert_file, source, target, out_dir, overwrite, scale, memory_budget): index
+            for index, source in enumerate(sources)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                # 工作进程异常退出（例如内存不足被终止）
+                results[index] = {'source': sources[index], 'status': 'failed', 'error': str(e)}
+            if progress is not None:
+                progress(done, len(sources), results[index])
+    return results
+
+
+def write_report(path, results):
+    """写入 CSV 格式的转换报告"""
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
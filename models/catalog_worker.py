@@ -0,0 +1,95 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+
+from models.app_paths import get_data_dir
+from models.recording_log import RecordingLog
+from models.session_catalog import SessionCatalog
+
+
+class CatalogWorker(QObject):
+    """会话目录更新工作线程 - 把已关闭的记录日志转换为会话文件并登记到目录"""
+
+    sessionAdded = pyqtSignal(str)  # 新登记的会话文件路径
+    recordingsRecovered = pyqtSignal(int, int)  # 恢复的日志数, 恢复的样本数
+    finished = pyqtSignal()
+
+    def __init__(self, log_paths=None, recover=False):
+        """
+        Args:
+            log_paths: 要转换的日志路径，None 表示处理所有待转换的日志
+            recover: 是否先恢复未正常结束（崩溃、断电）的记录日志，并使目录与会话文件一致
+        """
+        super().__init__()
+        self.log_paths = log_paths
+        self.recover = recover
+        self.running = False
+
+    def stop(self):
+        """在当前文件完成后停止"""
+        self.running = False
+
+    def run(self):
+        """执行转换"""
+        self.running = True
+        catalog = None
+        try:
+            catalog = SessionCatalog()
+            if self.recover:
+                self.rebuild_catalog(catalog)
+                self.recover_recordings(catalog)
+            paths = self.log_paths if self.log_paths is not None else SessionCatalog.pending_recordings()
+            for path in paths:
+                if not self.running:
+                    break
+                try:
+                    entry = catalog.finalize_recording(path)
+                    if entry is not None:
+                        self.sessionAdded.emit(entry['path'])
+                except Exception as e:
+                    print(f"会话登记失败 {path}: {e}")
+        except Exception as e:
+            print(f"会话目录更新异常: {e}")
+        finally:
+            if catalog is not None:
+                catalog.close()
+        self.finished.emit()
+
+    def rebuild_catalog(self, catalog):
+        """移除文件已丢失的目录条目，登记尚未登记的会话文件"""
+        try:
+            added, removed = catalog.rebuild()
+        except Exception as e:
+            print(f"检查会话目录失败: {e}")
+            return
+        if removed:
+            print(f"已从会话目录移除 {removed} 个文件已丢失的会话")
+        for entry in added:
+            self.sessionAdded.emit(entry['path'])
+
+    def recover_recordings(self, catalog):
+        """把未正常结束的记录日志截掉不完整的帧后转换为单独的会话文件（不并入当前数据）"""
+        try:
+            paths = RecordingLog.find_unfinished(get_data_dir('recordings'))
+        except Exception as e:
+            print(f"检查记录日志失败: {e}")
+            return
+
+        recovered, count = 0, 0
+        for path in paths:
+            if not self.running:
+                break
+            try:
+                # 读取时自动截止到最后一个完整帧，不需要先补写结束标记；
+                # 目录条目登记后才删除日志，转换中断时日志仍是未结束状态，下次启动继续按恢复处理
+                entry = catalog.finalize_recording(path, recovered=True)
+                if entry is None:
+                    continue
+                recovered += 1
+                count += entry['sample_count']
+                self.sessionAdded.emit(entry['path'])
+            except Exception as e:
+                print(f"恢复记录失败 {path}: {e}")
+
+        if recovered:
+            self.recordingsRecovered.emit(recovered, count)
@@ -6,47 +6,61 @@ from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 
+from models.acquisition import AcquisitionLoop
+from models.gauge_reader import GaugeReader
+
 class ContinuousReadWorker(QObject):
-    """连续读取工作线程"""
+    """连续读取工作线程（采集循环见 AcquisitionLoop，与命令行采集相同）"""
 
-    dataRead = pyqtSignal(float, str)  # 数据值, 时间戳
+    dataRead = pyqtSignal(float, float, int, int)  # 数据值, 时间戳(秒), 从站地址, 原始计数
     errorOccurred = pyqtSignal(str)
+    recorderFailed = pyqtSignal(str)  # 记录写入端写入失败（读取继续进行）
     finished = pyqtSignal()
 
-    def __init__(self, serial_model, interval):
+    def __init__(self, serial_model, interval, slave_ids=None, recorders=None):
         super().__init__()
         self.serial_model = serial_model
         self.interval = interval
-        self.running = False
+        # 轮询的从站地址列表，每个从站对应图表中的一个通道
+        # 记录写入端（记录日志、SQLite 等）：在采集线程中直接写入，不依赖界面线程
+        self.loop = AcquisitionLoop(interval, slave_ids, recorders, on_sample=self.emit_sample,
+                                    on_recorder_error=self.emit_recorder_error)
+        self.slave_ids = self.loop.slave_ids
+
+    @property
+    def running(self):
+        return self.loop.running
 
     def start_reading(self):
         """开始读取"""
-        self.running = True
         self.run()
 
     def stop_reading(self):
         """停止读取"""
-        self.running = False
+        self.loop.stop()
+
+    def emit_sample(self, t_ns, raw, slave_id):
+        self.dataRead.emit(raw / GaugeReader.VALUE_SCALE, t_ns / 1e9, slave_id, raw)
+
+    def emit_recorder_error(self, recorder, error):
+        self.recorderFailed.emit(f"{recorder.NAME}写入失败，已停止记录：{error}")
 
     def run(self):
         """执行连续读取"""
-        while self.running:
+        while self.loop.running:
             try:
-                if self.serial_model.gauge_reader:
-                    value = self.serial_model.gauge_reader.read_value()
-                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-                    self.dataRead.emit(value, timestamp)
-                else:
+                reader = self.serial_model.gauge_reader
+                if not reader:
                     self.errorOccurred.emit("设备连接已断开")
                     break
 
-                # 等待指定间隔
-                start_time = time.time()
-                while self.running and (time.time() - start_time) < self.interval:
-                    time.sleep(0.001)  # 短暂休眠，允许停止信号
+                # 一个周期内依次读取所有从站，然后等待到下一个周期（停止信号可随时打断等待）
+                self.loop.poll(reader)
+                if not self.loop.wait():
+                    break
 
             except Exception as e:
                 self.errorOccurred.emit(f"读取错误: {str(e)}")
                 break
 
-        self.finished.emit()
\ No newline at end of file
+        self.finished.emit()
@@ -0,0 +1,59 @@
+import os
+
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+
+from models.exporters import ExportCancelled
+
+
+class ExportWorker(QObject):
+    """后台导出工作线程"""
+
+    progress = pyqtSignal(int, int)  # 已完成行数, 总行数
+    finished = pyqtSignal(int)  # 导出的行数
+    errorOccurred = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, export_function, store, file_path, remove_on_cancel=True, **options):
+        """
+        Args:
+            export_function: 导出函数 export(store, path, progress, **options)
+            store: 样本来源
+            file_path: 目标文件路径
+            remove_on_cancel: 取消时是否删除目标文件（追加到已有文件时为 False）
+            options: 传给导出函数的其他参数
+        """
+        super().__init__()
+        self.export_function = export_function
+        self.store = store
+        self.file_path = file_path
+        self.remove_on_cancel = remove_on_cancel
+        self.options = options
+        self.running = True  # 线程启动前取消也有效
+
+    def cancel(self):
+        """请求取消导出"""
+        self.running = False
+
+    def report_progress(self, done, total):
+        """导出函数的进度回调，已取消时中断导出"""
+        if not self.running:
+            raise ExportCancelled()
+        self.progress.emit(done, total)
+
+    def run(self):
+        """执行导出"""
+        try:
+            count = self.export_function(self.store, self.file_path, self.report_progress, **self.options)
+            self.finished.emit(count)
+        except ExportCancelled:
+            # 删除未完成的文件
+            if self.remove_on_cancel:
+                try:
+                    os.remove(self.file_path)
+                except OSError:
+                    pass
+            self.cancelled.emit()
+        except Exception as e:
+            self.errorOccurred.emit(str(e))
@@ -8,6 +8,9 @@ from datetime import datetime
 class GaugeReader:
     """千分表485转接盒读取器 - 来自你的原始代码"""
 
+    # 设备原始计数与毫米的换算系数
+    VALUE_SCALE = 1000.0
+
     def __init__(self, port='COM7', baudrate=9600):
         self.port = port
         self.baudrate = baudrate
@@ -77,14 +80,28 @@ class GaugeReader:
         except Exception:
             return False
 
-    def read_value(self):
-        """读取一次数值"""
+    def read_value(self, slave_id=None):
+        """读取一次数值（毫米）
+
+        Args:
+            slave_id: 从站地址，默认使用 self.slave_id
+        """
+        return self.read_raw(slave_id) / self.VALUE_SCALE
+
+    def read_raw(self, slave_id=None):
+        """读取一次设备原始计数（32位有符号整数）
+
+        Args:
+            slave_id: 从站地址，默认使用 self.slave_id
+        """
         if not self.serial or not self.serial.is_open:
             raise Exception("串口未连接")
 
+        slave = self.slave_id if slave_id is None else slave_id
+
         try:
-            # 构建读取命令: 01 04 00 37 00 02 + CRC
-            cmd = [0x01, 0x04, 0x00, 0x37, 0x00, 0x02]
+            # 构建读取命令: <从站> 04 00 37 00 02 + CRC
+            cmd = [slave, 0x04, 0x00, 0x37, 0x00, 0x02]
             crc = self.crc16(cmd)
             cmd.extend([crc & 0xFF, (crc >> 8) & 0xFF])
 
@@ -94,10 +111,9 @@ class GaugeReader:
 
             response = self.serial.read(9)
             if len(response) >= 9:
-                if response[0] == 0x01 and response[1] == 0x04 and response[2] == 0x04:
-                    raw_data = struct.unpack('>i', response[3:7])[0]
-                    # 修改这里：改为除以1000而不是10000
-                    return raw_data / 1000.0
+                if response[0] == slave and response[1] == 0x04 and response[2] == 0x04:
+                    # 原始计数除以 VALUE_SCALE (1000) 即为毫米值
+                    return struct.unpack('>i', response[3:7])[0]
 
             raise Exception("读取数据格式错误")
 
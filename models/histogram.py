@@ -0,0 +1,128 @@
+import math
+
+import numpy as np
+
+
+class StreamingHistogram:
+    """会话级流式直方图
+
+    固定桶数，桶宽从设备分辨率（0.001mm）开始；数据超出范围时相邻桶两两合并、
+    桶宽翻倍，合并是精确的，因此任意长度的会话都只占用固定内存。
+    每批样本的更新代价为 O(批大小)，同时精确维护计数、均值、方差和极值。
+    """
+
+    def __init__(self, bins=256, initial_width=0.001):
+        self.bins = bins + bins % 2
+        self.initial_width = initial_width
+        self.reset()
+
+    def reset(self):
+        """清空直方图"""
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+        self.low = None
+        self.width = self.initial_width
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def high(self):
+        return self.low + self.bins * self.width
+
+    @property
+    def std(self):
+        return math.sqrt(self._m2 / self.count) if self.count else float('nan')
+
+    def add(self, value):
+        """加入单个样本"""
+        self.extend(np.array([value], dtype=float))
+
+    def extend(self, values):
+        """加入一批样本"""
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        n = len(values)
+        if n == 0:
+            return
+
+        batch_min, batch_max = values.min(), values.max()
+        if self.low is None:
+            # 以首批数据为中心建立初始范围，桶边界对齐到桶宽
+            center = math.floor((batch_min + batch_max) / 2 / self.width) * self.width
+            self.low = center - self.bins // 2 * self.width
+        self._expand(batch_min, batch_max)
+
+        index = ((values - self.low) / self.width).astype(np.int64)
+        np.clip(index, 0, self.bins - 1, out=index)
+        self.counts += np.bincount(index, minlength=self.bins)
+
+        # 批量合并均值和二阶矩（Chan 并行算法）
+        batch_mean = values.mean()
+        batch_m2 = ((values - batch_mean) ** 2).sum()
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += batch_m2 + delta * delta * self.count * n / total
+        self.count = total
+
+        self.min = min(self.min, batch_min)
+        self.max = max(self.max, batch_max)
+
+    def _expand(self, low, high):
+        """扩展范围直至覆盖 [low, high]"""
+        while low < self.low or high >= self.high:
+            if low < self.low:
+                # 向下扩展：左侧补一倍空桶后两两合并
+                counts = np.concatenate((np.zeros(self.bins, dtype=np.int64), self.counts))
+                self.low -= self.bins * self.width
+            else:
+                counts = np.concatenate((self.counts, np.zeros(self.bins, dtype=np.int64)))
+            self.counts = counts.reshape(self.bins, 2).sum(axis=1)
+            self.width *= 2
+
+    def edges(self):
+        """返回桶边界数组"""
+        return self.low + np.arange(self.bins + 1) * self.width
+
+    def percentile(self, q):
+        """估算百分位数（桶内线性插值）
+
+        Args:
+            q: 百分位（0-100），可以是数组
+
+        Returns:
+            float 或 ndarray
+        """
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else float('nan')
+
+        cumulative = np.concatenate(([0], np.cumsum(self.counts)))
+        result = np.interp(np.asarray(q, dtype=float) / 100 * self.count, cumulative, self.edges())
+        return np.clip(result, self.min, self.max)
+
+    def fraction_below(self, limit):
+        """估算小于 limit 的样本比例"""
+        if self.count == 0:
+            return 0.0
+        if limit <= self.min:
+            return 0.0
+        if limit > self.max:
+            return 1.0
+        cumulative = np.concatenate(([0], np.cumsum(self.counts)))
+        return float(np.interp(limit, self.edges(), cumulative)) / self.count
+
+    def fraction_above(self, limit):
+        """估算大于 limit 的样本比例"""
+        if self.count == 0 or limit >= self.max:
+            return 0.0
+        return 1.0 - self.fraction_below(limit)
+
+    def occupied(self):
+        """返回有数据的桶范围 (边界数组, 计数数组)，用于绘制"""
+        nonzero = np.flatnonzero(self.counts)
+        if len(nonzero) == 0:
+            return np.array([]), np.array([])
+        first, last = nonzero[0], nonzero[-1] + 1
+        return self.edges()[first:last + 1], self.counts[first:last]
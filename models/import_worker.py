@@ -0,0 +1,51 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+
+from models.importers import ImportCancelled
+
+
+class ImportWorker(QObject):
+    """后台导入工作线程"""
+
+    progress = pyqtSignal(int, int)  # 已完成, 总数
+    finished = pyqtSignal(object)  # 导入的样本存储
+    errorOccurred = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, load_function, file_path, **options):
+        """
+        Args:
+            load_function: 导入函数 load(path, progress, **options)，返回样本存储
+            file_path: 文件路径
+            options: 传给导入函数的其他参数
+        """
+        super().__init__()
+        self.load_function = load_function
+        self.file_path = file_path
+        self.options = options
+        self.running = True  # 线程启动前取消也有效
+
+    def cancel(self):
+        """请求取消导入"""
+        self.running = False
+
+    def report_progress(self, done, total):
+        """导入函数的进度回调，已取消时中断导入"""
+        if not self.running:
+            raise ImportCancelled()
+        self.progress.emit(done, total)
+
+    def run(self):
+        """执行导入"""
+        try:
+            store = self.load_function(self.file_path, self.report_progress, **self.options)
+            if self.running:
+                self.finished.emit(store)
+            else:
+                store.close()
+                self.cancelled.emit()
+        except ImportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.errorOccurred.emit(str(e))
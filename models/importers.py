@@ -0,0 +1,541 @@
+import json
+import os
+import re
+import sqlite3
+import zipfile
+from datetime import datetime, timedelta
+from xml.etree import ElementTree
+
+import numpy as np
+
+from models.exporters import EXCEL_EPOCH_DAYS, NS_PER_DAY
+from models.sample_store import SampleStore
+
+try:
+    import pandas as pd
+    PANDAS_AVAILABLE = True
+except ImportError:
+    PANDAS_AVAILABLE = False
+
+try:
+    from openpyxl import load_workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+
+# 每批读取的行数
+IMPORT_CHUNK = 262144
+
+# xlsx 工作表 XML 每次读取的字节数
+XML_BLOCK = 8 * 1024 * 1024
+
+STATS_SHEET = '统计信息'
+
+
+class ImportCancelled(Exception):
+    """导入被用户取消"""
+
+
+def _utc_offset_ns(local_ns):
+    """本地时间（纳秒，无时区）对应的 UTC 偏移（纳秒）"""
+    local = datetime(1970, 1, 1) + timedelta(microseconds=int(local_ns) // 1000)
+    return int(round(int(local_ns) / 1e9 - local.timestamp())) * 10 ** 9
+
+
+def local_to_epoch_ns(local_ns):
+    """将本地时间（无时区的纳秒数组）转换为纳秒时间戳，format_timestamps 的逆变换
+
+    按批首尾的时区偏移向量化转换；批内跨越夏令时切换时逐个转换。
+    """
+    local_ns = np.asarray(local_ns, dtype=np.int64)
+    if len(local_ns) == 0:
+        return local_ns
+    first = _utc_offset_ns(local_ns[0])
+    last = _utc_offset_ns(local_ns[-1])
+    if first == last:
+        return local_ns - first
+    return np.array([t - _utc_offset_ns(t) for t in local_ns], dtype=np.int64)
+
+
+class TimeParser:
+    """解析导出文件中的时间文本
+
+    支持 "YYYY-MM-DD HH:MM:SS.mmm"；早期版本导出的文件只有 "HH:MM:SS.mmm"，
+    日期取文件的修改日期，时间倒退时视为跨过午夜。
+    """
+
+    def __init__(self, path):
+        self.base_date = datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y-%m-%d')
+        self._day = 0
+        self._last = None
+
+    def parse(self, text):
+        """解析一批时间文本
+
+        Returns:
+            np.ndarray: 纳秒时间戳
+        """
+        text = np.char.strip(np.asarray(text, dtype=str))
+        if len(text) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        if len(text[0]) > 12:
+            local = text.astype('datetime64[ms]').astype('datetime64[ns]').astype(np.int64)
+            return local_to_epoch_ns(local)
+
+        # 只有时间：按顺序累计跨越的午夜
+        seconds = np.char.add(f'{self.base_date}T', text).astype('datetime64[ms]')
+        local = seconds.astype('datetime64[ns]').astype(np.int64)
+        previous = np.concatenate(([self._last if self._last is not None else local[0]], local[:-1]))
+        days = self._day + np.cumsum(local < previous)
+        self._day = int(days[-1])
+        self._last = int(local[-1])
+        return local_to_epoch_ns(local + days * NS_PER_DAY)
+
+
+def _new_store(scale, memory_budget):
+    return SampleStore(scale, memory_budget=memory_budget)
+
+
+def _finish_store(store):
+    """导入的数据以只读方式显示（开始连续读取时切换回新的会话存储）"""
+    store.readonly = True
+    return store
+
+
+def _append(store, t_ns, values, channel):
+    """把一批毫米数值转换为原始计数写入存储"""
+    store.extend(t_ns, np.round(np.asarray(values, dtype=np.float64) * store.scale).astype(np.int32), channel)
+
+
+class CsvImporter:
+    """CSV 导入 - pandas 按块读取（指定列类型），时间文本向量化解析"""
+
+    SUFFIX = '.csv'
+
+    @staticmethod
+    def load(path, progress=None, scale=1000.0, memory_budget=None):
+        """读取导出的 CSV 文件
+
+        Args:
+            path: 文件路径
+            progress: 进度回调 progress(已完成, 总数)，抛出 ImportCancelled 可取消导入
+            scale: 原始计数与毫米的换算系数
+            memory_budget: 样本存储的内存预算
+
+        Returns:
+            SampleStore: 只读样本存储
+        """
+        if not PANDAS_AVAILABLE:
+            raise Exception("导入CSV文件需要安装pandas库")
+
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            header = f.readline().strip().split(',')
+        if len(header) < 2:
+            raise Exception("无法识别的CSV文件格式")
+
+        # 早期版本导出的文件没有从站列
+        dtype = {header[0]: str, header[1]: np.float64}
+        if len(header) > 2:
+            dtype[header[2]] = np.int16
+
+        store = _new_store(scale, memory_budget)
+        parser = TimeParser(path)
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                reader = pd.read_csv(f, encoding='utf-8-sig', usecols=list(dtype), dtype=dtype,
+                                     chunksize=IMPORT_CHUNK, skipinitialspace=True)
+                for chunk in reader:
+                    t_ns = parser.parse(chunk[header[0]].to_numpy(dtype=str))
+                    channel = chunk[header[2]].to_numpy() if len(header) > 2 else 1
+                    _append(store, t_ns, chunk[header[1]].to_numpy(), channel)
+                    if progress is not None:
+                        progress(min(f.tell(), size), size)
+        except BaseException:
+            store.close()
+            raise
+        return _finish_store(store)
+
+
+class ExcelImporter:
+    """Excel 导入 - 直接流式解析工作表 XML
+
+    openpyxl 逐个单元格创建对象，百万行需要约一分钟。导出的工作表结构固定，
+    这里按块用正则提取单元格再按列向量化转换；遇到无法识别的结构时改用 openpyxl 读取。
+    """
+
+    SUFFIX = '.xlsx'
+
+    CELL_PATTERN = re.compile(rb'<c r="([A-Z]+)\d+"([^>]*?)(?:/>|>(.*?)</c>)', re.S)
+    TYPE_PATTERN = re.compile(rb'\bt="(\w+)"')
+    VALUE_PATTERN = re.compile(rb'<v>([^<]*)</v>')
+    TEXT_PATTERN = re.compile(rb'<t[^>]*>(.*?)</t>', re.S)
+    SHARED_PATTERN = re.compile(rb'<si>(.*?)</si>', re.S)
+
+    @staticmethod
+    def load(path, progress=None, scale=1000.0, memory_budget=None):
+        """读取导出的 xlsx 文件（所有数据工作表，跳过统计信息）
+
+        Args:
+            path: 文件路径
+            progress: 进度回调 progress(已完成, 总数)，抛出 ImportCancelled 可取消导入
+            scale: 原始计数与毫米的换算系数
+            memory_budget: 样本存储的内存预算
+
+        Returns:
+            SampleStore: 只读样本存储
+        """
+        store = _new_store(scale, memory_budget)
+        try:
+            try:
+                ExcelImporter._load_xml(path, store, progress)
+            except (ValueError, TypeError, IndexError) as e:
+                if not OPENPYXL_AVAILABLE:
+                    raise Exception(f"无法识别的Excel文件格式：{e}")
+                print(f"Excel快速读取失败，改用openpyxl: {e}")
+                store.clear()
+                ExcelImporter._load_openpyxl(path, store, progress)
+        except BaseException:
+            store.close()
+            raise
+        return _finish_store(store)
+
+    @staticmethod
+    def _sheet_paths(archive):
+        """按工作簿顺序列出数据工作表在压缩包中的路径"""
+        ns = {
+            'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+            'rel': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+            'pkg': 'http://schemas.openxmlformats.org/package/2006/relationships',
+        }
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        relations = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        targets = {rel.get('Id'): rel.get('Target') for rel in relations.findall('pkg:Relationship', ns)}
+
+        paths = []
+        for sheet in workbook.find('main:sheets', ns):
+            if sheet.get('name') == STATS_SHEET:
+                continue
+            target = targets[sheet.get(f"{{{ns['rel']}}}id")]
+            paths.append(target.lstrip('/') if target.startswith('/') else 'xl/' + target)
+        return paths
+
+    @staticmethod
+    def _shared_strings(archive):
+        if 'xl/sharedStrings.xml' not in archive.namelist():
+            return None
+        data = archive.read('xl/sharedStrings.xml')
+        return np.array([
+            b''.join(ExcelImporter.TEXT_PATTERN.findall(item)).decode('utf-8')
+            for item in ExcelImporter.SHARED_PATTERN.findall(data)
+        ])
+
+    @staticmethod
+    def _load_xml(path, store, progress):
+        parser = TimeParser(path)
+        with zipfile.ZipFile(path) as archive:
+            sheets = ExcelImporter._sheet_paths(archive)
+            shared = ExcelImporter._shared_strings(archive)
+            total = sum(archive.getinfo(sheet).file_size for sheet in sheets)
+            done = 0
+
+            for sheet in sheets:
+                header = True
+                with archive.open(sheet) as f:
+                    remainder = b''
+                    while True:
+                        block = f.read(XML_BLOCK)
+                        data = remainder + block
+                        if block:
+                            # 只处理完整的行，剩余部分与下一块拼接
+                            end = data.rfind(b'</row>')
+                            if end < 0:
+                                remainder = data
+                                continue
+                            end += len(b'</row>')
+                            data, remainder = data[:end], data[end:]
+
+                        cells = ExcelImporter.CELL_PATTERN.findall(data)
+                        if len(cells) != data.count(b'<c ') + data.count(b'<c>'):
+                            raise ValueError("存在无法识别的单元格")
+                        if header and cells:
+                            cells = ExcelImporter._skip_header(cells)
+                            header = False
+                        if cells:
+                            ExcelImporter._append_cells(store, cells, shared, parser)
+
+                        done += len(block)
+                        if progress is not None:
+                            progress(min(done, total), total)
+                        if not block:
+                            break
+
+    @staticmethod
+    def _skip_header(cells):
+        """去掉第一行（表头）的单元格"""
+        count = 1
+        while count < len(cells) and cells[count][0] > cells[count - 1][0]:
+            count += 1
+        return cells[count:]
+
+    @staticmethod
+    def _column_values(cells, shared):
+        """把一列单元格转换为数组（数字单元格为 float，文本单元格为 str）
+
+        逐个检查单元格的类型和内容结构，与导出格式不符时抛出 ValueError（改用 openpyxl 读取）。
+        """
+        types = {match.group(1) if match else b'n'
+                 for match in (ExcelImporter.TYPE_PATTERN.search(attrs) for _, attrs, _ in cells)}
+        if len(types) != 1:
+            raise ValueError("同一列的单元格类型不一致")
+        kind = types.pop()
+
+        inner = [value for _, _, value in cells]
+        if kind == b'inlineStr':
+            if any(not value for value in inner):
+                raise ValueError("存在空单元格")
+            return np.array([b''.join(ExcelImporter.TEXT_PATTERN.findall(value)).decode('utf-8') for value in inner])
+        if kind not in (b'n', b's', b'str'):
+            raise ValueError(f"不支持的单元格类型 {kind.decode()}")
+
+        matches = [ExcelImporter.VALUE_PATTERN.fullmatch(value) if value else None for value in inner]
+        if any(match is None for match in matches):
+            raise ValueError("单元格内容无法识别")
+        text = [match.group(1) for match in matches]
+
+        if kind == b'n':
+            return np.array(text).astype(np.float64)
+        if kind == b'str':
+            return np.array([value.decode('utf-8') for value in text])
+        if shared is None:
+            raise ValueError("缺少共享字符串表")
+        index = np.array(text).astype(np.int64)
+        if len(index) and (index.min() < 0 or index.max() >= len(shared)):
+            raise ValueError("共享字符串索引越界")
+        return shared[index]
+
+    @staticmethod
+    def _append_cells(store, cells, shared, parser):
+        # 每行必须依次是 A、B（、C）列，缺少或多出单元格时改用 openpyxl 读取
+        letters = [cell[0] for cell in cells]
+        layout = [b'A', b'B', b'C'] if b'C' in letters[:3] else [b'A', b'B']
+        if len(cells) % len(layout) or any(
+                letters[column::len(layout)].count(letter) != len(cells) // len(layout)
+                for column, letter in enumerate(layout)):
+            raise ValueError("存在空单元格或多余的列")
+        columns = {letter: cells[column::len(layout)] for column, letter in enumerate(layout)}
+        times, values = columns[b'A'], columns[b'B']
+        channels = columns.get(b'C')
+
+        time_values = ExcelImporter._column_values(times, shared)
+        if time_values.dtype.kind == 'f':
+            # Excel 日期序列号（本地时间），截断到毫秒
+            local_ms = np.round((time_values - EXCEL_EPOCH_DAYS) * 86400000).astype(np.int64)
+            t_ns = local_to_epoch_ns(local_ms * 10 ** 6)
+        else:
+            t_ns = parser.parse(time_values)
+
+        value_array = ExcelImporter._column_values(values, shared)
+        if value_array.dtype.kind != 'f':
+            value_array = value_array.astype(np.float64)
+        channel = ExcelImporter._column_values(channels, shared).astype(np.int16) if channels else 1
+        _append(store, t_ns, value_array, channel)
+
+    @staticmethod
+    def _load_openpyxl(path, store, progress):
+        parser = TimeParser(path)
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            sheets = [sheet for sheet in workbook.worksheets if sheet.title != STATS_SHEET]
+            total = sum(sheet.max_row or 0 for sheet in sheets)
+            done = 0
+            for sheet in sheets:
+                rows = []
+                for row in sheet.iter_rows(min_row=2, max_col=3, values_only=True):
+                    # 没有时间或数值的行不是样本；缺少从站地址时按 1 处理
+                    if len(row) < 2 or row[0] is None or row[1] is None:
+                        continue
+                    rows.append((row[0], row[1], row[2] if len(row) > 2 and row[2] is not None else 1))
+                    if len(rows) >= IMPORT_CHUNK:
+                        ExcelImporter._append_rows(store, rows, parser)
+                        done += len(rows)
+                        rows = []
+                        if progress is not None:
+                            progress(done, total)
+                ExcelImporter._append_rows(store, rows, parser)
+                done += len(rows)
+                if progress is not None:
+                    progress(done, total)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _append_rows(store, rows, parser):
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        if isinstance(columns[0][0], datetime):
+            local = np.array(columns[0], dtype='datetime64[ms]').astype('datetime64[ns]').astype(np.int64)
+            t_ns = local_to_epoch_ns(local)
+        else:
+            t_ns = parser.parse([str(value) for value in columns[0]])
+        _append(store, t_ns, np.array(columns[1], dtype=np.float64), np.array(columns[2], dtype=np.int16))
+
+
+class SqliteImporter:
+    """SQLite 导入 - 游标按块直接读入数组"""
+
+    SUFFIX = '.db'
+
+    @staticmethod
+    def _connect(path):
+        return sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+
+    @staticmethod
+    def sessions(path):
+        """列出数据库中的导出会话
+
+        Returns:
+            list: [(会话 id, 名称, 样本数), ...]；旧版本导出的数据库没有会话表，返回空列表
+        """
+        conn = SqliteImporter._connect(path)
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if 'gauge_data' not in tables:
+                raise Exception("数据库中没有千分表数据（gauge_data 表）")
+            if 'sessions' not in tables:
+                return []
+            return conn.execute('SELECT id, name, sample_count FROM sessions ORDER BY id').fetchall()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def load(path, progress=None, scale=1000.0, memory_budget=None, session_id=None):
+        """读取导出的 SQLite 数据库
+
+        Args:
+            path: 文件路径
+            progress: 进度回调 progress(已完成, 总数)，抛出 ImportCancelled 可取消导入
+            scale: 原始计数与毫米的换算系数（数据库记录了换算系数时以数据库为准）
+            memory_budget: 样本存储的内存预算
+            session_id: 要读取的会话，None 表示全部数据
+
+        Returns:
+            SampleStore: 只读样本存储
+        """
+        conn = SqliteImporter._connect(path)
+        try:
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(gauge_data)')]
+            has_sessions = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'sessions'"
+            ).fetchone()[0]
+
+            where, params = '', []
+            if session_id is not None and 'session_id' in columns:
+                where, params = ' WHERE session_id = ?', [session_id]
+                if has_sessions:
+                    row = conn.execute('SELECT scale FROM sessions WHERE id = ?', (session_id,)).fetchone()
+                    if row and row[0]:
+                        scale = row[0]
+
+            # 旧版本导出的数据只有时间文本
+            time_column = 'timestamp'
+            if 't_ns' in columns and not conn.execute(
+                    f'SELECT COUNT(*) FROM gauge_data{where}{" AND" if where else " WHERE"} t_ns IS NULL', params
+            ).fetchone()[0]:
+                time_column = 't_ns'
+            channel_column = 'slave_id' if 'slave_id' in columns else '1'
+
+            # 按会话读取时沿 (session_id, t_ns) 索引顺序读取，避免临时排序
+            order = 't_ns, id' if where and time_column == 't_ns' else 'id'
+
+            total = conn.execute(f'SELECT COUNT(*) FROM gauge_data{where}', params).fetchone()[0]
+            cursor = conn.execute(
+                f'SELECT {time_column}, value, COALESCE({channel_column}, 1) FROM gauge_data{where} ORDER BY {order}',
+                params
+            )
+
+            store = _new_store(scale, memory_budget)
+            parser = TimeParser(path)
+            done = 0
+            try:
+                while True:
+                    rows = cursor.fetchmany(IMPORT_CHUNK)
+                    if not rows:
+                        break
+                    times, values, channels = zip(*rows)
+                    if time_column == 't_ns':
+                        t_ns = np.array(times, dtype=np.int64)
+                    else:
+                        t_ns = parser.parse(times)
+                    _append(store, t_ns, np.array(values, dtype=np.float64), np.array(channels, dtype=np.int16))
+
+                    done += len(rows)
+                    if progress is not None:
+                        progress(done, total)
+            except BaseException:
+                store.close()
+                raise
+        finally:
+            conn.close()
+        return _finish_store(store)
+
+
+class NpzImporter:
+    """NumPy 列式数组（.npz）导入"""
+
+    SUFFIX = '.npz'
+
+    @staticmethod
+    def load(path, progress=None, scale=1000.0, memory_budget=None):
+        """读取 NpzExporter 导出的文件（换算系数以文件为准）
+
+        Returns:
+            SampleStore: 只读样本存储
+        """
+        with np.load(path) as data:
+            if 't_ns' not in data.files:
+                raise Exception("无法识别的npz文件（缺少 t_ns 数组）")
+            if 'scale' in data.files:
+                scale = float(data['scale'])
+            t_ns = data['t_ns']
+            if 'raw' in data.files:
+                raw = data['raw']
+            else:
+                raw = np.round(data['value'] * scale).astype(np.int32)
+            channel = data['channel'] if 'channel' in data.files else 1
+            flags = data['flags'] if 'flags' in data.files else 0
+
+        store = _new_store(scale, memory_budget)
+        total = len(t_ns)
+        for start in range(0, total, IMPORT_CHUNK):
+            stop = start + IMPORT_CHUNK
+            store.extend(t_ns[start:stop], raw[start:stop],
+                         channel[start:stop] if np.ndim(channel) else channel,
+                         flags[start:stop] if np.ndim(flags) else flags)
+            if progress is not None:
+                progress(min(stop, total), total)
+        return _finish_store(store)
+
+    @staticmethod
+    def metadata(path):
+        """读取 npz 文件中保存的会话信息"""
+        with np.load(path) as data:
+            if 'metadata' not in data.files:
+                return {}
+            return json.loads(str(data['metadata']))
+
+
+IMPORTERS = {
+    CsvImporter.SUFFIX: CsvImporter,
+    ExcelImporter.SUFFIX: ExcelImporter,
+    SqliteImporter.SUFFIX: SqliteImporter,
+    NpzImporter.SUFFIX: NpzImporter,
+}
+
+
+def get_importer(path):
+    """按扩展名选择导入器，不支持时返回 None"""
+    return IMPORTERS.get(os.path.splitext(path)[1].lower())
@@ -0,0 +1,297 @@
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from models.sample_sink import SampleSink
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+# 文件头：魔数 + 元数据长度 + 元数据(JSON)
+LOG_MAGIC = b'QTRLOG01'
+LOG_HEADER = struct.Struct('<8sI')
+
+# 帧头：帧标记、帧类型、负载长度、负载CRC32
+FRAME_MARKER = 0xA55A
+FRAME_HEADER = struct.Struct('<HBII')
+FRAME_SAMPLES = 1
+FRAME_CLOSE = 2
+
+# 样本记录格式（紧凑排列）
+SAMPLE_DTYPE = np.dtype([
+    ('t_ns', '<i8'),
+    ('raw', '<i4'),
+    ('channel', '<i2'),
+    ('flags', 'u1'),
+])
+
+LOG_SUFFIX = '.qlog'
+
+
+class FileLock:
+    """进程级文件锁（附属 .lock 文件），进程崩溃时由操作系统自动释放"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        """尝试加锁，成功返回 True"""
+        self._file = open(self.path, 'a+b')
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            self._file.close()
+            self._file = None
+            return False
+
+    def release(self, remove=True):
+        """释放锁"""
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+        if remove:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class RecordingLog(SampleSink):
+    """崩溃安全的追加式记录日志
+
+    写线程按 sync_interval 把队列打包成一帧（带 CRC32 校验）写入文件并 fsync，
+    断电或崩溃最多丢失最后一个提交间隔的数据。
+    正常关闭时写入结束帧，下次启动时没有结束帧的日志会被识别为需要恢复。
+    """
+
+    NAME = "记录日志"
+
+    def __init__(self, path, metadata=None, sync_interval=1.0):
+        """
+        Args:
+            path: 日志文件路径
+            metadata: 会话信息（串口、波特率、从站等），以 JSON 保存在文件头
+            sync_interval: 成组提交（fsync）间隔（秒）
+        """
+        super().__init__(sync_interval)
+        self.path = path
+        self.metadata = dict(metadata or {})
+
+        self._lock = FileLock(path + '.lock')
+        if not self._lock.acquire():
+            raise Exception(f"记录文件正在被使用: {path}")
+
+        self._file = open(path, 'wb')
+        meta = json.dumps(self.metadata, ensure_ascii=False).encode('utf-8')
+        self._file.write(LOG_HEADER.pack(LOG_MAGIC, len(meta)) + meta)
+        self._sync()
+        self.start()
+
+    # ========== 写入 ==========
+    def _write(self, samples):
+        """把一批样本写成一帧并同步到磁盘"""
+        payload = np.array(samples, dtype=SAMPLE_DTYPE).tobytes()
+        self._write_frame(FRAME_SAMPLES, payload)
+        self._sync()
+
+    def _finish(self):
+        """写入结束帧并关闭文件"""
+        self._write_frame(FRAME_CLOSE, b'')
+        self._sync()
+        self._file.close()
+        self._lock.release()
+
+    def _write_frame(self, frame_type, payload):
+        header = FRAME_HEADER.pack(FRAME_MARKER, frame_type, len(payload), zlib.crc32(payload))
+        self._file.write(header + payload)
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    # ========== 读取与恢复 ==========
+    @staticmethod
+    def read(path):
+        """读取日志
+
+        遇到截断或校验失败的帧时停止，只返回其之前的完整数据。
+
+        Returns:
+            dict: metadata 会话信息、samples 样本结构化数组、
+                  closed 是否正常关闭、valid_end 最后一个完整帧的结束位置
+        """
+        reader = RecordingLogReader(path)
+        return {
+            'metadata': reader.metadata,
+            'samples': reader.samples(),
+            'closed': reader.closed,
+            'valid_end': reader.valid_end,
+        }
+
+    @staticmethod
+    def is_closed(path):
+        """快速判断日志是否正常关闭（只检查文件末尾的结束帧）"""
+        close_frame = FRAME_HEADER.pack(FRAME_MARKER, FRAME_CLOSE, 0, zlib.crc32(b''))
+        try:
+            with open(path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() < len(close_frame):
+                    return False
+                f.seek(-len(close_frame), os.SEEK_END)
+                return f.read() == close_frame
+        except OSError:
+            return False
+
+    @staticmethod
+    def find_unfinished(directory):
+        """查找未正常关闭且没有被其他窗口/进程使用的日志
+
+        Returns:
+            list: 按文件名（即开始时间）排序的日志路径
+        """
+        if not os.path.isdir(directory):
+            return []
+
+        unfinished = []
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(LOG_SUFFIX):
+                continue
+            path = os.path.join(directory, name)
+            if RecordingLog.is_closed(path):
+                continue
+
+            # 能拿到锁说明写入方已经不存在（崩溃或断电）
+            lock = FileLock(path + '.lock')
+            if lock.acquire():
+                lock.release(remove=False)
+                unfinished.append(path)
+        return unfinished
+
+    @staticmethod
+    def seal(path):
+        """截掉末尾不完整的帧并补写结束帧，使日志不再被识别为待恢复"""
+        lock = FileLock(path + '.lock')
+        if not lock.acquire():
+            raise Exception(f"记录文件正在被使用: {path}")
+        try:
+            valid_end = RecordingLogReader(path).valid_end
+            with open(path, 'r+b') as f:
+                f.truncate(valid_end)
+                f.seek(valid_end)
+                f.write(FRAME_HEADER.pack(FRAME_MARKER, FRAME_CLOSE, 0, zlib.crc32(b'')))
+                f.flush()
+                os.fsync(f.fileno())
+        finally:
+            lock.release()
+
+
+class RecordingLogReader:
+    """流式读取记录日志
+
+    打开时逐帧扫描并校验 CRC（每次只读一帧），记录各帧位置；
+    遇到截断或校验失败的帧时停止，只使用其之前的完整数据。
+    提供与 SampleStore 相同的 len / scale / iter_chunks / column 读取接口，
+    可以直接交给 SessionFile.write 转换，不需要把整个日志读入内存。
+    """
+
+    def __init__(self, path, flags=0):
+        """
+        Args:
+            path: 日志文件路径
+            flags: 读取时附加到每个样本的状态标志（例如恢复标志）
+        """
+        self.path = path
+        self.flags = flags
+        self._frames = []  # (负载偏移, 样本数)
+        self.closed = False
+
+        with open(path, 'rb') as f:
+            header = f.read(LOG_HEADER.size)
+            if len(header) < LOG_HEADER.size:
+                raise Exception(f"记录文件格式错误: {path}")
+            magic, meta_length = LOG_HEADER.unpack(header)
+            if magic != LOG_MAGIC:
+                raise Exception(f"记录文件格式错误: {path}")
+            self.metadata = json.loads(f.read(meta_length).decode('utf-8'))
+
+            position = LOG_HEADER.size + meta_length
+            while True:
+                frame_header = f.read(FRAME_HEADER.size)
+                if len(frame_header) < FRAME_HEADER.size:
+                    break
+                marker, frame_type, length, crc = FRAME_HEADER.unpack(frame_header)
+                payload = f.read(length) if marker == FRAME_MARKER else b''
+                if marker != FRAME_MARKER or len(payload) != length or zlib.crc32(payload) != crc:
+                    break
+                if frame_type == FRAME_SAMPLES:
+                    self._frames.append((position + FRAME_HEADER.size, length // SAMPLE_DTYPE.itemsize))
+                position += FRAME_HEADER.size + length
+                if frame_type == FRAME_CLOSE:
+                    self.closed = True
+                    break
+
+        self.valid_end = position
+        self.scale = float(self.metadata.get('scale', 1000.0))
+        self._size = sum(count for _, count in self._frames)
+
+    def __len__(self):
+        return self._size
+
+    def iter_chunks(self, start=0, stop=None):
+        """按帧遍历 [start, stop) 范围内的样本
+
+        Yields:
+            dict: 列名 -> 数组
+        """
+        stop = self._size if stop is None else min(stop, self._size)
+        position = 0
+        with open(self.path, 'rb') as f:
+            for offset, count in self._frames:
+                if position >= stop:
+                    break
+                if position + count > start:
+                    f.seek(offset)
+                    frame = np.frombuffer(f.read(count * SAMPLE_DTYPE.itemsize), dtype=SAMPLE_DTYPE)
+                    frame = frame[max(0, start - position):stop - position]
+                    chunk = {name: frame[name] for name in SAMPLE_DTYPE.names}
+                    if self.flags:
+                        chunk['flags'] = chunk['flags'] | self.flags
+                    yield chunk
+                position += count
+
+    def column(self, name, start=0, stop=None):
+        """读取一列 [start, stop) 范围内的数据"""
+        parts = [chunk[name] for chunk in self.iter_chunks(start, stop)]
+        if not parts:
+            return np.zeros(0, dtype=SAMPLE_DTYPE[name])
+        return np.concatenate(parts)
+
+    def samples(self):
+        """读取全部样本（结构化数组）"""
+        parts = []
+        with open(self.path, 'rb') as f:
+            for offset, count in self._frames:
+                f.seek(offset)
+                parts.append(np.frombuffer(f.read(count * SAMPLE_DTYPE.itemsize), dtype=SAMPLE_DTYPE))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=SAMPLE_DTYPE)
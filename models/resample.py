@@ -0,0 +1,202 @@
+import numpy as np
+
+
+# 插值方式
+RESAMPLE_METHODS = {
+    'linear': "线性插值",
+    'hold': "零阶保持",
+}
+
+
+# 按时间范围重采样时，在范围两端额外读取的轮询轮数（每轮每个从站一个样本）
+BOUNDARY_ROUNDS = 4
+
+
+def align_up(t_ns, period_ns):
+    """向上对齐到网格（网格点为 period_ns 的整数倍，不同文件的网格可以直接对齐）"""
+    return -(-int(t_ns) // period_ns) * period_ns
+
+
+def interpolate(grid_ns, t_ns, values, method='linear', max_gap_ns=None):
+    """把一个通道的样本插值到给定的网格点上（向量化）
+
+    Args:
+        grid_ns: 网格时间戳数组（纳秒，升序）
+        t_ns: 样本时间戳数组（纳秒，升序）
+        values: 样本数值数组
+        method: 'linear' 线性插值，'hold' 零阶保持（取不晚于网格点的最后一个样本，适合阶跃信号）
+        max_gap_ns: 相邻样本间隔超过该值时，其间的网格点记为 NaN（None 表示不限制）
+
+    Returns:
+        ndarray: 网格点上的数值，没有数据覆盖的网格点为 NaN
+    """
+    grid_ns = np.asarray(grid_ns, dtype=np.int64)
+    t_ns = np.asarray(t_ns, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(t_ns) == 0 or len(grid_ns) == 0:
+        return np.full(len(grid_ns), np.nan)
+
+    # 左邻样本（时间不晚于网格点的最后一个样本）
+    left = np.searchsorted(t_ns, grid_ns, side='right') - 1
+    before = left < 0
+    left = np.maximum(left, 0)
+
+    if method == 'hold':
+        result = values[left]
+        if max_gap_ns is not None:
+            result[grid_ns - t_ns[left] > max_gap_ns] = np.nan
+    elif method == 'linear':
+        # 以第一个样本为原点换算成浮点，避免纳秒时间戳的精度损失
+        origin = t_ns[0]
+        result = np.interp((grid_ns - origin).astype(np.float64), (t_ns - origin).astype(np.float64), values)
+        result[grid_ns > t_ns[-1]] = np.nan
+        if max_gap_ns is not None:
+            right = np.minimum(left + 1, len(t_ns) - 1)
+            exact = t_ns[left] == grid_ns
+            result[(t_ns[right] - t_ns[left] > max_gap_ns) & ~exact] = np.nan
+    else:
+        raise Exception(f"不支持的插值方式：{method}")
+
+    result[before] = np.nan
+    return result
+
+
+class Resampler:
+    """流式重采样 - 把多个通道分块到达的样本插值到同一个等间隔网格上
+
+    样本需按时间顺序到达（与记录顺序相同）。每次 feed 之后，只输出结果不会再变化的网格点，
+    每个通道只保留尚未输出部分需要的少量样本，内存占用与会话长度无关。
+    数据结束后调用 flush 输出剩余的网格点。
+    """
+
+    def __init__(self, period_ns, channels, method='linear', start_ns=None, end_ns=None, max_gap_ns=None):
+        """
+        Args:
+            period_ns: 网格间隔（纳秒）
+            channels: 要对齐的从站地址列表（输出列的顺序）
+            method: 'linear' 或 'hold'
+            start_ns: 网格起点，默认为第一个样本之后的第一个网格点
+            end_ns: 网格终点（不含），默认为最后一个样本
+            max_gap_ns: 数据中断超过该值时输出 NaN
+        """
+        if method not in RESAMPLE_METHODS:
+            raise Exception(f"不支持的插值方式：{method}")
+        if period_ns <= 0:
+            raise Exception("重采样间隔必须大于 0")
+
+        self.period_ns = int(period_ns)
+        self.channels = list(channels)
+        self.method = method
+        self.end_ns = end_ns
+        self.max_gap_ns = max_gap_ns
+        self._next = None if start_ns is None else align_up(start_ns, self.period_ns)
+        self._times = {channel: np.zeros(0, dtype=np.int64) for channel in self.channels}
+        self._values = {channel: np.zeros(0, dtype=np.float64) for channel in self.channels}
+
+    def feed(self, t_ns, values, channel):
+        """加入一批样本（channel 可以是标量或数组）
+
+        Returns:
+            tuple: (网格时间戳数组, 数值数组 [网格点数, 通道数])，本批可以确定的网格点
+        """
+        t_ns = np.asarray(t_ns, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        channel = np.broadcast_to(np.asarray(channel), t_ns.shape)
+
+        for ch in self.channels:
+            mask = channel == ch
+            if mask.any():
+                self._times[ch] = np.concatenate([self._times[ch], t_ns[mask]])
+                self._values[ch] = np.concatenate([self._values[ch], values[mask]])
+
+        lasts = [int(times[-1]) for times in self._times.values() if len(times)]
+        if not lasts:
+            return self._empty()
+
+        # 样本按时间顺序到达，后续样本都不早于 newest：网格点 g < newest 时，
+        # 尚无数据的通道在 g 处必为 NaN；中断超过 max_gap_ns 的通道在其最后样本之后也必为 NaN，
+        # 因此只有最近仍有数据的通道需要等待后续样本
+        newest = max(lasts)
+        ready = min(
+            last if self.max_gap_ns is None or newest - last <= self.max_gap_ns else newest
+            for last in lasts
+        )
+        return self._emit(ready)
+
+    def flush(self):
+        """输出剩余的网格点（到最后一个样本为止）"""
+        last = [int(times[-1]) for times in self._times.values() if len(times)]
+        if not last:
+            return self._empty()
+        return self._emit(max(last) + 1)
+
+    def _empty(self):
+        return np.zeros(0, dtype=np.int64), np.zeros((0, len(self.channels)))
+
+    def _emit(self, limit_ns):
+        """输出 [下一个网格点, limit_ns) 内的网格点"""
+        if self._next is None:
+            first = min(int(times[0]) for times in self._times.values() if len(times))
+            self._next = align_up(first, self.period_ns)
+        if self.end_ns is not None:
+            limit_ns = min(limit_ns, self.end_ns)
+        if limit_ns <= self._next:
+            return self._empty()
+
+        count = -(-(limit_ns - self._next) // self.period_ns)
+        grid = self._next + np.arange(count, dtype=np.int64) * self.period_ns
+        result = np.empty((count, len(self.channels)))
+        for column, ch in enumerate(self.channels):
+            result[:, column] = interpolate(grid, self._times[ch], self._values[ch], self.method, self.max_gap_ns)
+        self._next += count * self.period_ns
+
+        # 丢弃已用完的样本，保留下一个网格点的左邻样本
+        for ch in self.channels:
+            keep = max(int(np.searchsorted(self._times[ch], self._next, side='right')) - 1, 0)
+            if keep:
+                self._times[ch] = self._times[ch][keep:]
+                self._values[ch] = self._values[ch][keep:]
+        return grid, result
+
+
+def iter_resampled(store, period_ns, channels=None, method='linear', start_ns=None, end_ns=None,
+                   max_gap_ns=None, progress=None):
+    """按块遍历样本来源重采样后的结果
+
+    Args:
+        store: 样本来源（SampleStore / SessionFile / SampleSlice）
+        period_ns: 网格间隔（纳秒）
+        channels: 要对齐的从站地址，默认为全部
+        method: 'linear' 或 'hold'
+        start_ns: 网格起点（纳秒），默认为第一个样本
+        end_ns: 网格终点（纳秒，不含），默认为最后一个样本
+        max_gap_ns: 数据中断超过该值时输出 NaN
+        progress: 进度回调 progress(已读取行数, 总行数)
+
+    Yields:
+        tuple: (网格时间戳数组, 数值数组 [网格点数, 通道数]，单位毫米)
+    """
+    channels = store.channels() if channels is None else list(channels)
+    resampler = Resampler(period_ns, channels, method, start_ns, end_ns, max_gap_ns)
+
+    # 通过时间戳索引跳到范围附近，前后多读几轮轮询的样本作为各通道在边界处的相邻样本
+    first, stop = 0, len(store)
+    if hasattr(store, 'index_range') and (start_ns is not None or end_ns is not None):
+        margin = BOUNDARY_ROUNDS * max(len(channels), 1)
+        first, stop = store.index_range(start_ns, end_ns)
+        first = max(first - margin, 0)
+        stop = min(stop + margin, len(store))
+
+    done = 0
+    total = stop - first
+    for chunk in store.iter_chunks(first, stop):
+        grid, values = resampler.feed(chunk['t_ns'], chunk['raw'] / store.scale, chunk['channel'])
+        done += len(chunk['t_ns'])
+        if progress is not None:
+            progress(done, total)
+        if len(grid):
+            yield grid, values
+
+    grid, values = resampler.flush()
+    if len(grid):
+        yield grid, values
@@ -0,0 +1,352 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from models.app_paths import get_data_dir
+from models.recording_log import FileLock
+from models.sample_store import SampleStore
+from models.session_catalog import SessionCatalog, summarize
+from models.session_file import SessionFile, SESSION_SUFFIX
+from models.sqlite_recorder import RECORDING_DATABASE
+
+
+ROLLUP_SUFFIX = '.qsr'
+
+# 汇总级别：名称 -> 时间桶宽度（纳秒）
+ROLLUP_LEVELS = {
+    '1s': 1_000_000_000,
+    '1min': 60_000_000_000,
+}
+
+ROLLUP_FIELDS = ('t_ns', 'channel', 'count', 'min', 'max', 'mean')
+
+
+def lower_io_priority():
+    """降低当前线程的 CPU / 磁盘 I/O 优先级（作为线程池初始化函数）"""
+    try:
+        if os.name == 'nt':
+            import ctypes
+            THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN)
+        elif sys.platform.startswith('linux'):
+            # Linux 的 nice 值按线程生效，未单独设置 I/O 优先级时 I/O 调度优先级随之降低
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except Exception as e:
+        print(f"无法降低线程优先级: {e}")
+
+
+def _group(bucket, channel, count, total, low, high):
+    """按 (时间桶, 通道) 合并部分汇总结果"""
+    if len(bucket) == 0:
+        return bucket, channel, count, total, low, high
+    order = np.lexsort((channel, bucket))
+    bucket, channel = bucket[order], channel[order]
+    changed = (np.diff(bucket) != 0) | (np.diff(channel) != 0)
+    starts = np.concatenate(([0], np.flatnonzero(changed) + 1))
+    return (bucket[starts], channel[starts],
+            np.add.reduceat(count[order], starts),
+            np.add.reduceat(total[order], starts),
+            np.minimum.reduceat(low[order], starts),
+            np.maximum.reduceat(high[order], starts))
+
+
+def compute_rollups(store, levels=ROLLUP_LEVELS):
+    """按块计算各级汇总（每个时间桶、每个通道的样本数、最小、最大、均值）
+
+    先按最细的级别逐块汇总，再由细级别合并出粗级别，整个会话只读一遍。
+
+    Returns:
+        dict: 级别名 -> {'t_ns' 桶起始时间, 'channel', 'count', 'min', 'max', 'mean'}，
+              min/max/mean 为设备原始计数
+    """
+    names = sorted(levels, key=levels.get)
+    finest = levels[names[0]]
+
+    parts = []
+    for chunk in store.iter_chunks():
+        if len(chunk['t_ns']) == 0:
+            continue
+        raw = chunk['raw'].astype(np.int64)
+        parts.append(_group(
+            np.asarray(chunk['t_ns']) // finest, np.asarray(chunk['channel'], dtype=np.int64),
+            np.ones(len(raw), dtype=np.int64), raw.astype(np.float64), raw, raw
+        ))
+
+    if parts:
+        # 块边界上的桶会被拆成两部分，合并一次
+        current = _group(*(np.concatenate(columns) for columns in zip(*parts)))
+    else:
+        current = (np.zeros(0, dtype=np.int64),) * 3 + (np.zeros(0),) + (np.zeros(0, dtype=np.int64),) * 2
+
+    result = {}
+    width = finest
+    for name in names:
+        ratio = levels[name] // width
+        if ratio > 1:
+            bucket, *rest = current
+            current = _group(bucket // ratio, *rest)
+        width = levels[name]
+
+        bucket, channel, count, total, low, high = current
+        result[name] = {
+            't_ns': bucket * width,
+            'channel': channel.astype(np.int16),
+            'count': count.astype(np.int64),
+            'min': low.astype(np.int32),
+            'max': high.astype(np.int32),
+            'mean': total / np.maximum(count, 1),
+        }
+    return result
+
+
+class RecordingTable:
+    """按块读取 SQLite 记录数据库中的一张会话样本表（供计算汇总和统计）"""
+
+    CHUNK = 65536
+
+    def __init__(self, conn, table_name, scale=1000.0):
+        self.conn = conn
+        self.table_name = table_name
+        self.scale = scale
+
+    def iter_chunks(self):
+        """按时间顺序（主键顺序）遍历样本
+
+        Yields:
+            dict: 列名 -> 数组
+        """
+        cursor = self.conn.execute(f'SELECT t_ns, raw, channel, flags FROM {self.table_name} ORDER BY t_ns, channel')
+        while True:
+            rows = cursor.fetchmany(self.CHUNK)
+            if not rows:
+                break
+            t_ns, raw, channel, flags = (np.array(column) for column in zip(*rows))
+            yield {
+                't_ns': t_ns.astype(np.int64),
+                'raw': raw.astype(np.int32),
+                'channel': channel.astype(np.int16),
+                'flags': flags.astype(np.uint8),
+            }
+
+
+class RollupFile:
+    """汇总数据文件（.qsr） - 旧会话压缩后保留的 1 秒 / 1 分钟级汇总"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 汇总文件路径
+        """
+        self.path = path
+        with np.load(path) as data:
+            self.scale = float(data['scale'])
+            self.metadata = json.loads(str(data['metadata']))
+            self.levels = {}
+            for name in json.loads(str(data['levels'])):
+                self.levels[name] = {field: data[f'{name}_{field}'] for field in ROLLUP_FIELDS}
+
+    def to_store(self, level='1s'):
+        """把某一级汇总的均值转换为只读样本存储，供表格和图表显示趋势"""
+        data = self.levels[level]
+        store = SampleStore(self.scale)
+        store.extend(data['t_ns'], np.round(data['mean']).astype(np.int32), data['channel'])
+        store.readonly = True
+        return store
+
+    @staticmethod
+    def write(path, rollups, scale, metadata=None):
+        """写入汇总文件（先写临时文件再替换）"""
+        arrays = {
+            'scale': np.array(scale),
+            'metadata': np.array(json.dumps(metadata or {}, ensure_ascii=False)),
+            'levels': np.array(json.dumps(list(rollups))),
+        }
+        for name, data in rollups.items():
+            for field in ROLLUP_FIELDS:
+                arrays[f'{name}_{field}'] = data[field]
+
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+
+class RetentionJob:
+    """会话保留策略 - 近期会话保留全速率数据，旧会话替换为 1 秒 / 1 分钟汇总
+
+    - 目录中结束时间早于保留期限的会话文件在线程池中（低 I/O 优先级）计算汇总，
+      写入 .qsr 汇总文件后更新目录，再删除原会话文件；
+    - SQLite 记录数据库中过期会话的样本表在目录中已有覆盖其时间范围的会话时直接删除，
+      否则（例如记录日志创建失败、只有 SQLite 记录的会话）先由样本表生成汇总文件并登记，再删除；
+      释放的页由后续记录复用。
+    每一步都可以中断，下次运行时从中断处继续。
+    """
+
+    def __init__(self, full_rate_days=30, catalog_path=None, recording_db=None, max_workers=2, sessions_dir=None):
+        """
+        Args:
+            full_rate_days: 全速率数据保留天数
+            catalog_path: 会话目录数据库路径
+            recording_db: SQLite 记录数据库路径
+            max_workers: 线程池大小
+            sessions_dir: 由记录数据库生成的汇总文件目录，默认为程序数据目录下的 sessions
+        """
+        self.full_rate_days = full_rate_days
+        self.catalog_path = catalog_path
+        self.recording_db = recording_db or os.path.join(get_data_dir('recordings'), RECORDING_DATABASE)
+        self.sessions_dir = sessions_dir
+        self.max_workers = max_workers
+        self.running = False
+
+    def stop(self):
+        """停止（正在处理的会话完成后退出）"""
+        self.running = False
+
+    @staticmethod
+    def compact_session(path):
+        """计算会话文件的汇总并写入汇总文件
+
+        Returns:
+            tuple: (汇总文件路径, 汇总文件大小)；会话正在被处理或已不存在时返回 None
+        """
+        lock = FileLock(path + '.lock')
+        if not lock.acquire():
+            return None
+        try:
+            if not os.path.exists(path):
+                return None
+            session = SessionFile(path)
+            try:
+                rollups = compute_rollups(session)
+                scale, metadata = session.scale, session.metadata
+            finally:
+                session.close()
+
+            rollup_path = os.path.splitext(path)[0] + ROLLUP_SUFFIX
+            RollupFile.write(rollup_path, rollups, scale, metadata)
+            return rollup_path, os.path.getsize(rollup_path)
+        finally:
+            lock.release()
+
+    def run(self, progress=None):
+        """执行压缩
+
+        Args:
+            progress: 进度回调 progress(已完成数, 总数, 会话名)
+
+        Returns:
+            dict: 'sessions' 压缩的会话数、'reclaimed_bytes' 释放的空间、'errors' 错误信息
+        """
+        self.running = True
+        report = {'sessions': 0, 'reclaimed_bytes': 0, 'errors': []}
+        cutoff = time.time_ns() - int(self.full_rate_days * 86400 * 1e9)
+
+        catalog = SessionCatalog(self.catalog_path)
+        try:
+            # 上次中断在“已更新目录、未删除会话文件”时，补删残留的会话文件
+            for entry in catalog.query(compacted=True):
+                leftover = os.path.splitext(entry['path'])[0] + SESSION_SUFFIX
+                report['reclaimed_bytes'] += self._remove(leftover)
+
+            entries = catalog.query(before_ns=cutoff, compacted=False, descending=False)
+            with ThreadPoolExecutor(self.max_workers, initializer=lower_io_priority) as pool:
+                futures = {}
+                for entry in entries:
+                    futures[pool.submit(self._compact_if_running, entry['path'])] = entry
+
+                for done, future in enumerate(as_completed(futures), 1):
+                    entry = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        report['errors'].append(f"{entry['name']}: {e}")
+                        continue
+                    if result is None:
+                        continue
+
+                    rollup_path, rollup_size = result
+                    catalog.update(entry['path'], path=os.path.abspath(rollup_path),
+                                   size_bytes=rollup_size, compacted=1)
+                    report['reclaimed_bytes'] += self._remove(entry['path']) - rollup_size
+                    report['sessions'] += 1
+                    if progress is not None:
+                        progress(done, len(futures), entry['name'])
+        finally:
+            catalog.close()
+
+        if self.running:
+            report['reclaimed_bytes'] += self.compact_recording_db(cutoff)
+        return report
+
+    def _compact_if_running(self, path):
+        if not self.running:
+            return None
+        return self.compact_session(path)
+
+    @staticmethod
+    def _remove(path):
+        """删除文件，返回释放的字节数（文件被占用时保留，下次再删）"""
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            return size
+        except OSError:
+            return 0
+
+    def compact_recording_db(self, cutoff):
+        """删除 SQLite 记录数据库中过期会话的样本表（没有其他副本的先生成汇总文件）
+
+        Returns:
+            int: 释放（可被后续记录复用）的字节数，减去新生成的汇总文件大小
+        """
+        if not os.path.exists(self.recording_db):
+            return 0
+
+        conn = sqlite3.connect(self.recording_db)
+        catalog = SessionCatalog(self.catalog_path)
+        written = 0
+        try:
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            free_before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            rows = conn.execute(
+                'SELECT id, table_name, start_ns, end_ns, scale, metadata FROM sessions '
+                'WHERE closed = 1 AND end_ns < ? AND table_name IS NOT NULL',
+                (cutoff,)
+            ).fetchall()
+            for session_id, table_name, start_ns, end_ns, scale, metadata in rows:
+                if not self.running:
+                    break
+                if not catalog.covers(start_ns, end_ns):
+                    written += self.rollup_table(conn, catalog, table_name, scale or 1000.0,
+                                                 json.loads(metadata or '{}'))
+                with conn:
+                    conn.execute(f'DROP TABLE IF EXISTS {table_name}')
+                    conn.execute('UPDATE sessions SET table_name = NULL WHERE id = ?', (session_id,))
+            free_after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            return (free_after - free_before) * page_size - written
+        finally:
+            catalog.close()
+            conn.close()
+
+    def rollup_table(self, conn, catalog, table_name, scale, metadata):
+        """由记录数据库的样本表生成汇总文件并登记到目录（中断后重新生成即可）
+
+        Returns:
+            int: 汇总文件大小
+        """
+        table = RecordingTable(conn, table_name, scale)
+        rollups = compute_rollups(table)
+        summary = summarize(table)
+        path = os.path.join(self.sessions_dir or get_data_dir('sessions'), f'recording_{table_name}{ROLLUP_SUFFIX}')
+        RollupFile.write(path, rollups, scale, metadata)
+        catalog.add_summary(path, summary, metadata, compacted=True)
+        return os.path.getsize(path)
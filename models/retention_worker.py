@@ -0,0 +1,29 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+
+from models.retention import RetentionJob
+
+
+class RetentionWorker(QObject):
+    """会话保留策略工作线程"""
+
+    progress = pyqtSignal(int, int, str)  # 已完成数, 总数, 会话名
+    finished = pyqtSignal(dict)  # 压缩结果
+
+    def __init__(self, full_rate_days):
+        super().__init__()
+        self.job = RetentionJob(full_rate_days)
+
+    def stop(self):
+        """在正在处理的会话完成后停止"""
+        self.job.stop()
+
+    def run(self):
+        """执行压缩"""
+        try:
+            report = self.job.run(progress=self.progress.emit)
+        except Exception as e:
+            print(f"会话压缩异常: {e}")
+            report = {'sessions': 0, 'reclaimed_bytes': 0, 'errors': [str(e)]}
+        self.finished.emit(report)
@@ -0,0 +1,188 @@
+import os
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+from models.exporters import EXPORT_HEADER, SqliteExporter, format_csv_rows
+from models.sample_sink import SampleSink
+
+
+class CsvSegment:
+    """CSV 分段文件"""
+
+    SUFFIX = '.csv'
+
+    def __init__(self, path, scale, metadata=None):
+        self.path = path
+        self.scale = scale
+        self._file = open(path, 'w', newline='', encoding='utf-8-sig', buffering=1024 * 1024)
+        self._file.write(','.join(EXPORT_HEADER) + '\r\n')
+
+    def write(self, t_ns, raw, channel):
+        self._file.write(format_csv_rows(t_ns, raw, channel, self.scale))
+
+    def flush(self):
+        """写入磁盘（崩溃时已提交的批次不会丢失）"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def size(self):
+        return self._file.tell()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+class SqliteSegment:
+    """SQLite 分段数据库（与手动导出的数据库结构相同）"""
+
+    SUFFIX = '.db'
+
+    def __init__(self, path, scale, metadata=None):
+        self.path = path
+        self.scale = scale
+        self.sample_count = 0
+        self.start_ns = None
+        self.end_ns = None
+
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._conn:
+            SqliteExporter.create_schema(self._conn)
+            name = os.path.splitext(os.path.basename(path))[0]
+            self.session_id = SqliteExporter.add_session(self._conn, name, scale, metadata)
+
+    def write(self, t_ns, raw, channel):
+        # 每批一个事务
+        with self._conn:
+            SqliteExporter.insert(self._conn, self.session_id, t_ns, raw, channel, self.scale)
+        self.sample_count += len(t_ns)
+        self.start_ns = int(t_ns[0]) if self.start_ns is None else self.start_ns
+        self.end_ns = int(t_ns[-1])
+
+    def flush(self):
+        pass
+
+    def size(self):
+        page_count = self._conn.execute('PRAGMA page_count').fetchone()[0]
+        page_size = self._conn.execute('PRAGMA page_size').fetchone()[0]
+        return page_count * page_size
+
+    def close(self):
+        with self._conn:
+            self._conn.execute(
+                'UPDATE sessions SET start_ns = ?, end_ns = ?, sample_count = ? WHERE id = ?',
+                (self.start_ns, self.end_ns, self.sample_count, self.session_id)
+            )
+            SqliteExporter.create_indexes(self._conn)
+        # 结束的分段恢复为单个文件（不再需要 -wal / -shm）
+        self._conn.execute('PRAGMA journal_mode=DELETE')
+        self._conn.close()
+
+
+SEGMENT_FORMATS = {
+    'csv': CsvSegment,
+    'sqlite': SqliteSegment,
+}
+
+
+class RollingExporter(SampleSink):
+    """滚动自动导出 - 连续读取时把样本持续追加到导出文件，按时间或大小分段
+
+    样本由写线程按 commit_interval 成组写入当前分段并落盘，不经过界面线程。
+    按时间分段时分段边界对齐到本地时间（例如每小时整点一个文件）；
+    按大小分段时当前文件超过上限后，下一批样本写入新文件。
+    """
+
+    NAME = "自动导出"
+
+    def __init__(self, directory, file_format='csv', rotate_seconds=3600, rotate_bytes=None,
+                 metadata=None, scale=1000.0, prefix='千分表数据', commit_interval=1.0):
+        """
+        Args:
+            directory: 导出目录
+            file_format: 'csv' 或 'sqlite'
+            rotate_seconds: 按时间分段的周期（秒），None 或 0 表示不按时间分段
+            rotate_bytes: 按大小分段的上限（字节），None 或 0 表示不按大小分段
+            metadata: 会话信息（写入 SQLite 分段的 sessions 表）
+            scale: 原始计数与毫米的换算系数
+            prefix: 文件名前缀
+            commit_interval: 成组写入间隔（秒）
+        """
+        if file_format not in SEGMENT_FORMATS:
+            raise Exception(f"不支持的自动导出格式：{file_format}")
+
+        super().__init__(commit_interval)
+        self.directory = directory
+        self.segment_class = SEGMENT_FORMATS[file_format]
+        self.rotate_ns = int(rotate_seconds * 1e9) if rotate_seconds else None
+        self.rotate_bytes = rotate_bytes or None
+        self.metadata = dict(metadata or {})
+        self.scale = scale
+        self.prefix = prefix
+        self.segments = []  # 已创建的分段文件路径
+
+        self._segment = None
+        self._segment_end_ns = None
+
+        os.makedirs(directory, exist_ok=True)
+        self.start()
+
+    def _segment_end(self, t_ns):
+        """包含 t_ns 的时间分段的结束时间（按本地时间对齐）"""
+        if self.rotate_ns is None:
+            return None
+        offset = int(datetime.fromtimestamp(t_ns / 1e9).astimezone().utcoffset().total_seconds() * 1e9)
+        return ((t_ns + offset) // self.rotate_ns + 1) * self.rotate_ns - offset
+
+    def _open_segment(self, t_ns):
+        """以第一个样本的时间命名并创建新的分段文件"""
+        stamp = datetime.fromtimestamp(t_ns / 1e9).strftime('%Y%m%d_%H%M%S')
+        suffix = self.segment_class.SUFFIX
+        path = os.path.join(self.directory, f'{self.prefix}_{stamp}{suffix}')
+        number = 2
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f'{self.prefix}_{stamp}_{number}{suffix}')
+            number += 1
+
+        self._segment = self.segment_class(path, self.scale, self.metadata)
+        self._segment_end_ns = self._segment_end(t_ns)
+        self.segments.append(path)
+
+    def _close_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    def _write(self, samples):
+        columns = np.array(samples, dtype=np.int64)
+        t_ns, raw, channel = columns[:, 0], columns[:, 1], columns[:, 2]
+
+        position = 0
+        while position < len(t_ns):
+            if self._segment is not None and self._segment_end_ns is not None \
+                    and t_ns[position] >= self._segment_end_ns:
+                self._close_segment()
+            if self._segment is None:
+                self._open_segment(int(t_ns[position]))
+
+            # 时间分段在边界处拆开这一批
+            stop = len(t_ns)
+            if self._segment_end_ns is not None:
+                stop = position + int(np.searchsorted(t_ns[position:], self._segment_end_ns))
+                stop = max(stop, position + 1)
+            self._segment.write(t_ns[position:stop], raw[position:stop], channel[position:stop])
+            position = stop
+
+        self._segment.flush()
+        if self.rotate_bytes is not None and self._segment.size() >= self.rotate_bytes:
+            self._close_segment()
+
+    def _finish(self):
+        try:
+            self._close_segment()
+        except Exception as e:
+            print(f"自动导出文件关闭失败: {e}")
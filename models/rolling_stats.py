@@ -0,0 +1,95 @@
+from collections import deque
+import math
+
+
+class RollingWindowStats:
+    """滑动时间窗口统计（增量计算）
+
+    均值和标准差通过累加和维护，最小/最大值通过单调队列维护。
+    移出的样本数达到窗口内样本数时按窗口内样本重新求和，消除反复加减累积的舍入误差
+    （否则窗口只剩一个样本时标准差也不为零）。
+    每个样本的摊还代价为 O(1)，与窗口长度无关，
+    因此 50Hz 下 10 分钟的窗口也不会拖慢界面。
+    """
+
+    def __init__(self, window):
+        """
+        Args:
+            window: 窗口长度（秒）
+        """
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        """清空窗口"""
+        self._samples = deque()  # 窗口内的 (时间, 偏移后数值)
+        self._min_queue = deque()  # 单调递增队列 (时间, 数值)
+        self._max_queue = deque()  # 单调递减队列 (时间, 数值)
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._removed = 0  # 上次重新求和后移出的样本数
+        # 以首个样本为偏移量累加，避免大数相减造成的精度损失
+        self._offset = None
+
+    def __len__(self):
+        return len(self._samples)
+
+    def update(self, timestamp, value):
+        """加入一个样本并返回当前窗口统计
+
+        Args:
+            timestamp: 时间戳（秒，单调递增）
+            value: 数值
+
+        Returns:
+            tuple: (均值, 标准差, 最小值, 最大值)
+        """
+        if self._offset is None:
+            self._offset = value
+
+        shifted = value - self._offset
+        self._samples.append((timestamp, shifted))
+        self._sum += shifted
+        self._sum_sq += shifted * shifted
+
+        while self._min_queue and self._min_queue[-1][1] >= value:
+            self._min_queue.pop()
+        self._min_queue.append((timestamp, value))
+
+        while self._max_queue and self._max_queue[-1][1] <= value:
+            self._max_queue.pop()
+        self._max_queue.append((timestamp, value))
+
+        # 移出窗口外的样本
+        window_start = timestamp - self.window
+        while self._samples and self._samples[0][0] < window_start:
+            _, old = self._samples.popleft()
+            self._sum -= old
+            self._sum_sq -= old * old
+            self._removed += 1
+        if self._removed and self._removed >= len(self._samples):
+            self._sum = sum(shifted for _, shifted in self._samples)
+            self._sum_sq = sum(shifted * shifted for _, shifted in self._samples)
+            self._removed = 0
+        while self._min_queue[0][0] < window_start:
+            self._min_queue.popleft()
+        while self._max_queue[0][0] < window_start:
+            self._max_queue.popleft()
+
+        return self.current()
+
+    def current(self):
+        """返回当前窗口统计 (均值, 标准差, 最小值, 最大值)"""
+        n = len(self._samples)
+        if n == 0:
+            nan = float('nan')
+            return nan, nan, nan, nan
+
+        mean = self._sum / n
+        variance = max(self._sum_sq / n - mean * mean, 0.0)
+        return (
+            mean + self._offset,
+            math.sqrt(variance),
+            self._min_queue[0][1],
+            self._max_queue[0][1]
+        )
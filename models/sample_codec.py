@@ -0,0 +1,168 @@
+import struct
+import zlib
+
+import numpy as np
+
+
+# 编码块头：魔数、样本数、首个时间戳、三段变长整数流的字节数
+CODEC_MAGIC = b'QSC1'
+CODEC_HEADER = struct.Struct('<4sIqIII')
+
+MAX_VARINT_BYTES = 10  # 64 位整数最多 10 个字节
+
+
+def zigzag_encode(values):
+    """有符号整数映射为无符号整数（绝对值小的数映射为小数）"""
+    values = np.asarray(values, dtype=np.int64)
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+
+def zigzag_decode(values):
+    """zigzag_encode 的逆变换"""
+    values = np.asarray(values, dtype=np.uint64)
+    return ((values >> np.uint64(1)).view(np.int64)) ^ -((values & np.uint64(1)).view(np.int64))
+
+
+def varint_encode(values):
+    """无符号整数数组编码为 LEB128 变长字节流（向量化）
+
+    每字节低 7 位存数据，最高位表示后面还有字节。
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    if len(values) == 0:
+        return b''
+
+    # 每个数需要的字节数
+    lengths = np.ones(len(values), dtype=np.int64)
+    for k in range(1, MAX_VARINT_BYTES):
+        lengths += values >= np.uint64(1 << (7 * k))
+
+    offsets = np.cumsum(lengths) - lengths
+    out = np.empty(int(lengths.sum()), dtype=np.uint8)
+    for k in range(int(lengths.max())):
+        mask = lengths > k
+        byte = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        byte |= np.where(lengths[mask] > k + 1, np.uint64(0x80), np.uint64(0))
+        out[offsets[mask] + k] = byte.astype(np.uint8)
+    return out.tobytes()
+
+
+def varint_decode(data, count=None):
+    """LEB128 变长字节流解码为无符号整数数组（向量化）"""
+    data = np.frombuffer(data, dtype=np.uint8)
+    if len(data) == 0:
+        return np.zeros(0, dtype=np.uint64)
+
+    ends = np.flatnonzero(data < 0x80)
+    if len(ends) == 0 or ends[-1] != len(data) - 1:
+        raise Exception("变长整数数据不完整")
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    if count is not None and len(starts) != count:
+        raise Exception(f"变长整数个数不符: {len(starts)} != {count}")
+
+    # 每个字节在所属数中的位置，决定移位量
+    group = np.repeat(np.arange(len(starts)), ends - starts + 1)
+    position = np.arange(len(data)) - starts[group]
+    parts = (data & 0x7F).astype(np.uint64) << (np.uint64(7) * position.astype(np.uint64))
+    return np.bitwise_or.reduceat(parts, starts)
+
+
+def _channel_deltas(raw, channel):
+    """按通道计算数值差分（多从站交替采样时同一通道的相邻值才接近）"""
+    order = np.argsort(channel, kind='stable')
+    values = raw[order]
+    deltas = np.diff(values, prepend=0)
+    first = np.flatnonzero(np.diff(channel[order], prepend=np.int64(-1)) != 0)
+    deltas[first] = values[first]
+    result = np.empty_like(deltas)
+    result[order] = deltas
+    return result
+
+
+def _channel_cumsum(deltas, channel):
+    """_channel_deltas 的逆变换"""
+    order = np.argsort(channel, kind='stable')
+    sums = np.cumsum(deltas[order])
+    first = np.flatnonzero(np.diff(channel[order], prepend=np.int64(-1)) != 0)
+    base = np.concatenate(([0], sums[first[1:] - 1])) if len(first) else np.zeros(0, dtype=np.int64)
+    counts = np.diff(np.append(first, len(sums)))
+    values = sums - np.repeat(base, counts)
+    result = np.empty_like(values)
+    result[order] = values
+    return result
+
+
+class SampleCodec:
+    """样本块压缩编码
+
+    保留设备原始 int32 计数，不做任何有损转换：
+    - 时间戳：二阶差分（采样间隔稳定时几乎全为 0）
+    - 数值：同一通道内的一阶差分
+    - 从站地址：一阶差分
+    以上都经 zigzag + 变长整数编码，状态标志原样保存，最后整体再用 zlib 压缩。
+    缓慢变化的位移信号每个样本只需几个比特。
+    """
+
+    @staticmethod
+    def encode(t_ns, raw, channel, flags, level=6):
+        """编码一块样本
+
+        Args:
+            t_ns: 时间戳（纳秒）
+            raw: 设备原始计数
+            channel: 从站地址
+            flags: 状态标志
+            level: zlib 压缩级别
+
+        Returns:
+            bytes: 编码结果
+        """
+        t_ns = np.asarray(t_ns, dtype=np.int64)
+        raw = np.asarray(raw, dtype=np.int64)
+        channel = np.asarray(channel, dtype=np.int64)
+        flags = np.asarray(flags, dtype=np.uint8)
+        count = len(t_ns)
+        first = int(t_ns[0]) if count else 0
+
+        # 时间戳二阶差分：第一个差分相对 first，之后为间隔的变化量
+        intervals = np.diff(t_ns, prepend=np.int64(first))
+        time_stream = varint_encode(zigzag_encode(np.diff(intervals, prepend=np.int64(0))))
+        value_stream = varint_encode(zigzag_encode(_channel_deltas(raw, channel)))
+        channel_stream = varint_encode(zigzag_encode(np.diff(channel, prepend=np.int64(0))))
+
+        header = CODEC_HEADER.pack(CODEC_MAGIC, count, first,
+                                   len(time_stream), len(value_stream), len(channel_stream))
+        payload = time_stream + value_stream + channel_stream + flags.tobytes()
+        return header + zlib.compress(payload, level)
+
+    @staticmethod
+    def decode(data):
+        """解码一块样本
+
+        Returns:
+            dict: 't_ns' int64、'raw' int32、'channel' int16、'flags' uint8 列数组
+        """
+        magic, count, first, time_length, value_length, channel_length = CODEC_HEADER.unpack_from(data, 0)
+        if magic != CODEC_MAGIC:
+            raise Exception("样本编码格式错误")
+
+        payload = zlib.decompress(data[CODEC_HEADER.size:])
+        position = 0
+        streams = []
+        for length in (time_length, value_length, channel_length):
+            streams.append(payload[position:position + length])
+            position += length
+
+        intervals = np.cumsum(zigzag_decode(varint_decode(streams[0], count)))
+        t_ns = first + np.cumsum(intervals)
+        channel = np.cumsum(zigzag_decode(varint_decode(streams[2], count)))
+        raw = _channel_cumsum(zigzag_decode(varint_decode(streams[1], count)), channel)
+        flags = np.frombuffer(payload, dtype=np.uint8, count=count, offset=position)
+
+        return {
+            't_ns': t_ns.astype(np.int64),
+            'raw': raw.astype(np.int32),
+            'channel': channel.astype(np.int16),
+            'flags': flags.copy(),
+        }
+
@@ -0,0 +1,105 @@
+import threading
+
+
+class SampleSink:
+    """样本写入端基类
+
+    采集线程调用 append() 只把样本放入内存队列；后台写线程按 commit_interval
+    取出队列批量写入（成组提交），因此不会阻塞采集线程和界面线程。
+    所有写入操作（包括关闭前的最后一次提交）都在写线程中执行。
+
+    子类实现 _write(samples) 和 _finish()，并在准备好资源后调用 start()。
+    写入失败时错误记录在 error 中，写入端停止接收样本（不再逐批丢弃后续数据），
+    采集线程通过 failed 检查并向界面报告。
+    """
+
+    NAME = "记录写入端"  # 报告错误时显示的名称
+
+    def __init__(self, commit_interval=1.0):
+        """
+        Args:
+            commit_interval: 成组提交间隔（秒）
+        """
+        self.commit_interval = commit_interval
+        self.sample_count = 0
+        self.error = None  # 写入失败时的异常
+        self.dropped_count = 0  # 写入失败时未能写入的样本数
+
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._closed = False
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动后台写线程"""
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    @property
+    def failed(self):
+        """是否因写入失败而停止"""
+        return self.error is not None
+
+    def append(self, t_ns, raw, channel, flags=0):
+        """追加一个样本（线程安全，只进入内存队列）"""
+        with self._pending_lock:
+            if not self._closed and self.error is None:
+                self._pending.append((t_ns, raw, channel, flags))
+
+    def close(self):
+        """提交剩余样本并关闭（可重复调用）"""
+        with self._pending_lock:
+            if self._closed:
+                return
+            self._closed = True
+
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        """后台写线程：按提交间隔批量写入，停止后做最后一次提交"""
+        while not self._stop_event.wait(self.commit_interval):
+            self._commit()
+        if self.error is None:
+            self._commit()
+        try:
+            self._finish()
+        except Exception as e:
+            print(f"{type(self).__name__} 关闭失败: {e}")
+            if self.error is None:
+                self.error = e
+
+    def _commit(self):
+        """写入队列中的全部样本"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        try:
+            written = self._write(pending)
+            self.sample_count += len(pending) if written is None else written
+        except Exception as e:
+            # 记录错误并停止写入端：之后的样本不再进入队列，由采集线程报告
+            print(f"{type(self).__name__} 写入失败: {e}")
+            with self._pending_lock:
+                self.dropped_count += len(pending) + len(self._pending)
+                self._pending = []
+                self.error = e
+            self._stop_event.set()
+
+    def _write(self, samples):
+        """写入一批样本
+
+        Args:
+            samples: [(时间戳ns, 原始计数, 从站地址, 状态标志), ...]
+
+        Returns:
+            int: 实际写入的样本数（去除重复等），返回 None 表示全部写入
+        """
+        raise NotImplementedError
+
+    def _finish(self):
+        """关闭前的收尾工作（在写线程中执行）"""
@@ -0,0 +1,477 @@
+import mmap
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from models.app_paths import get_data_dir
+from models.sample_codec import SampleCodec
+
+
+# 样本状态标志
+FLAG_NONE = 0
+FLAG_RECOVERED = 1  # 从未正常结束的记录日志中恢复
+
+
+def format_timestamps(t_ns):
+    """将纳秒时间戳数组格式化为本地时间字符串 "YYYY-MM-DD HH:MM:SS.mmm"
+
+    按块首尾的本地时区偏移做向量化转换；块内跨越夏令时切换时逐个转换。
+    """
+    t_ns = np.asarray(t_ns, dtype=np.int64)
+    if len(t_ns) == 0:
+        return np.array([], dtype=str)
+
+    first = datetime.fromtimestamp(t_ns[0] / 1e9).astimezone().utcoffset()
+    last = datetime.fromtimestamp(t_ns[-1] / 1e9).astimezone().utcoffset()
+    if first != last:
+        return np.array([
+            datetime.fromtimestamp(t / 1e9).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] for t in t_ns
+        ])
+
+    local = (t_ns + int(first.total_seconds() * 1e9)).astype('datetime64[ns]')
+    text = np.datetime_as_string(local, unit='ms')
+    return np.char.replace(text, 'T', ' ')
+
+
+class SpilledChunk:
+    """已转存到磁盘的分块（记录在转存文件中的位置）"""
+
+    __slots__ = ('offset', 'length')
+
+    def __init__(self, offset, length):
+        self.offset = offset
+        self.length = length
+
+
+class SpillFile:
+    """会话转存文件 - 追加写入压缩分块，读取时通过 mmap 映射"""
+
+    def __init__(self, directory):
+        fd, self.path = tempfile.mkstemp(prefix='session_', suffix='.spill', dir=directory)
+        self._file = os.fdopen(fd, 'w+b')
+        self._size = 0
+        self._map = None
+
+    def write(self, payload):
+        """追加一段数据，返回其 (偏移, 长度)"""
+        offset = self._size
+        self._file.seek(offset)
+        self._file.write(payload)
+        self._file.flush()
+        self._size += len(payload)
+        return offset, len(payload)
+
+    def read(self, offset, length):
+        """读取一段数据（文件增长后重新映射）"""
+        if self._map is None or len(self._map) < offset + length:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map[offset:offset + length]
+
+    def close(self):
+        """关闭并删除转存文件"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class SampleStore:
+    """会话样本存储 - 追加写入的分块列式存储
+
+    表格、图表和各种导出都从这里读取数据。每列按固定大小分块存放：
+    时间戳为 int64 纳秒，数值保存为设备原始 int32 计数（除以 scale 得到毫米），
+    另有从站地址和状态标志列。分块大小固定，因此按行号定位是 O(1)。
+
+    设置内存预算后，写满的分块超出预算时会被压缩编码（见 SampleCodec）并转存到磁盘上的会话转存文件，
+    需要时再从 mmap 中读回（最近使用的分块有少量缓存），长时间运行内存占用保持平稳。
+
+    每个分块的首个时间戳单独记录在内存中，作为按时间定位的稀疏索引（见 index_range）。
+    """
+
+    CHUNK_SIZE = 65536
+    CACHE_CHUNKS = 4  # 转存分块的读取缓存数
+    readonly = False
+
+    COLUMNS = {
+        't_ns': np.int64,  # 时间戳（纳秒）
+        'raw': np.int32,  # 设备原始计数
+        'channel': np.int16,  # 从站地址
+        'flags': np.uint8,  # 状态标志
+    }
+
+    def __init__(self, scale=1000.0, chunk_size=CHUNK_SIZE, memory_budget=None, spill_dir=None):
+        """
+        Args:
+            scale: 原始计数与毫米的换算系数
+            chunk_size: 每块样本数
+            memory_budget: 内存中已写满分块的字节数上限，None 表示不限制
+            spill_dir: 转存文件目录，默认为程序数据目录下的 spill
+        """
+        self.scale = scale
+        self.chunk_size = chunk_size
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self._spill = None
+        # 导出线程与界面线程可能同时读取转存分块
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        """清空所有样本"""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        self._chunks = []
+        self._cache = OrderedDict()
+        self._size = 0
+        self._channels = set()
+        self._chunk_starts = []  # 每个分块的首个时间戳（稀疏索引）
+        self._last_ns = None
+        self.is_sorted = True  # 时间戳是否单调不减
+
+    def close(self):
+        """释放转存文件"""
+        self.clear()
+
+    @property
+    def chunk_bytes(self):
+        """每个分块占用的字节数"""
+        return self.chunk_size * sum(np.dtype(dtype).itemsize for dtype in self.COLUMNS.values())
+
+    def memory_usage(self):
+        """内存中分块占用的字节数（不含读取缓存）"""
+        in_memory = sum(1 for chunk in self._chunks if isinstance(chunk, dict))
+        return in_memory * self.chunk_bytes
+
+    def spilled_chunks(self):
+        """已转存到磁盘的分块数"""
+        return sum(1 for chunk in self._chunks if isinstance(chunk, SpilledChunk))
+
+    def set_memory_budget(self, memory_budget):
+        """修改内存预算"""
+        self.memory_budget = memory_budget
+        self._enforce_budget()
+
+    def _enforce_budget(self):
+        """已写满的分块超出内存预算时，从最早的开始转存到磁盘"""
+        if self.memory_budget is None:
+            return
+
+        # 最后一个分块仍在写入，不参与转存
+        sealed = [i for i, chunk in enumerate(self._chunks[:-1]) if isinstance(chunk, dict)]
+        excess = len(sealed) * self.chunk_bytes - self.memory_budget
+        for index in sealed:
+            if excess <= 0:
+                break
+            self._spill_chunk(index)
+            excess -= self.chunk_bytes
+
+    def _spill_chunk(self, index):
+        """压缩分块并写入转存文件"""
+        chunk = self._chunks[index]
+        payload = SampleCodec.encode(chunk['t_ns'], chunk['raw'], chunk['channel'], chunk['flags'], level=1)
+        with self._lock:
+            if self._spill is None:
+                self._spill = SpillFile(self.spill_dir or get_data_dir('spill'))
+            offset, length = self._spill.write(payload)
+            self._chunks[index] = SpilledChunk(offset, length)
+
+    def _load_chunk(self, index):
+        """获取分块的列数据（转存的分块从 mmap 读回并解压）"""
+        chunk = self._chunks[index]
+        if isinstance(chunk, dict):
+            return chunk
+
+        with self._lock:
+            if index in self._cache:
+                self._cache.move_to_end(index)
+                return self._cache[index]
+
+            columns = SampleCodec.decode(self._spill.read(chunk.offset, chunk.length))
+            self._cache[index] = columns
+            if len(self._cache) > self.CACHE_CHUNKS:
+                self._cache.popitem(last=False)
+            return columns
+
+    def __len__(self):
+        return self._size
+
+    def _new_chunk(self):
+        chunk = {name: np.zeros(self.chunk_size, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        self._chunks.append(chunk)
+        return chunk
+
+    def append(self, t_ns, raw, channel=1, flags=FLAG_NONE):
+        """追加单个样本
+
+        Args:
+            t_ns: 时间戳（纳秒）
+            raw: 设备原始计数
+            channel: 从站地址
+            flags: 状态标志
+        """
+        offset = self._size % self.chunk_size
+        if offset == 0:
+            chunk = self._new_chunk()
+            self._enforce_budget()
+        else:
+            chunk = self._chunks[-1]
+        chunk['t_ns'][offset] = t_ns
+        chunk['raw'][offset] = raw
+        chunk['channel'][offset] = channel
+        chunk['flags'][offset] = flags
+        self._size += 1
+        self._channels.add(int(channel))
+        self._track_order(t_ns, t_ns, offset == 0)
+
+    def extend(self, t_ns, raw, channel=1, flags=FLAG_NONE):
+        """批量追加样本（channel / flags 可以是标量或数组）"""
+        t_ns = np.asarray(t_ns, dtype=np.int64)
+        n = len(t_ns)
+        if n == 0:
+            return
+        columns = {
+            't_ns': t_ns,
+            'raw': np.asarray(raw, dtype=np.int32),
+            'channel': np.broadcast_to(np.asarray(channel, dtype=np.int16), (n,)),
+            'flags': np.broadcast_to(np.asarray(flags, dtype=np.uint8), (n,)),
+        }
+
+        written = 0
+        while written < n:
+            offset = self._size % self.chunk_size
+            chunk = self._new_chunk() if offset == 0 else self._chunks[-1]
+            count = min(self.chunk_size - offset, n - written)
+            for name, values in columns.items():
+                chunk[name][offset:offset + count] = values[written:written + count]
+            if offset == 0:
+                self._chunk_starts.append(int(t_ns[written]))
+            written += count
+            self._size += count
+            self._enforce_budget()
+
+        self._channels.update(np.unique(columns['channel']).tolist())
+        if self.is_sorted and n > 1 and np.any(t_ns[1:] < t_ns[:-1]):
+            self.is_sorted = False
+        self._track_order(int(t_ns[0]), int(t_ns[-1]))
+
+    def _track_order(self, first_ns, last_ns, new_chunk=False):
+        """记录分块首个时间戳并检查时间戳是否仍然有序"""
+        if new_chunk:
+            self._chunk_starts.append(int(first_ns))
+        if self._last_ns is not None and first_ns < self._last_ns:
+            self.is_sorted = False
+        self._last_ns = int(last_ns)
+
+    def row(self, index):
+        """按行号读取样本 (时间戳ns, 原始计数, 从站地址, 状态标志)"""
+        chunk = self._load_chunk(index // self.chunk_size)
+        offset = index % self.chunk_size
+        return (int(chunk['t_ns'][offset]), int(chunk['raw'][offset]),
+                int(chunk['channel'][offset]), int(chunk['flags'][offset]))
+
+    def iter_chunks(self, start=0, stop=None):
+        """按块遍历 [start, stop) 范围内的样本
+
+        Yields:
+            dict: 列名 -> 数组视图（不拷贝）
+        """
+        stop = self._size if stop is None else min(stop, self._size)
+        position = start
+        while position < stop:
+            index, offset = divmod(position, self.chunk_size)
+            count = min(self.chunk_size - offset, stop - position)
+            chunk = self._load_chunk(index)
+            yield {name: column[offset:offset + count] for name, column in chunk.items()}
+            position += count
+
+    def column(self, name, start=0, stop=None):
+        """读取一列 [start, stop) 范围内的数据（拼接为连续数组）"""
+        parts = [chunk[name] for chunk in self.iter_chunks(start, stop)]
+        if not parts:
+            return np.zeros(0, dtype=self.COLUMNS[name])
+        return np.concatenate(parts)
+
+    def values(self, start=0, stop=None):
+        """读取 [start, stop) 范围内的数值（毫米）"""
+        return self.column('raw', start, stop) / self.scale
+
+    def channels(self):
+        """获取出现过的从站地址列表"""
+        return sorted(self._channels)
+
+    def time_range(self):
+        """获取 (最早时间戳ns, 最新时间戳ns)，无数据时返回 None"""
+        if self._size == 0:
+            return None
+        return self.row(0)[0], self.row(self._size - 1)[0]
+
+    def index_range(self, start_ns=None, end_ns=None):
+        """获取时间范围 [start_ns, end_ns) 对应的行号范围 (start, stop)
+
+        时间戳有序时先在分块首个时间戳中二分查找，再在命中的分块内二分查找，
+        只需读取（或解压）两端的两个分块，与会话长度无关。
+        时间戳无序时逐块扫描，返回第一个和最后一个落在范围内的行。
+        """
+        if not self.is_sorted:
+            first = last = None
+            position = 0
+            for chunk in self.iter_chunks():
+                t_ns = chunk['t_ns']
+                mask = np.ones(len(t_ns), dtype=bool)
+                if start_ns is not None:
+                    mask &= t_ns >= start_ns
+                if end_ns is not None:
+                    mask &= t_ns < end_ns
+                indices = np.flatnonzero(mask)
+                if len(indices):
+                    first = position + int(indices[0]) if first is None else first
+                    last = position + int(indices[-1])
+                position += len(t_ns)
+            return (first, last + 1) if first is not None else (0, 0)
+
+        start = 0 if start_ns is None else self._search(start_ns)
+        stop = self._size if end_ns is None else self._search(end_ns)
+        return start, max(start, stop)
+
+    def _search(self, t_ns):
+        """有序时间戳中第一个 >= t_ns 的行号"""
+        if self._size == 0:
+            return 0
+        # 目标只可能在首个时间戳 < t_ns 的最后一个分块中（或恰好是下一个分块的开头）
+        index = int(np.searchsorted(np.asarray(self._chunk_starts), t_ns, side='left')) - 1
+        if index < 0:
+            return 0
+        base = index * self.chunk_size
+        count = min(self.chunk_size, self._size - base)
+        chunk = self._load_chunk(index)
+        return base + int(np.searchsorted(chunk['t_ns'][:count], t_ns, side='left'))
+
+
+class SampleSlice:
+    """样本来源的只读切片 - 时间范围加从站筛选
+
+    与 SampleStore 相同的读取接口，可以直接交给各种导出函数。
+    时间范围通过来源的 index_range 二分定位，只遍历切片内的行；
+    指定从站时逐块筛选（行数在创建时统计一次）。
+    """
+
+    readonly = True
+
+    def __init__(self, source, start_ns=None, end_ns=None, channels=None):
+        """
+        Args:
+            source: SampleStore 或 SessionFile
+            start_ns: 起始时间戳（纳秒，含），None 表示从头开始
+            end_ns: 结束时间戳（纳秒，不含），None 表示到末尾
+            channels: 要保留的从站地址，None 表示全部
+        """
+        self.source = source
+        self.scale = source.scale
+        self.metadata = dict(getattr(source, 'metadata', None) or {})
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.start, self.stop = source.index_range(start_ns, end_ns)
+
+        all_channels = source.channels()
+        if channels is not None and set(channels) >= set(all_channels):
+            channels = None
+        self._channels = None if channels is None else np.array(sorted(channels), dtype=np.int16)
+        # 时间戳无序时行号范围内可能夹杂范围外的样本
+        self._filter_time = not getattr(source, 'is_sorted', True)
+        self.filtered = self._channels is not None or self._filter_time
+
+        if self.filtered:
+            self._size = sum(len(chunk['t_ns']) for chunk in self._iter_source())
+        else:
+            self._size = self.stop - self.start
+
+    def _mask(self, chunk):
+        """块内保留的行（不需要筛选时返回 None）"""
+        mask = None
+        if self._channels is not None:
+            mask = np.isin(chunk['channel'], self._channels)
+        if self._filter_time:
+            t_ns = chunk['t_ns']
+            in_range = np.ones(len(t_ns), dtype=bool)
+            if self.start_ns is not None:
+                in_range &= t_ns >= self.start_ns
+            if self.end_ns is not None:
+                in_range &= t_ns < self.end_ns
+            mask = in_range if mask is None else mask & in_range
+        return mask
+
+    def _iter_source(self):
+        """遍历来源中切片范围内（已筛选）的块"""
+        for chunk in self.source.iter_chunks(self.start, self.stop):
+            mask = self._mask(chunk)
+            if mask is not None:
+                chunk = {name: column[mask] for name, column in chunk.items()}
+            if len(chunk['t_ns']):
+                yield chunk
+
+    def __len__(self):
+        return self._size
+
+    def close(self):
+        """切片不持有来源，关闭时不做任何事"""
+
+    def iter_chunks(self, start=0, stop=None):
+        """按块遍历切片中 [start, stop) 范围内的样本（行号相对于切片）"""
+        stop = self._size if stop is None else min(stop, self._size)
+        if start >= stop:
+            return
+        if not self.filtered:
+            yield from self.source.iter_chunks(self.start + start, self.start + stop)
+            return
+
+        position = 0
+        for chunk in self._iter_source():
+            count = len(chunk['t_ns'])
+            if position + count > start:
+                begin = max(start - position, 0)
+                end = min(stop - position, count)
+                yield {name: column[begin:end] for name, column in chunk.items()}
+            position += count
+            if position >= stop:
+                break
+
+    def column(self, name, start=0, stop=None):
+        """读取一列 [start, stop) 范围内的数据（拼接为连续数组）"""
+        parts = [chunk[name] for chunk in self.iter_chunks(start, stop)]
+        if not parts:
+            return np.zeros(0, dtype=SampleStore.COLUMNS[name])
+        return np.concatenate(parts)
+
+    def values(self, start=0, stop=None):
+        """读取 [start, stop) 范围内的数值（毫米）"""
+        return self.column('raw', start, stop) / self.scale
+
+    def row(self, index):
+        """按行号读取样本 (时间戳ns, 原始计数, 从站地址, 状态标志)"""
+        chunk = next(self.iter_chunks(index, index + 1))
+        return tuple(int(chunk[name][0]) for name in SampleStore.COLUMNS)
+
+    def channels(self):
+        """获取切片中的从站地址列表"""
+        all_channels = self.source.channels()
+        if self._channels is None:
+            return all_channels
+        wanted = set(self._channels.tolist())
+        return [channel for channel in all_channels if channel in wanted]
+
+    def time_range(self):
+        """获取 (最早时间戳ns, 最新时间戳ns)，无数据时返回 None"""
+        if self._size == 0:
+            return None
+        return self.row(0)[0], self.row(self._size - 1)[0]
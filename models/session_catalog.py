@@ -0,0 +1,324 @@
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from models.app_paths import get_data_dir
+from models.recording_log import RecordingLog, RecordingLogReader, FileLock, LOG_SUFFIX
+from models.sample_store import FLAG_RECOVERED
+from models.session_file import SessionFile, SESSION_SUFFIX
+
+
+CATALOG_DATABASE = 'catalog.db'
+
+CATALOG_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        path TEXT UNIQUE,
+        name TEXT,
+        port TEXT,
+        baudrate INTEGER,
+        slave_ids TEXT,
+        start_ns INTEGER,
+        end_ns INTEGER,
+        sample_count INTEGER,
+        min REAL,
+        max REAL,
+        mean REAL,
+        std REAL,
+        size_bytes INTEGER,
+        added_ns INTEGER,
+        channel_stats TEXT,
+        metadata TEXT,
+        compacted INTEGER DEFAULT 0
+    )
+'''
+
+# 可排序的列（防止把任意文本拼进 ORDER BY）
+SORT_COLUMNS = ('start_ns', 'end_ns', 'port', 'baudrate', 'slave_ids', 'sample_count',
+                'min', 'max', 'mean', 'std', 'size_bytes', 'compacted', 'name')
+
+
+def summarize(store):
+    """按块统计样本存储的数据（不把整个会话读入内存）
+
+    Returns:
+        dict: 'count'、'min'、'max'、'mean'、'std'（毫米）、'start_ns'、'end_ns'，
+              以及 'channels'：从站地址 -> 同样的统计
+    """
+    totals = {}  # 从站地址 -> [count, sum, sum_sq, min, max]
+    start_ns = end_ns = None
+    for chunk in store.iter_chunks():
+        if len(chunk['t_ns']) == 0:
+            continue
+        t_ns = chunk['t_ns']
+        start_ns = int(t_ns.min()) if start_ns is None else min(start_ns, int(t_ns.min()))
+        end_ns = int(t_ns.max()) if end_ns is None else max(end_ns, int(t_ns.max()))
+
+        raw = chunk['raw'].astype(np.float64)
+        channels = chunk['channel']
+        for channel_id in np.unique(channels):
+            values = raw[channels == channel_id]
+            entry = totals.setdefault(int(channel_id), [0, 0.0, 0.0, np.inf, -np.inf])
+            entry[0] += len(values)
+            entry[1] += values.sum()
+            entry[2] += np.dot(values, values)
+            entry[3] = min(entry[3], values.min())
+            entry[4] = max(entry[4], values.max())
+
+    def stats(count, total, total_sq, low, high):
+        if count == 0:
+            return {'count': 0, 'min': None, 'max': None, 'mean': None, 'std': None}
+        mean = total / count
+        variance = max(0.0, total_sq / count - mean * mean)
+        return {
+            'count': int(count),
+            'min': low / store.scale,
+            'max': high / store.scale,
+            'mean': mean / store.scale,
+            'std': float(np.sqrt(variance)) / store.scale,
+        }
+
+    overall = [sum(entry[i] for entry in totals.values()) for i in range(3)]
+    overall += [min((entry[3] for entry in totals.values()), default=np.inf),
+                max((entry[4] for entry in totals.values()), default=-np.inf)]
+    result = stats(*overall)
+    result['start_ns'] = start_ns
+    result['end_ns'] = end_ns
+    result['channels'] = {channel_id: stats(*entry) for channel_id, entry in sorted(totals.items())}
+    return result
+
+
+class SessionCatalog:
+    """会话目录 - 记录所有会话文件的位置、串口参数和预先计算的统计
+
+    浏览、筛选和排序都只查询目录数据库，不需要打开任何会话文件。
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: 目录数据库路径，默认为程序数据目录下的 catalog.db
+        """
+        self.path = path or os.path.join(get_data_dir(), CATALOG_DATABASE)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        with self._conn:
+            self._conn.execute(CATALOG_SCHEMA)
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_start ON sessions (start_ns)')
+
+            # 旧版本目录没有 compacted 列
+            columns = [row[1] for row in self._conn.execute('PRAGMA table_info(sessions)')]
+            if 'compacted' not in columns:
+                self._conn.execute('ALTER TABLE sessions ADD COLUMN compacted INTEGER DEFAULT 0')
+
+    def close(self):
+        """关闭数据库连接"""
+        self._conn.close()
+
+    def add_file(self, path, metadata=None):
+        """统计会话文件并登记到目录（已登记的文件会被更新）
+
+        Args:
+            path: 会话文件（.qsf）路径
+            metadata: 附加的会话信息，默认取会话文件中的元数据
+
+        Returns:
+            dict: 登记的目录条目
+        """
+        session = SessionFile(path)
+        try:
+            summary = summarize(session)
+            metadata = dict(session.metadata, **(metadata or {}))
+        finally:
+            session.close()
+        return self.add_summary(path, summary, metadata)
+
+    def add_summary(self, path, summary, metadata=None, compacted=False):
+        """按已计算的统计登记文件（例如直接由记录数据库生成的汇总文件）
+
+        Args:
+            path: 会话文件或汇总文件路径
+            summary: summarize() 的结果
+            metadata: 会话信息
+            compacted: 是否为汇总数据
+
+        Returns:
+            dict: 登记的目录条目
+        """
+        metadata = dict(metadata or {})
+        slave_ids = metadata.get('slave_ids') or list(summary['channels'].keys())
+        entry = {
+            'path': os.path.abspath(path),
+            'name': os.path.splitext(os.path.basename(path))[0],
+            'port': metadata.get('port'),
+            'baudrate': metadata.get('baudrate'),
+            'slave_ids': ','.join(str(s) for s in slave_ids),
+            'start_ns': summary['start_ns'],
+            'end_ns': summary['end_ns'],
+            'sample_count': summary['count'],
+            'min': summary['min'],
+            'max': summary['max'],
+            'mean': summary['mean'],
+            'std': summary['std'],
+            'size_bytes': os.path.getsize(path),
+            'added_ns': time.time_ns(),
+            'channel_stats': json.dumps(summary['channels']),
+            'metadata': json.dumps(metadata, ensure_ascii=False),
+            'compacted': 1 if compacted else 0,
+        }
+
+        columns = ', '.join(entry.keys())
+        placeholders = ', '.join('?' for _ in entry)
+        with self._conn:
+            self._conn.execute(
+                f'INSERT OR REPLACE INTO sessions ({columns}) VALUES ({placeholders})',
+                list(entry.values())
+            )
+        return entry
+
+    def covers(self, start_ns, end_ns):
+        """目录中是否已有覆盖整个时间范围的会话（全速率或汇总数据）"""
+        row = self._conn.execute(
+            'SELECT COUNT(*) FROM sessions WHERE start_ns <= ? AND end_ns >= ?', (int(start_ns), int(end_ns))
+        ).fetchone()
+        return row[0] > 0
+
+    def remove(self, path):
+        """从目录中移除会话（不删除文件）"""
+        with self._conn:
+            self._conn.execute('DELETE FROM sessions WHERE path = ?', (os.path.abspath(path),))
+
+    def update(self, session_path, **fields):
+        """更新目录条目的部分字段（可以包括 path 本身）"""
+        if not fields:
+            return
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        with self._conn:
+            self._conn.execute(f'UPDATE sessions SET {assignments} WHERE path = ?',
+                               list(fields.values()) + [os.path.abspath(session_path)])
+
+    def query(self, text='', order_by='start_ns', descending=True, limit=None, before_ns=None, compacted=None,
+              start_ns=None, end_ns=None, channel=None):
+        """查询目录
+
+        Args:
+            text: 筛选文本，匹配名称、串口和从站地址
+            order_by: 排序列
+            descending: 是否降序
+            limit: 最多返回条数
+            before_ns: 只返回结束时间早于该时间的会话
+            compacted: True / False 只返回已 / 未压缩为汇总数据的会话
+            start_ns, end_ns: 只返回与时间范围 [start_ns, end_ns) 有重叠的会话
+            channel: 只返回包含该从站地址的会话
+
+        Returns:
+            list: 目录条目字典
+        """
+        if order_by not in SORT_COLUMNS:
+            order_by = 'start_ns'
+
+        clauses, params = [], []
+        if text:
+            pattern = f'%{text}%'
+            clauses.append('(name LIKE ? OR port LIKE ? OR slave_ids LIKE ?)')
+            params += [pattern, pattern, pattern]
+        if before_ns is not None:
+            clauses.append('end_ns < ?')
+            params.append(int(before_ns))
+        if compacted is not None:
+            clauses.append('compacted = ?')
+            params.append(1 if compacted else 0)
+        if start_ns is not None:
+            clauses.append('end_ns >= ?')
+            params.append(int(start_ns))
+        if end_ns is not None:
+            clauses.append('start_ns < ?')
+            params.append(int(end_ns))
+        if channel is not None:
+            clauses.append("(',' || slave_ids || ',') LIKE ?")
+            params.append(f'%,{int(channel)},%')
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+
+        sql = f'SELECT * FROM sessions{where} ORDER BY {order_by} {"DESC" if descending else "ASC"}'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+        return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def count(self):
+        """目录中的会话数"""
+        return self._conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+    def rebuild(self, sessions_dir=None):
+        """使目录与会话目录中的文件一致
+
+        移除文件已不存在（被删除或移走）的条目，登记尚未登记的会话文件（例如目录数据库被删除后）。
+        已压缩为汇总数据的会话残留的 .qsf 不重复登记，由保留策略清理。
+
+        Returns:
+            tuple: (新登记的条目列表, 移除的条目数)
+        """
+        removed = 0
+        known = set()
+        for row in self._conn.execute('SELECT path FROM sessions').fetchall():
+            if os.path.exists(row['path']):
+                # 按不含后缀的路径比较：会话文件和其压缩后的汇总文件同名
+                known.add(os.path.normcase(os.path.splitext(row['path'])[0]))
+            else:
+                self.remove(row['path'])
+                removed += 1
+
+        added = []
+        directory = sessions_dir or get_data_dir('sessions')
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(SESSION_SUFFIX):
+                continue
+            path = os.path.abspath(os.path.join(directory, name))
+            if os.path.normcase(os.path.splitext(path)[0]) in known:
+                continue
+            try:
+                added.append(self.add_file(path))
+            except Exception as e:
+                print(f"登记会话文件失败 {path}: {e}")
+        return added, removed
+
+    # ========== 记录日志转换 ==========
+    @staticmethod
+    def pending_recordings(directory=None):
+        """查找已正常关闭、尚未转换为会话文件的记录日志"""
+        directory = directory or get_data_dir('recordings')
+        return [
+            os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if name.endswith(LOG_SUFFIX) and RecordingLog.is_closed(os.path.join(directory, name))
+        ]
+
+    def finalize_recording(self, log_path, sessions_dir=None, recovered=False):
+        """把记录日志转换为会话文件并登记到目录，然后删除日志
+
+        转换中断时日志保留，下次会重新转换。
+        recovered 为 True 时（从未正常结束的日志恢复），只转换最后一个完整帧之前的数据，
+        样本带恢复标志，元数据中记录 recovered。
+
+        Returns:
+            dict: 目录条目；日志正在被使用时返回 None
+        """
+        lock = FileLock(log_path + '.lock')
+        if not lock.acquire():
+            return None
+        try:
+            if not os.path.exists(log_path):
+                # 已被其他窗口转换
+                return None
+            reader = RecordingLogReader(log_path, FLAG_RECOVERED if recovered else 0)
+            metadata = dict(reader.metadata, recovered=True) if recovered else reader.metadata
+            name = os.path.splitext(os.path.basename(log_path))[0] + SESSION_SUFFIX
+            session_path = os.path.join(sessions_dir or get_data_dir('sessions'), name)
+            SessionFile.write(session_path, reader, metadata)
+            entry = self.add_file(session_path)
+            os.remove(log_path)
+        finally:
+            lock.release()
+        return entry
@@ -0,0 +1,248 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+
+# 会话文件（.qsf）布局：
+#   [0, HEADER_SIZE)   固定文件头：魔数、版本、标志、样本数、scale、起止时间、元数据位置、各列偏移
+#   各列数组          按 COLUMNS 顺序连续存放，起始位置按页对齐，可直接 np.memmap
+#   元数据            JSON（串口、波特率、从站等）
+SESSION_MAGIC = b'QSF1'
+SESSION_VERSION = 1
+SESSION_SUFFIX = '.qsf'
+
+HEADER_SIZE = 4096
+PAGE_SIZE = 4096
+HEADER = struct.Struct('<4sHHQdqqQQ')
+COLUMN_OFFSET = struct.Struct('<Q')
+
+FLAG_SORTED = 1  # 时间戳单调不减，可以二分查找
+
+COLUMNS = {
+    't_ns': np.dtype('<i8'),  # 时间戳（纳秒）
+    'raw': np.dtype('<i4'),  # 设备原始计数
+    'channel': np.dtype('<i2'),  # 从站地址
+    'flags': np.dtype('u1'),  # 状态标志
+}
+
+
+def _align(offset):
+    return -(-offset // PAGE_SIZE) * PAGE_SIZE
+
+
+class SessionFile:
+    """内存映射会话文件 - 打开时只读取文件头，各列通过 np.memmap 按需分页读取
+
+    提供与 SampleStore 相同的只读接口（len、row、iter_chunks、column、values 等），
+    表格、图表和导出可以直接使用；脚本可以直接取 column() 得到 memmap 数组。
+    五千万样本的会话打开几乎不耗时，只有实际访问的页才会从磁盘读入。
+    """
+
+    CHUNK_SIZE = 65536  # iter_chunks 每块样本数
+    readonly = True
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 会话文件路径
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+            if len(header) < HEADER.size + len(COLUMNS) * COLUMN_OFFSET.size or header[:4] != SESSION_MAGIC:
+                raise Exception(f"会话文件格式错误: {path}")
+
+            (_, version, self.file_flags, self._size, self.scale, self.start_ns, self.end_ns,
+             metadata_offset, metadata_length) = HEADER.unpack_from(header, 0)
+            if version > SESSION_VERSION:
+                raise Exception(f"不支持的会话文件版本: {version}")
+
+            file_size = os.fstat(f.fileno()).st_size
+            if metadata_offset + metadata_length > file_size:
+                raise Exception(f"会话文件不完整: {path}")
+            f.seek(metadata_offset)
+            try:
+                self.metadata = json.loads(f.read(metadata_length).decode('utf-8'))
+            except ValueError:
+                raise Exception(f"会话文件格式错误: {path}")
+
+        offsets = {}
+        position = HEADER.size
+        for name, dtype in COLUMNS.items():
+            (offsets[name],) = COLUMN_OFFSET.unpack_from(header, position)
+            position += COLUMN_OFFSET.size
+            if offsets[name] + self._size * dtype.itemsize > file_size:
+                raise Exception(f"会话文件不完整: {path}")
+
+        self._columns = {}
+        for name, dtype in COLUMNS.items():
+            if self._size:
+                self._columns[name] = np.memmap(path, dtype=dtype, mode='r', offset=offsets[name],
+                                                shape=(self._size,))
+            else:
+                self._columns[name] = np.zeros(0, dtype=dtype)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def is_sorted(self):
+        """时间戳是否单调不减"""
+        return bool(self.file_flags & FLAG_SORTED)
+
+    def close(self):
+        """释放内存映射
+
+        各列的映射立即关闭（不等待垃圾回收），Windows 上文件随即可以被替换或删除。
+        关闭后不能再访问之前取得的 column() 数组或 iter_chunks() 切片。
+        """
+        columns = self._columns
+        self._columns = {name: np.zeros(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._size = 0
+        for column in columns.values():
+            mapping = getattr(column, '_mmap', None)
+            if mapping is not None:
+                mapping.close()
+
+    # ========== 与 SampleStore 相同的读取接口 ==========
+    def row(self, index):
+        """按行号读取样本 (时间戳ns, 原始计数, 从站地址, 状态标志)"""
+        return tuple(int(self._columns[name][index]) for name in COLUMNS)
+
+    def iter_chunks(self, start=0, stop=None):
+        """按块遍历 [start, stop) 范围内的样本
+
+        Yields:
+            dict: 列名 -> memmap 切片（不拷贝）
+        """
+        stop = self._size if stop is None else min(stop, self._size)
+        for position in range(start, stop, self.CHUNK_SIZE):
+            end = min(position + self.CHUNK_SIZE, stop)
+            yield {name: column[position:end] for name, column in self._columns.items()}
+
+    def column(self, name, start=0, stop=None):
+        """读取一列 [start, stop) 范围内的数据（memmap 切片，不拷贝）"""
+        return self._columns[name][start:stop]
+
+    def values(self, start=0, stop=None):
+        """读取 [start, stop) 范围内的数值（毫米）"""
+        return self.column('raw', start, stop) / self.scale
+
+    def channels(self):
+        """获取出现过的从站地址列表"""
+        return list(self.metadata.get('channels', []))
+
+    def time_range(self):
+        """获取 (最早时间戳ns, 最新时间戳ns)，无数据时返回 None"""
+        if self._size == 0:
+            return None
+        return self.start_ns, self.end_ns
+
+    def index_range(self, start_ns=None, end_ns=None):
+        """获取时间范围 [start_ns, end_ns) 对应的行号范围 (start, stop)
+
+        时间戳有序时二分查找，只访问 O(log n) 个页。
+        """
+        t_ns = self._columns['t_ns']
+        if not self.is_sorted:
+            mask = np.ones(self._size, dtype=bool)
+            if start_ns is not None:
+                mask &= t_ns >= start_ns
+            if end_ns is not None:
+                mask &= t_ns < end_ns
+            indices = np.flatnonzero(mask)
+            return (int(indices[0]), int(indices[-1]) + 1) if len(indices) else (0, 0)
+
+        start = 0 if start_ns is None else int(np.searchsorted(t_ns, start_ns, side='left'))
+        stop = self._size if end_ns is None else int(np.searchsorted(t_ns, end_ns, side='left'))
+        return start, max(start, stop)
+
+    # ========== 写入 ==========
+    @staticmethod
+    def write(path, store, metadata=None, progress=None):
+        """把样本存储（SampleStore 或 SessionFile）写成会话文件
+
+        按块顺序写入各列，不需要把整个会话读入内存；先写临时文件再替换，
+        写入中断不会留下不完整的会话文件。
+
+        Args:
+            path: 目标文件路径
+            store: 样本来源
+            metadata: 附加的会话信息
+            progress: 进度回调 progress(已写入行数, 总行数)，抛出异常可中断写入（临时文件被删除）
+
+        Returns:
+            int: 写入的样本数
+        """
+        count = len(store)
+        offsets, position = {}, HEADER_SIZE
+        for name, dtype in COLUMNS.items():
+            offsets[name] = position
+            position = _align(position + count * dtype.itemsize)
+        metadata_offset = position
+
+        temp_path = path + '.tmp'
+        try:
+            written = SessionFile._write_columns(temp_path, store, metadata, progress, count, offsets,
+                                                 metadata_offset)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        os.replace(temp_path, path)
+        return written
+
+    @staticmethod
+    def _write_columns(temp_path, store, metadata, progress, count, offsets, metadata_offset):
+        """写入临时文件（各列、元数据和文件头）"""
+        is_sorted = True
+        last_time = None
+        channels = set()
+        start_ns = end_ns = 0
+
+        with open(temp_path, 'wb') as f:
+            written = 0
+            for chunk in store.iter_chunks(0, count):
+                n = len(chunk['t_ns'])
+                for name, dtype in COLUMNS.items():
+                    f.seek(offsets[name] + written * dtype.itemsize)
+                    f.write(np.ascontiguousarray(chunk[name], dtype=dtype).tobytes())
+
+                t_ns = chunk['t_ns']
+                if n:
+                    if written == 0:
+                        start_ns = int(t_ns[0])
+                    end_ns = int(t_ns[-1])
+                    if is_sorted and ((last_time is not None and t_ns[0] < last_time) or
+                                      np.any(np.diff(t_ns) < 0)):
+                        is_sorted = False
+                    last_time = int(t_ns[-1])
+                    channels.update(np.unique(chunk['channel']).tolist())
+                written += n
+                if progress is not None:
+                    progress(written, count)
+
+            meta = dict(metadata or {})
+            meta['channels'] = sorted(int(c) for c in channels)
+            meta_bytes = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+            f.seek(metadata_offset)
+            f.write(meta_bytes)
+
+            # 时间范围取实际最小/最大值（无序时首尾不一定是极值）
+            if not is_sorted and written:
+                t_all = store.column('t_ns', 0, count)
+                start_ns, end_ns = int(t_all.min()), int(t_all.max())
+
+            header = HEADER.pack(SESSION_MAGIC, SESSION_VERSION, FLAG_SORTED if is_sorted else 0,
+                                 written, float(store.scale), start_ns, end_ns,
+                                 metadata_offset, len(meta_bytes))
+            header += b''.join(COLUMN_OFFSET.pack(offsets[name]) for name in COLUMNS)
+            f.seek(0)
+            f.write(header)
+            f.flush()
+            os.fsync(f.fileno())
+        return written
@@ -0,0 +1,164 @@
+import json
+import os
+import sqlite3
+
+import numpy as np
+
+
+class SessionQuery:
+    """SQLite 记录数据库（recordings.db）的时间范围查询 - 供外部分析脚本直接查询实时记录
+
+    只覆盖 SqliteRecorder 写入、尚未按保留策略清理的会话；会话文件（.qsf / .qsr）和
+    当前会话由 SampleStore / SessionFile 的 index_range 与 SampleSlice 按时间范围读取。
+    会话表以 (t_ns, channel) 为主键聚簇存储，所有查询都只扫描请求的时间区间，
+    不需要把整个会话读入内存。数值以设备原始计数存储，返回时按会话的 scale 换算为毫米。
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 记录数据库路径
+        """
+        if not os.path.exists(path):
+            raise Exception(f"记录数据库不存在: {path}")
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+    def close(self):
+        """关闭数据库连接"""
+        self._conn.close()
+
+    # ========== 会话信息 ==========
+    def sessions(self):
+        """获取全部会话信息（按开始时间排序）
+
+        Returns:
+            list: 每个会话一个字典
+        """
+        rows = self._conn.execute('SELECT * FROM sessions ORDER BY start_ns').fetchall()
+        return [self._session_dict(row) for row in rows]
+
+    def session(self, session_id):
+        """获取单个会话信息"""
+        row = self._conn.execute('SELECT * FROM sessions WHERE id = ?', (session_id,)).fetchone()
+        if row is None:
+            raise Exception(f"会话不存在: {session_id}")
+        return self._session_dict(row)
+
+    @staticmethod
+    def _session_dict(row):
+        session = dict(row)
+        session['slave_ids'] = json.loads(session['slave_ids'] or '[]')
+        session['metadata'] = json.loads(session['metadata'] or '{}')
+        return session
+
+    @staticmethod
+    def _table(session):
+        """获取会话样本表名"""
+        if not session['table_name']:
+            raise Exception(f"会话 {session['id']} 的样本已按保留策略清理")
+        return session['table_name']
+
+    def _where(self, start_ns, end_ns, channel):
+        """构造时间范围和通道条件"""
+        clauses, params = [], []
+        if start_ns is not None:
+            clauses.append('t_ns >= ?')
+            params.append(int(start_ns))
+        if end_ns is not None:
+            clauses.append('t_ns < ?')
+            params.append(int(end_ns))
+        if channel is not None:
+            clauses.append('channel = ?')
+            params.append(int(channel))
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+        return where, params
+
+    def _rows(self, sql, params, columns, dtype=np.int64):
+        """执行数据查询，结果转换为 (行数, columns) 的数组"""
+        cursor = self._conn.cursor()
+        cursor.row_factory = None
+        rows = cursor.execute(sql, params).fetchall()
+        return np.array(rows, dtype=dtype).reshape(-1, columns)
+
+    # ========== 查询 ==========
+    def fetch(self, session_id, start_ns=None, end_ns=None, channel=None):
+        """读取时间范围 [start_ns, end_ns) 内的原始样本
+
+        Returns:
+            dict: 't_ns'、'raw'、'channel'、'flags' 列数组及 'value' 毫米数值
+        """
+        session = self.session(session_id)
+        where, params = self._where(start_ns, end_ns, channel)
+        data = self._rows(
+            f'SELECT t_ns, raw, channel, flags FROM {self._table(session)}{where} ORDER BY t_ns',
+            params, 4
+        )
+        result = {
+            't_ns': data[:, 0],
+            'raw': data[:, 1].astype(np.int32),
+            'channel': data[:, 2].astype(np.int16),
+            'flags': data[:, 3].astype(np.uint8),
+        }
+        result['value'] = result['raw'] / session['scale']
+        return result
+
+    def aggregate(self, session_id, start_ns, end_ns, buckets, channel=None):
+        """按固定宽度时间桶降采样 [start_ns, end_ns) 范围内的数据
+
+        Args:
+            buckets: 桶数（即输出分辨率）
+
+        Returns:
+            dict: 't_ns' 桶起始时间、'channel'、'count'、'min'、'max'、'mean'（毫米）数组，
+                  空桶不输出
+        """
+        session = self.session(session_id)
+        start_ns, end_ns = int(start_ns), int(end_ns)
+        width = max(1, -(-(end_ns - start_ns) // max(1, int(buckets))))
+        where, params = self._where(start_ns, end_ns, channel)
+        data = self._rows(
+            f'SELECT (t_ns - ?) / ? AS bucket, channel, COUNT(*), MIN(raw), MAX(raw), AVG(raw) '
+            f'FROM {self._table(session)}{where} GROUP BY bucket, channel ORDER BY bucket, channel',
+            [start_ns, width] + params, 6, np.float64
+        )
+        scale = session['scale']
+        return {
+            't_ns': start_ns + data[:, 0].astype(np.int64) * width,
+            'channel': data[:, 1].astype(np.int16),
+            'count': data[:, 2].astype(np.int64),
+            'min': data[:, 3] / scale,
+            'max': data[:, 4] / scale,
+            'mean': data[:, 5] / scale,
+        }
+
+    def summary(self, session_id, start_ns=None, end_ns=None, channel=None):
+        """统计时间范围内每个通道的数据
+
+        Returns:
+            dict: 从站地址 -> {'count', 'min', 'max', 'mean', 'std', 'start_ns', 'end_ns'}（毫米）
+        """
+        session = self.session(session_id)
+        where, params = self._where(start_ns, end_ns, channel)
+        rows = self._conn.execute(
+            f'SELECT channel, COUNT(*), MIN(raw), MAX(raw), AVG(raw), '
+            f'AVG(CAST(raw AS REAL) * raw), MIN(t_ns), MAX(t_ns) '
+            f'FROM {self._table(session)}{where} GROUP BY channel',
+            params
+        ).fetchall()
+
+        scale = session['scale']
+        result = {}
+        for channel_id, count, low, high, mean, mean_square, first, last in rows:
+            variance = max(0.0, mean_square - mean * mean)
+            result[channel_id] = {
+                'count': count,
+                'min': low / scale,
+                'max': high / scale,
+                'mean': mean / scale,
+                'std': float(np.sqrt(variance)) / scale,
+                'start_ns': first,
+                'end_ns': last,
+            }
+        return result
@@ -0,0 +1,128 @@
+import numpy as np
+
+
+# 可选窗函数
+WINDOW_FUNCTIONS = {
+    "汉宁窗": np.hanning,
+    "汉明窗": np.hamming,
+    "布莱克曼窗": np.blackman,
+    "矩形窗": np.ones,
+}
+
+
+class SpectrumAnalyzer:
+    """频谱分析工具（FFT / Welch 功率谱）"""
+
+    @staticmethod
+    def analyze_sampling(times):
+        """分析采样时间间隔
+
+        Args:
+            times: 样本时间戳数组（秒，升序）
+
+        Returns:
+            dict: 采样率、平均间隔、间隔标准差（抖动）、最大间隔
+        """
+        if len(times) < 2:
+            return None
+
+        intervals = np.diff(times)
+        mean_interval = intervals.mean()
+        if mean_interval <= 0:
+            return None
+
+        return {
+            'sample_rate': 1.0 / mean_interval,
+            'mean_interval': mean_interval,
+            'jitter': intervals.std(),
+            'max_interval': intervals.max(),
+        }
+
+    @staticmethod
+    def resample_uniform(times, values, sample_rate):
+        """按实际时间戳线性插值到等间隔网格
+
+        Args:
+            times: 样本时间戳数组（秒，升序）
+            values: 数值数组
+            sample_rate: 目标采样率（Hz）
+
+        Returns:
+            ndarray: 等间隔采样后的数值
+        """
+        count = int((times[-1] - times[0]) * sample_rate) + 1
+        grid = times[0] + np.arange(count) / sample_rate
+        return np.interp(grid, times, values)
+
+    @staticmethod
+    def amplitude_spectrum(values, sample_rate, window="汉宁窗"):
+        """单边幅值谱（已做窗函数幅值修正）
+
+        Args:
+            values: 等间隔采样数值
+            sample_rate: 采样率（Hz）
+            window: 窗函数名称
+
+        Returns:
+            tuple: (频率数组, 幅值数组)
+        """
+        n = len(values)
+        win = WINDOW_FUNCTIONS.get(window, np.hanning)(n)
+        data = (values - values.mean()) * win
+
+        spectrum = np.abs(np.fft.rfft(data)) * 2.0 / win.sum()
+        spectrum[0] /= 2.0
+        freqs = np.fft.rfftfreq(n, 1.0 / sample_rate)
+        return freqs, spectrum
+
+    @staticmethod
+    def welch_psd(values, sample_rate, segment_length=256, overlap=0.5, window="汉宁窗"):
+        """Welch 法功率谱密度估计
+
+        将数据分为相互重叠的分段，分段加窗后做 FFT 并对功率谱取平均，
+        所有分段通过一次向量化 FFT 计算。
+
+        Args:
+            values: 等间隔采样数值
+            sample_rate: 采样率（Hz）
+            segment_length: 分段长度
+            overlap: 分段重叠比例
+            window: 窗函数名称
+
+        Returns:
+            tuple: (频率数组, 功率谱密度数组，单位 mm²/Hz)
+        """
+        n = len(values)
+        segment_length = min(segment_length, n)
+        step = max(1, int(segment_length * (1 - overlap)))
+        count = (n - segment_length) // step + 1
+
+        # 构造分段索引矩阵 (count x segment_length)
+        index = np.arange(segment_length)[None, :] + step * np.arange(count)[:, None]
+        segments = values[index]
+        segments = segments - segments.mean(axis=1, keepdims=True)
+
+        win = WINDOW_FUNCTIONS.get(window, np.hanning)(segment_length)
+        spectra = np.abs(np.fft.rfft(segments * win, axis=1)) ** 2
+        psd = spectra.mean(axis=0) / (sample_rate * (win ** 2).sum())
+
+        # 单边谱：除直流和奈奎斯特频率外乘2
+        if segment_length % 2 == 0:
+            psd[1:-1] *= 2
+        else:
+            psd[1:] *= 2
+
+        freqs = np.fft.rfftfreq(segment_length, 1.0 / sample_rate)
+        return freqs, psd
+
+    @staticmethod
+    def find_peak(freqs, spectrum):
+        """查找谱峰（忽略直流分量）
+
+        Returns:
+            tuple: (峰值频率, 峰值)，无数据时返回 None
+        """
+        if len(spectrum) < 2:
+            return None
+        index = int(np.argmax(spectrum[1:])) + 1
+        return freqs[index], spectrum[index]
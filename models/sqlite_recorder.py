@@ -0,0 +1,104 @@
+import json
+import sqlite3
+
+from models.sample_sink import SampleSink
+
+
+RECORDING_DATABASE = 'recordings.db'
+
+SESSIONS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT UNIQUE,
+        start_ns INTEGER,
+        end_ns INTEGER,
+        sample_count INTEGER DEFAULT 0,
+        scale REAL,
+        port TEXT,
+        baudrate INTEGER,
+        slave_ids TEXT,
+        metadata TEXT,
+        closed INTEGER DEFAULT 0
+    )
+'''
+
+
+def connect_database(path):
+    """打开记录数据库（WAL 模式，读写可以并发进行）"""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(SESSIONS_SCHEMA)
+    conn.commit()
+    return conn
+
+
+class SqliteRecorder(SampleSink):
+    """SQLite 实时记录 - 连续读取时把样本写入记录数据库
+
+    每次连续读取对应一张会话表 samples_<id>，时间戳为整数纳秒，
+    以 (t_ns, channel) 为主键聚簇存储，按时间范围查询只需扫描对应区间。
+    会话信息（起止时间、样本数、串口参数等）记录在 sessions 表中。
+    写线程按 commit_interval 用一个事务 executemany 批量插入。
+    """
+
+    NAME = "SQLite 记录"
+
+    def __init__(self, path, metadata=None, scale=1000.0, commit_interval=0.5):
+        """
+        Args:
+            path: 数据库文件路径
+            metadata: 会话信息（串口、波特率、从站等）
+            scale: 原始计数与毫米的换算系数
+            commit_interval: 批量提交间隔（秒）
+        """
+        super().__init__(commit_interval)
+        self.path = path
+        self.metadata = dict(metadata or {})
+
+        self._conn = connect_database(path)
+        with self._conn:
+            cursor = self._conn.execute(
+                'INSERT INTO sessions (scale, port, baudrate, slave_ids, metadata) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (scale, self.metadata.get('port'), self.metadata.get('baudrate'),
+                 json.dumps(self.metadata.get('slave_ids', [])),
+                 json.dumps(self.metadata, ensure_ascii=False))
+            )
+            self.session_id = cursor.lastrowid
+            self.table_name = f'samples_{self.session_id}'
+            self._conn.execute(f'''
+                CREATE TABLE {self.table_name} (
+                    t_ns INTEGER NOT NULL,
+                    channel INTEGER NOT NULL,
+                    raw INTEGER NOT NULL,
+                    flags INTEGER DEFAULT 0,
+                    PRIMARY KEY (t_ns, channel)
+                ) WITHOUT ROWID
+            ''')
+            self._conn.execute('UPDATE sessions SET table_name = ? WHERE id = ?',
+                               (self.table_name, self.session_id))
+
+        # 主键重复的样本（同一时间戳、同一从站）只保留第一条
+        self._insert_sql = (f'INSERT OR IGNORE INTO {self.table_name} (t_ns, raw, channel, flags) '
+                            f'VALUES (?, ?, ?, ?)')
+        self.start()
+
+    def _write(self, samples):
+        """在一个事务中批量插入样本并更新会话信息（样本数按实际插入的行数统计）"""
+        with self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(self._insert_sql, samples)
+            inserted = self._conn.total_changes - before
+            self._conn.execute(
+                'UPDATE sessions SET start_ns = COALESCE(start_ns, ?), end_ns = ?, '
+                'sample_count = sample_count + ? WHERE id = ?',
+                (samples[0][0], samples[-1][0], inserted, self.session_id)
+            )
+        return inserted
+
+    def _finish(self):
+        """标记会话正常结束并关闭连接"""
+        with self._conn:
+            self._conn.execute('UPDATE sessions SET closed = 1 WHERE id = ?', (self.session_id,))
+        self._conn.close()
@@ -0,0 +1,184 @@
+"""千分表数据读取器命令行工具（不启动图形界面）
+
+用法:
+    python qillitech.py convert 会话目录 --to csv --out 输出目录
+    python -m qillitech acquire --port /dev/ttyUSB0 --baud 9600 --rate 20 --slaves 1 2 --out 记录.qlog
+
+acquire 的 --out 可以重复指定：- 为标准输出（CSV 文本，默认），.csv 为 CSV 文件，
+.qlog 为二进制记录日志（可用 convert 转换为会话文件或其他格式）。
+Ctrl+C 或 SIGTERM 结束采集，已读取的数据全部写入后退出。
+"""
+import argparse
+import os
+import signal
+import sys
+import time
+from datetime import datetime
+
+from models.acquisition import AcquisitionLoop, CsvStreamSink
+from models.batch_convert import (TARGET_FORMATS, WORKER_MEMORY_BUDGET, REPORT_NAME, find_sources, run_batch,
+                                  write_report)
+from models.gauge_reader import GaugeReader
+from models.recording_log import RecordingLog, LOG_SUFFIX
+
+
+def command_convert(args):
+    """批量转换会话文件"""
+    sources = find_sources(args.inputs)
+    if not sources:
+        print("没有找到可转换的文件", file=sys.stderr)
+        return 1
+
+    print(f"转换 {len(sources)} 个文件 -> {args.to}（{args.workers or os.cpu_count()} 个进程）")
+
+    def progress(done, total, result):
+        status = {'ok': '完成', 'skipped': '跳过', 'failed': '失败'}[result['status']]
+        detail = f"{result.get('rows', 0)} 条, {result.get('seconds', 0):.1f}s" if result['status'] == 'ok' \
+            else result.get('error', '')
+        print(f"[{done}/{total}] {status} {os.path.basename(result['source'])}  {detail}")
+
+    results = run_batch(sources, args.to, args.out, workers=args.workers, overwrite=args.overwrite,
+                        scale=args.scale, memory_budget=args.memory * 1024 * 1024, progress=progress)
+
+    report_path = args.report or os.path.join(args.out, REPORT_NAME)
+    write_report(report_path, results)
+
+    converted = [r for r in results if r['status'] == 'ok']
+    failed = [r for r in results if r['status'] == 'failed']
+    print(f"\n完成 {len(converted)} 个，跳过 {len(results) - len(converted) - len(failed)} 个，"
+          f"失败 {len(failed)} 个，共 {sum(r['rows'] for r in converted)} 条数据")
+    print(f"统计报告：{report_path}")
+    return 1 if failed else 0
+
+
+def open_output(path, metadata, scale, on_error):
+    """按路径创建采集输出的写入端"""
+    if path == '-':
+        return CsvStreamSink(sys.stdout, scale, on_error=on_error)
+    lower = path.lower()
+    if lower.endswith('.csv'):
+        stream = open(path, 'w', encoding='utf-8-sig', newline='\r\n', buffering=1024 * 1024)
+        return CsvStreamSink(stream, scale, commit_interval=1.0, close_stream=True)
+    if lower.endswith(LOG_SUFFIX):
+        return RecordingLog(path, metadata, sync_interval=1.0)
+    raise Exception(f"不支持的输出格式：{path}（可用 -、.csv、{LOG_SUFFIX}）")
+
+
+def command_acquire(args):
+    """无界面连续采集"""
+    if args.rate <= 0:
+        print("采集频率必须大于 0", file=sys.stderr)
+        return 2
+
+    interval = 1.0 / args.rate
+    metadata = {
+        'port': args.port,
+        'baudrate': args.baud,
+        'slave_ids': args.slaves,
+        'interval': interval,
+        'scale': GaugeReader.VALUE_SCALE,
+        'start': datetime.now().isoformat(),
+    }
+
+    loop = AcquisitionLoop(interval, args.slaves)
+
+    def on_stdout_error(error):
+        # 下游管道已关闭（例如 | head）：停止采集，之后的输出丢弃
+        loop.stop()
+        if isinstance(error, BrokenPipeError):
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+    failures = []
+
+    def on_recorder_error(recorder, error):
+        # 输出文件写入失败（例如磁盘已满）：报告后停止，不在没有输出的情况下继续采集
+        if not isinstance(error, BrokenPipeError):
+            print(f"{recorder.NAME}写入失败：{error}", file=sys.stderr)
+            failures.append(recorder)
+        loop.stop()
+
+    loop.on_recorder_error = on_recorder_error
+
+    reader = GaugeReader(args.port, args.baud)
+    sinks = []
+    try:
+        for path in args.out or ['-']:
+            sinks.append(open_output(path, metadata, GaugeReader.VALUE_SCALE, on_stdout_error))
+        loop.recorders = sinks
+        reader.connect()
+    except Exception as e:
+        print(f"无法开始采集：{e}", file=sys.stderr)
+        for sink in sinks:
+            sink.close()
+        return 1
+
+    def request_stop(signum, frame):
+        loop.stop()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    print(f"开始采集 {args.port} @ {args.baud}，{args.rate:g} Hz，从站 {' '.join(map(str, args.slaves))}"
+          f"（Ctrl+C 停止）", file=sys.stderr)
+    started = time.monotonic()
+    status = 0
+    try:
+        loop.run(reader, args.duration)
+    except Exception as e:
+        print(f"读取错误：{e}", file=sys.stderr)
+        status = 1
+    finally:
+        reader.disconnect()
+        for sink in sinks:
+            sink.close()
+    # 关闭时最后一次提交的失败
+    for sink in sinks:
+        if sink.failed and sink not in failures and not isinstance(sink.error, BrokenPipeError):
+            print(f"{sink.NAME}写入失败：{sink.error}", file=sys.stderr)
+            failures.append(sink)
+    if failures:
+        status = 1
+
+    elapsed = time.monotonic() - started
+    print(f"结束采集：{loop.cycles} 个周期，{loop.cycles * len(loop.slave_ids)} 条数据，"
+          f"平均 {loop.cycles / elapsed if elapsed > 0 else 0:.2f} Hz", file=sys.stderr)
+    return status
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='qillitech', description="千分表数据读取器命令行工具")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    convert = commands.add_parser('convert', help="批量转换会话/导出文件格式")
+    convert.add_argument('inputs', nargs='+', help="输入文件或目录（.qsf .qsr .qlog .csv .xlsx .db .npz）")
+    convert.add_argument('--to', required=True, choices=sorted(TARGET_FORMATS), help="目标格式")
+    convert.add_argument('--out', required=True, help="输出目录")
+    convert.add_argument('--workers', type=int, default=None, help="进程数（默认为 CPU 核数）")
+    convert.add_argument('--memory', type=int, default=WORKER_MEMORY_BUDGET // 1024 // 1024,
+                         help="每个进程的样本内存上限（MB），超出部分转存到磁盘")
+    convert.add_argument('--scale', type=float, default=GaugeReader.VALUE_SCALE,
+                         help="文本格式输入的原始计数换算系数")
+    convert.add_argument('--overwrite', action='store_true', help="覆盖已存在的输出文件")
+    convert.add_argument('--report', help=f"统计报告路径（默认为输出目录下的 {REPORT_NAME}）")
+    convert.set_defaults(func=command_convert)
+
+    acquire = commands.add_parser('acquire', help="不启动图形界面连续采集")
+    acquire.add_argument('--port', required=True, help="串口（例如 COM7 或 /dev/ttyUSB0）")
+    acquire.add_argument('--baud', type=int, default=9600, help="波特率")
+    acquire.add_argument('--rate', type=float, default=10.0, help="轮询频率（Hz），每个周期依次读取所有从站")
+    acquire.add_argument('--slaves', type=int, nargs='+', default=[1], help="从站地址")
+    acquire.add_argument('--out', action='append',
+                         help=f"输出：- 为标准输出，.csv 为 CSV 文件，{LOG_SUFFIX} 为记录日志（可重复指定）")
+    acquire.add_argument('--duration', type=float, default=None, help="采集时长（秒），默认一直采集到被中断")
+    acquire.set_defaults(func=command_acquire)
+    return parser
+
+
+def main(argv=None):
+    """命令行入口"""
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
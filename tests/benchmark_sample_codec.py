@@ -0,0 +1,29 @@
+"""样本编解码性能测试（不属于自动测试）
+
+用法:
+    python -m tests.benchmark_sample_codec
+"""
+import time
+
+from models.sample_codec import SampleCodec
+from tests.test_sample_codec import CASES
+
+
+def main():
+    for name, columns in CASES.items():
+        start = time.perf_counter()
+        encoded = SampleCodec.encode(*columns)
+        encode_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        SampleCodec.decode(encoded)
+        decode_time = time.perf_counter() - start
+
+        count = len(columns[0])
+        bits = len(encoded) * 8 / count if count else 0
+        print(f"{name}: {count} 样本, {len(encoded)} 字节, {bits:.2f} 位/样本, "
+              f"编码 {encode_time * 1000:.1f}ms, 解码 {decode_time * 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+import csv
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import models.batch_convert as batch_convert
+from models.batch_convert import REPORT_FIELDS, convert_file, find_sources, run_batch, write_report
+from models.exporters import CsvExporter
+from models.importers import CsvImporter
+from models.sample_store import SampleStore
+from models.session_catalog import summarize
+from models.session_file import SessionFile
+
+T0 = 1_700_000_000_000_000_000
+
+
+def make_store(n=3000, seed=8):
+    rng = np.random.default_rng(seed)
+    store = SampleStore(1000.0)
+    store.extend(T0 + np.arange(n, dtype=np.int64) * 20_000_000,
+                 rng.integers(-20_000, 20_000, n).astype(np.int32),
+                 np.resize(np.array([1, 2], dtype=np.int16), n))
+    return store
+
+
+@pytest.fixture
+def sources(tmp_path):
+    """一个会话文件、一个 CSV 导出文件和一个损坏的会话文件"""
+    source_dir = os.path.join(tmp_path, 'in')
+    os.makedirs(os.path.join(source_dir, 'sub'))
+    store = make_store()
+    SessionFile.write(os.path.join(source_dir, 'a.qsf'), store, {'port': 'COM1'})
+    CsvExporter.export(make_store(500, seed=9), os.path.join(source_dir, 'sub', 'b.csv'))
+    with open(os.path.join(source_dir, 'broken.qsf'), 'wb') as f:
+        f.write(b'QSF1' + b'\0' * 20)
+    with open(os.path.join(source_dir, 'notes.txt'), 'w') as f:
+        f.write('ignored')
+    return source_dir, store
+
+
+def test_find_sources(sources, tmp_path):
+    source_dir, _ = sources
+    names = [os.path.relpath(path, source_dir) for path in find_sources([source_dir])]
+    assert names == ['a.qsf', 'broken.qsf', os.path.join('sub', 'b.csv')]
+    assert find_sources([os.path.join(source_dir, 'notes.txt')]) == [os.path.join(source_dir, 'notes.txt')]
+
+
+def test_convert_ok_row(sources, tmp_path):
+    source_dir, store = sources
+    out_dir = os.path.join(tmp_path, 'out')
+    os.makedirs(out_dir)
+
+    result = convert_file(os.path.join(source_dir, 'a.qsf'), 'csv', out_dir)
+
+    assert result['status'] == 'ok'
+    assert result['output'] == os.path.join(out_dir, 'a.csv')
+    assert not os.path.exists(result['output'] + '.part')
+    summary = summarize(store)
+    assert result['rows'] == len(store)
+    assert result['channels'] == '1 2'
+    assert result['start'] == datetime.fromtimestamp(T0 / 1e9).strftime('%Y-%m-%d %H:%M:%S.000')
+    assert result['duration_s'] == pytest.approx((len(store) - 1) * 0.02)
+    for field, key in (('min_mm', 'min'), ('max_mm', 'max'), ('mean_mm', 'mean'), ('std_mm', 'std')):
+        assert result[field] == pytest.approx(summary[key])
+    assert result['seconds'] >= 0
+
+    converted = CsvImporter.load(result['output'])
+    assert len(converted) == len(store)
+    assert np.array_equal(converted.column('raw'), store.column('raw'))
+
+
+def test_convert_skipped_rows(sources, tmp_path):
+    source_dir, _ = sources
+    source = os.path.join(source_dir, 'a.qsf')
+
+    result = convert_file(source, 'qsf', source_dir)
+    assert (result['status'], result['error']) == ('skipped', '输入与输出相同')
+
+    out_dir = os.path.join(tmp_path, 'out')
+    os.makedirs(out_dir)
+    existing = os.path.join(out_dir, 'a.npz')
+    with open(existing, 'w') as f:
+        f.write('keep')
+    result = convert_file(source, 'npz', out_dir)
+    assert (result['status'], result['error']) == ('skipped', '输出文件已存在')
+    with open(existing) as f:
+        assert f.read() == 'keep'
+
+    result = convert_file(source, 'npz', out_dir, overwrite=True)
+    assert result['status'] == 'ok' and result['rows'] == 3000
+
+
+def test_convert_failed_rows(sources, tmp_path):
+    source_dir, _ = sources
+    out_dir = os.path.join(tmp_path, 'out')
+    os.makedirs(out_dir)
+
+    result = convert_file(os.path.join(source_dir, 'broken.qsf'), 'csv', out_dir)
+    assert result['status'] == 'failed' and result['error']
+    assert 'rows' not in result and result['seconds'] >= 0
+
+    result = convert_file(os.path.join(source_dir, 'notes.txt'), 'csv', out_dir)
+    assert result['status'] == 'failed' and '不支持' in result['error']
+    assert os.listdir(out_dir) == []
+
+
+def test_failed_export_removes_part_file(sources, tmp_path, monkeypatch):
+    source_dir, _ = sources
+    out_dir = os.path.join(tmp_path, 'out')
+    os.makedirs(out_dir)
+    # 上次中断残留的临时文件
+    with open(os.path.join(out_dir, 'a.db.part'), 'w') as f:
+        f.write('stale')
+
+    def failing_export(store, path, target, metadata=None):
+        with open(path, 'w') as f:
+            f.write('partial')
+        raise Exception("磁盘已满")
+
+    monkeypatch.setattr(batch_convert, 'export_store', failing_export)
+    result = convert_file(os.path.join(source_dir, 'a.qsf'), 'db', out_dir)
+
+    assert (result['status'], result['error']) == ('failed', '磁盘已满')
+    assert os.listdir(out_dir) == []
+
+
+def test_run_batch_and_report(sources, tmp_path):
+    source_dir, _ = sources
+    out_dir = os.path.join(tmp_path, 'out')
+    os.makedirs(out_dir)
+    with open(os.path.join(out_dir, 'a.qsf'), 'w') as f:
+        f.write('keep')
+    paths = find_sources([source_dir])
+    progress = []
+
+    results = run_batch(paths, 'qsf', out_dir, workers=2, progress=lambda *args: progress.append(args))
+
+    assert [result['source'] for result in results] == paths
+    assert [result['status'] for result in results] == ['skipped', 'failed', 'ok']
+    assert sorted(done for done, _, _ in progress) == [1, 2, 3]
+    assert results[2]['rows'] == 500
+
+    report_path = os.path.join(out_dir, 'convert_report.csv')
+    write_report(report_path, results)
+    with open(report_path, newline='', encoding='utf-8-sig') as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0].keys()) == REPORT_FIELDS
+    assert [row['status'] for row in rows] == ['skipped', 'failed', 'ok']
+    assert rows[2]['rows'] == '500' and rows[2]['channels'] == '1 2'
+    assert rows[0]['rows'] == ''
+
+    with pytest.raises(Exception):
+        run_batch(paths, 'txt', out_dir)
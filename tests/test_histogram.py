@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from models.histogram import StreamingHistogram
+
+
+def make_values(n=200_000, seed=3):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0.25, 0.04, n)
+
+
+def test_moments_and_extremes_match_numpy():
+    values = make_values()
+    histogram = StreamingHistogram()
+    for batch in np.array_split(values, 37):
+        histogram.extend(batch)
+
+    assert histogram.count == len(values)
+    assert np.isclose(histogram.mean, values.mean(), rtol=0, atol=1e-12)
+    assert np.isclose(histogram.std, values.std(), rtol=1e-9)
+    assert (histogram.min, histogram.max) == (values.min(), values.max())
+
+
+@pytest.mark.parametrize('q', [0, 1, 5, 25, 50, 75, 95, 99, 100])
+def test_percentile_within_bin_width(q):
+    values = make_values()
+    histogram = StreamingHistogram()
+    histogram.extend(values)
+    assert abs(histogram.percentile(q) - np.percentile(values, q)) <= histogram.width
+    assert np.allclose(histogram.percentile([q, q]), histogram.percentile(q))
+
+
+def test_bin_overflow_merges_exactly():
+    """超出范围时桶两两合并：计数与按最终桶边界直接统计的结果完全一致"""
+    values = make_values()
+    histogram = StreamingHistogram(bins=64)
+    histogram.extend(values[:100])
+    first_width = histogram.width
+    # 逐步出现越来越远的离群值，向上、向下各扩展若干次
+    for batch in np.array_split(values[100:], 50):
+        histogram.extend(batch)
+    histogram.extend([5.0, -3.0])
+
+    assert histogram.width > first_width
+    assert np.isclose(np.log2(histogram.width / histogram.initial_width) % 1, 0)
+    assert len(histogram.counts) == 64
+    assert histogram.counts.sum() == histogram.count == len(values) + 2
+    assert histogram.low <= -3.0 and histogram.high > 5.0
+
+    expected, _ = np.histogram(np.append(values, [5.0, -3.0]), bins=histogram.edges())
+    assert np.array_equal(histogram.counts, expected)
+
+
+def test_batches_equal_single_pass():
+    values = make_values(50_000)
+    whole = StreamingHistogram(bins=32)
+    whole.extend(values)
+    streamed = StreamingHistogram(bins=32)
+    streamed.extend(values[:10])
+    for value in values[10:200]:
+        streamed.add(value)
+    for batch in np.array_split(values[200:], 13):
+        streamed.extend(batch)
+
+    # 首批数据不同，初始范围不同；但各自的计数都与按其桶边界直接统计的结果一致
+    for histogram in (whole, streamed):
+        assert np.array_equal(histogram.counts, np.histogram(values, bins=histogram.edges())[0])
+    assert np.isclose(streamed.mean, whole.mean) and np.isclose(streamed.std, whole.std)
+    assert abs(streamed.percentile(50) - whole.percentile(50)) <= max(streamed.width, whole.width)
+
+
+def test_fractions_and_non_finite():
+    histogram = StreamingHistogram()
+    histogram.extend([np.nan, np.inf])
+    assert histogram.count == 0
+    assert np.isnan(histogram.percentile(50))
+    assert histogram.fraction_below(0.0) == histogram.fraction_above(0.0) == 0.0
+
+    values = np.linspace(-1.0, 1.0, 20001)
+    histogram.extend(np.append(values, np.nan))
+    assert histogram.count == len(values)
+    assert histogram.fraction_below(-1.0) == 0.0 and histogram.fraction_below(2.0) == 1.0
+    assert abs(histogram.fraction_below(0.5) - 0.75) < 0.01
+    assert abs(histogram.fraction_above(-0.5) - 0.75) < 0.01
+
+    edges, counts = histogram.occupied()
+    assert len(edges) == len(counts) + 1 and counts.sum() == histogram.count
+
+    histogram.reset()
+    assert histogram.count == 0 and histogram.counts.sum() == 0 and histogram.low is None
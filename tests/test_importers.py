@@ -0,0 +1,62 @@
+import os
+import zipfile
+
+import numpy as np
+import pytest
+
+from models.importers import ExcelImporter, OPENPYXL_AVAILABLE
+
+pytestmark = pytest.mark.skipif(not OPENPYXL_AVAILABLE, reason="需要 openpyxl")
+
+HEADER = ['时间', '数值(mm)', '从站']
+
+
+def write_workbook(path, rows):
+    from openpyxl import Workbook
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(HEADER)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def rewrite_sheet(path, replace):
+    """修改 xlsx 中第一个工作表的 XML"""
+    with zipfile.ZipFile(path) as archive:
+        items = {name: archive.read(name) for name in archive.namelist()}
+    changed = replace(items['xl/worksheets/sheet1.xml'])
+    assert changed != items['xl/worksheets/sheet1.xml']
+    items['xl/worksheets/sheet1.xml'] = changed
+    with zipfile.ZipFile(path, 'w') as archive:
+        for name, data in items.items():
+            archive.writestr(name, data)
+
+
+def test_excel_text_times(tmp_path):
+    path = os.path.join(tmp_path, 'shared.xlsx')
+    write_workbook(path, [['2024-01-01 00:00:00.000', 1.5, 1], ['2024-01-01 00:00:02.000', -2.5, 2]])
+    store = ExcelImporter.load(path)
+    assert np.allclose(store.values(), [1.5, -2.5])
+    assert np.array_equal(store.column('channel'), [1, 2])
+    assert store.column('t_ns')[1] - store.column('t_ns')[0] == 2 * 10 ** 9
+
+
+def test_excel_missing_cells_fall_back(tmp_path):
+    path = os.path.join(tmp_path, 'missing.xlsx')
+    write_workbook(path, [['2024-01-01 00:00:00.000', 1.5, 1],
+                          ['2024-01-01 00:00:01.000', None, 1],
+                          ['2024-01-01 00:00:02.000', 2.0],
+                          ['2024-01-01 00:00:03.000', 2.5, 2]])
+    store = ExcelImporter.load(path)
+    assert np.allclose(store.values(), [1.5, 2.0, 2.5])
+    assert np.array_equal(store.column('channel'), [1, 1, 2])
+
+
+def test_excel_self_closing_cell_falls_back(tmp_path):
+    path = os.path.join(tmp_path, 'self_closing.xlsx')
+    write_workbook(path, [['2024-01-01 00:00:00.000', 1.5, 1], ['2024-01-01 00:00:01.000', 2.5, 2]])
+    # 第二个数据行的数值单元格改为没有内容的自闭合单元格
+    rewrite_sheet(path, lambda xml: xml.replace(b'<c r="B3" t="n"><v>2.5</v></c>', b'<c r="B3" t="n"/>'))
+    store = ExcelImporter.load(path)
+    assert np.allclose(store.values(), [1.5])
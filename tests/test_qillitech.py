@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from models.acquisition import CsvStreamSink
+from models.recording_log import RecordingLog
+from qillitech import open_output
+
+T0 = 1_700_000_000_000_000_000
+METADATA = {'port': 'COM3', 'slave_ids': [1], 'scale': 1000.0}
+
+
+@pytest.mark.parametrize('name', ['out.txt', 'out.xlsx', 'out', 'out.csv.bak'])
+def test_open_output_rejects_unknown_suffix(tmp_path, name):
+    path = os.path.join(tmp_path, name)
+    with pytest.raises(Exception, match="不支持的输出格式"):
+        open_output(path, METADATA, 1000.0, on_error=None)
+    assert not os.path.exists(path)
+
+
+def test_open_output_csv(tmp_path):
+    path = os.path.join(tmp_path, 'OUT.CSV')
+    sink = open_output(path, METADATA, 1000.0, on_error=None)
+    assert isinstance(sink, CsvStreamSink)
+    sink.append(T0, 1234, 1)
+    sink.close()
+
+    with open(path, 'rb') as f:
+        content = f.read()
+    assert content.count(b'\r\n') == 2 and b'\r\r' not in content
+    lines = content.decode('utf-8-sig').splitlines()
+    assert lines[0] == '时间,数值(mm),从站'
+    assert lines[1].endswith(', +1.2340,1')
+
+
+def test_open_output_recording_log(tmp_path):
+    path = os.path.join(tmp_path, 'out.qlog')
+    sink = open_output(path, METADATA, 1000.0, on_error=None)
+    assert isinstance(sink, RecordingLog)
+    sink.append(T0, 5, 1)
+    sink.close()
+
+    data = RecordingLog.read(path)
+    assert data['closed'] and data['metadata'] == METADATA
+    assert data['samples']['raw'].tolist() == [5]
+
+
+def test_open_output_stdout(capsys):
+    sink = open_output('-', METADATA, 1000.0, on_error=None)
+    sink.append(T0, -500, 2)
+    sink.close()
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == '时间,数值(mm),从站'
+    assert lines[1].endswith(', -0.5000,2')
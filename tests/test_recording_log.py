@@ -0,0 +1,194 @@
+import json
+import os
+import zlib
+
+import numpy as np
+import pytest
+
+from models.catalog_worker import CatalogWorker
+from models.recording_log import (FRAME_CLOSE, FRAME_HEADER, FRAME_MARKER, FRAME_SAMPLES, LOG_HEADER, LOG_MAGIC,
+                                  SAMPLE_DTYPE, FileLock, RecordingLog, RecordingLogReader)
+from models.sample_store import FLAG_RECOVERED
+from models.session_catalog import SessionCatalog
+from models.session_file import SessionFile
+
+T0 = 1_700_000_000_000_000_000
+METADATA = {'port': 'COM3', 'slave_ids': [1, 2], 'scale': 1000.0}
+
+
+def make_frames(count=4, size=100):
+    frames = []
+    for i in range(count):
+        samples = np.zeros(size, dtype=SAMPLE_DTYPE)
+        samples['t_ns'] = T0 + (i * size + np.arange(size)) * 1_000_000
+        samples['raw'] = i * size + np.arange(size)
+        samples['channel'] = np.arange(size) % 2 + 1
+        frames.append(samples)
+    return frames
+
+
+def frame_bytes(frame_type, payload):
+    return FRAME_HEADER.pack(FRAME_MARKER, frame_type, len(payload), zlib.crc32(payload)) + payload
+
+
+def write_log(path, frames, closed=False, tail=b''):
+    """按日志格式手工写入（模拟写入方崩溃时留下的文件）"""
+    meta = json.dumps(METADATA).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(LOG_HEADER.pack(LOG_MAGIC, len(meta)) + meta)
+        for frame in frames:
+            f.write(frame_bytes(FRAME_SAMPLES, frame.tobytes()))
+        f.write(tail)
+        if closed:
+            f.write(frame_bytes(FRAME_CLOSE, b''))
+
+
+def test_written_log_round_trip(tmp_path):
+    path = os.path.join(tmp_path, 'a.qlog')
+    log = RecordingLog(path, METADATA, sync_interval=60)
+    expected = np.concatenate(make_frames())
+    for row in expected:
+        log.append(int(row['t_ns']), int(row['raw']), int(row['channel']))
+    log.close()
+
+    data = RecordingLog.read(path)
+    assert data['closed'] and RecordingLog.is_closed(path)
+    assert data['metadata'] == METADATA
+    assert np.array_equal(data['samples'], expected)
+    assert not os.path.exists(path + '.lock')
+
+
+def test_stops_at_bad_crc(tmp_path):
+    path = os.path.join(tmp_path, 'a.qlog')
+    frames = make_frames()
+    write_log(path, frames, closed=True)
+    # 破坏第 3 帧的负载
+    with open(path, 'r+b') as f:
+        offset = os.path.getsize(path) - 2 * (FRAME_HEADER.size + frames[0].nbytes) - FRAME_HEADER.size + 10
+        f.seek(offset)
+        f.write(b'\xff\xfe')
+
+    reader = RecordingLogReader(path)
+    assert not reader.closed
+    assert len(reader) == 2 * len(frames[0])
+    assert np.array_equal(reader.samples(), np.concatenate(frames[:2]))
+    assert np.array_equal(reader.column('raw', 50, 150), np.concatenate(frames[:2])['raw'][50:150])
+
+
+@pytest.mark.parametrize('cut', [1, FRAME_HEADER.size - 1, FRAME_HEADER.size + 7])
+def test_stops_at_truncated_frame(tmp_path, cut):
+    path = os.path.join(tmp_path, 'a.qlog')
+    frames = make_frames()
+    tail = frame_bytes(FRAME_SAMPLES, frames[0].tobytes())[:cut]
+    write_log(path, frames, tail=tail)
+
+    reader = RecordingLogReader(path, FLAG_RECOVERED)
+    assert not reader.closed and not RecordingLog.is_closed(path)
+    assert reader.valid_end == os.path.getsize(path) - cut
+    assert np.array_equal(reader.column('t_ns'), np.concatenate(frames)['t_ns'])
+    assert (reader.column('flags') == FLAG_RECOVERED).all()
+
+
+def test_rejects_bad_header(tmp_path):
+    path = os.path.join(tmp_path, 'a.qlog')
+    with open(path, 'wb') as f:
+        f.write(b'NOTALOG0' + b'\0' * 8)
+    with pytest.raises(Exception):
+        RecordingLogReader(path)
+    with open(path, 'wb') as f:
+        f.write(LOG_MAGIC)
+    with pytest.raises(Exception):
+        RecordingLogReader(path)
+
+
+def test_seal(tmp_path):
+    path = os.path.join(tmp_path, 'a.qlog')
+    frames = make_frames()
+    write_log(path, frames, tail=b'\x5a\xa5\x01garbage')
+    assert not RecordingLog.is_closed(path)
+
+    RecordingLog.seal(path)
+
+    assert RecordingLog.is_closed(path)
+    data = RecordingLog.read(path)
+    assert data['closed']
+    assert data['valid_end'] == os.path.getsize(path)
+    assert np.array_equal(data['samples'], np.concatenate(frames))
+
+
+def test_find_unfinished(tmp_path):
+    write_log(os.path.join(tmp_path, '3.qlog'), make_frames(), tail=b'\x5a')
+    write_log(os.path.join(tmp_path, '1.qlog'), make_frames())
+    write_log(os.path.join(tmp_path, '2.qlog'), make_frames(), closed=True)
+    write_log(os.path.join(tmp_path, '4.qlog'), make_frames())
+    write_log(os.path.join(tmp_path, '5.txt'), make_frames())
+    # 4 仍在被其他窗口写入
+    lock = FileLock(os.path.join(tmp_path, '4.qlog.lock'))
+    assert lock.acquire()
+    try:
+        unfinished = RecordingLog.find_unfinished(tmp_path)
+    finally:
+        lock.release()
+
+    assert [os.path.basename(path) for path in unfinished] == ['1.qlog', '3.qlog']
+    assert RecordingLog.find_unfinished(os.path.join(tmp_path, 'missing')) == []
+
+
+def recover(monkeypatch, tmp_path):
+    """在 tmp_path 作为数据目录时运行一次启动恢复"""
+    monkeypatch.setenv('HOME', str(tmp_path))
+    worker = CatalogWorker(log_paths=[], recover=True)
+    added, recovered = [], []
+    worker.sessionAdded.connect(added.append)
+    worker.recordingsRecovered.connect(lambda *counts: recovered.append(counts))
+    worker.run()
+    return added, recovered
+
+
+def test_recover_unfinished_log(monkeypatch, tmp_path):
+    data_dir = os.path.join(tmp_path, '.qillitech_reader')
+    os.makedirs(os.path.join(data_dir, 'recordings'))
+    log_path = os.path.join(data_dir, 'recordings', '20240101_000000.qlog')
+    frames = make_frames()
+    write_log(log_path, frames, tail=b'\x5a\xa5')
+
+    added, recovered = recover(monkeypatch, tmp_path)
+
+    assert recovered == [(1, 400)]
+    session_path, = added
+    assert not os.path.exists(log_path)
+    session = SessionFile(session_path)
+    try:
+        assert session.metadata['recovered'] is True
+        assert np.array_equal(session.column('raw'), np.concatenate(frames)['raw'])
+        assert (session.column('flags') == FLAG_RECOVERED).all()
+    finally:
+        session.close()
+
+
+def test_interrupted_recovery_keeps_recovered_state(monkeypatch, tmp_path):
+    """转换中断时日志保持未结束状态，下次启动仍按恢复处理"""
+    data_dir = os.path.join(tmp_path, '.qillitech_reader')
+    os.makedirs(os.path.join(data_dir, 'recordings'))
+    log_path = os.path.join(data_dir, 'recordings', '20240101_000000.qlog')
+    write_log(log_path, make_frames(), tail=b'\x5a')
+
+    def interrupted(self, path):
+        raise Exception("模拟中断")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(SessionCatalog, 'add_file', interrupted)
+        added, recovered = recover(monkeypatch, tmp_path)
+    assert added == [] and recovered == []
+    assert os.path.exists(log_path) and not RecordingLog.is_closed(log_path)
+    assert SessionCatalog.pending_recordings(os.path.dirname(log_path)) == []
+
+    added, recovered = recover(monkeypatch, tmp_path)
+    assert recovered == [(1, 400)]
+    catalog = SessionCatalog(os.path.join(data_dir, 'catalog.db'))
+    try:
+        entry, = catalog.query()
+    finally:
+        catalog.close()
+    assert entry['path'] == added[0]
+    assert json.loads(entry['metadata'])['recovered'] is True
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from models.resample import align_up, interpolate, iter_resampled
+from models.sample_store import SampleStore
+
+T0 = 1_700_000_000_000_000_000
+PERIOD = 7_000_000
+MAX_GAP = 500_000_000
+
+
+def make_store(chunk_size=997):
+    """三个从站轮询、带抖动；从站 3 中断 2 秒、从站 2 晚开始，分块大小不与轮询周期对齐"""
+    rng = np.random.default_rng(1)
+    rounds = 6000
+    t_ns, raw, channel = [], [], []
+    t = T0
+    for i in range(rounds):
+        for slave in (1, 2, 3):
+            t += int(rng.integers(2_000_000, 5_000_000))
+            if slave == 2 and i < 50:
+                continue
+            if slave == 3 and 2000 <= i < 2200:
+                continue
+            t_ns.append(t)
+            raw.append(int(rng.integers(-5000, 5000)) + slave * 10000)
+            channel.append(slave)
+
+    store = SampleStore(1000.0, chunk_size=chunk_size)
+    store.extend(np.array(t_ns, dtype=np.int64), np.array(raw, dtype=np.int32), np.array(channel, dtype=np.int16))
+    return store
+
+
+def reference(store, channels, method, max_gap_ns, start_ns=None, end_ns=None):
+    """对整个数组一次性插值"""
+    t_ns, values, channel = store.column('t_ns'), store.values(), store.column('channel')
+    first = int(t_ns.min()) if start_ns is None else start_ns
+    last = int(t_ns.max()) + 1 if end_ns is None else end_ns
+    start = align_up(first, PERIOD)
+    grid = np.arange(start, last, PERIOD, dtype=np.int64)
+    result = np.empty((len(grid), len(channels)))
+    for column, slave in enumerate(channels):
+        mask = channel == slave
+        result[:, column] = interpolate(grid, t_ns[mask], values[mask], method, max_gap_ns)
+    return grid, result
+
+
+def collect(chunks):
+    grids, values = zip(*chunks)
+    return np.concatenate(grids), np.concatenate(values)
+
+
+@pytest.mark.parametrize('method', ['linear', 'hold'])
+@pytest.mark.parametrize('max_gap_ns', [None, MAX_GAP])
+def test_streamed_matches_full_arrays(method, max_gap_ns):
+    store = make_store()
+    assert len(store) > 10 * store.chunk_size
+    channels = [1, 2, 3, 4]  # 从站 4 没有数据
+
+    grid, values = collect(iter_resampled(store, PERIOD, channels, method, max_gap_ns=max_gap_ns))
+    expected_grid, expected = reference(store, channels, method, max_gap_ns)
+
+    assert np.array_equal(grid, expected_grid)
+    assert np.array_equal(np.isnan(values), np.isnan(expected))
+    np.testing.assert_allclose(values, expected, rtol=0, atol=1e-9, equal_nan=True)
+    assert np.isnan(values[:, 3]).all()
+    if max_gap_ns is not None:
+        assert np.isnan(values[:, 2]).any()
+
+
+@pytest.mark.parametrize('method', ['linear', 'hold'])
+@pytest.mark.parametrize('max_gap_ns', [None, MAX_GAP])
+def test_streamed_range_matches_full_arrays(method, max_gap_ns):
+    store = make_store()
+    t_ns = store.column('t_ns')
+    start_ns, end_ns = int(t_ns[len(t_ns) // 3]) + 1, int(t_ns[2 * len(t_ns) // 3])
+    channels = [1, 2, 3]
+
+    grid, values = collect(iter_resampled(store, PERIOD, channels, method, start_ns, end_ns, max_gap_ns))
+    expected_grid, expected = reference(store, channels, method, max_gap_ns, start_ns, end_ns)
+
+    assert np.array_equal(grid, expected_grid)
+    np.testing.assert_allclose(values, expected, rtol=0, atol=1e-9, equal_nan=True)
+
+
+def test_chunk_size_does_not_change_result():
+    results = [collect(iter_resampled(make_store(size), PERIOD, [1, 2, 3], 'linear', max_gap_ns=MAX_GAP))
+               for size in (1, 64, 997, 1 << 20)]
+    for grid, values in results[1:]:
+        assert np.array_equal(grid, results[0][0])
+        np.testing.assert_allclose(values, results[0][1], rtol=0, atol=1e-9, equal_nan=True)
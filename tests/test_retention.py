@@ -0,0 +1,232 @@
+import os
+import sqlite3
+
+import numpy as np
+
+from models.retention import RetentionJob, RollupFile, compute_rollups
+from models.sample_store import SampleStore
+from models.session_catalog import SessionCatalog
+from models.session_file import SessionFile
+from models.sqlite_recorder import SqliteRecorder
+
+T0 = 1_700_000_000_000_000_000  # 早于保留期限
+SECOND = 1_000_000_000
+
+
+def make_store(n=20_000, chunk_size=1000, seed=5):
+    """两个从站，约 3.5 分钟，跨越多个 1 秒 / 1 分钟桶，分块边界落在桶中间"""
+    rng = np.random.default_rng(seed)
+    t_ns = T0 + 123_456_789 + np.cumsum(rng.integers(1, 20_000_000, n))
+    raw = rng.integers(-10 ** 6, 10 ** 6, n).astype(np.int32)
+    channel = rng.integers(1, 3, n).astype(np.int16)
+    store = SampleStore(1000.0, chunk_size=chunk_size)
+    store.extend(t_ns, raw, channel)
+    return store
+
+
+def brute_force(store, width):
+    t_ns, raw, channel = store.column('t_ns'), store.column('raw'), store.column('channel')
+    expected = {}
+    for bucket, slave in sorted(set(zip((t_ns // width).tolist(), channel.tolist()))):
+        values = raw[(t_ns // width == bucket) & (channel == slave)]
+        expected[(bucket * width, slave)] = (len(values), values.min(), values.max(), values.mean())
+    return expected
+
+
+def as_dict(level):
+    return {
+        (t, c): (n, low, high, mean)
+        for t, c, n, low, high, mean in zip(level['t_ns'].tolist(), level['channel'].tolist(), level['count'].tolist(),
+                                            level['min'].tolist(), level['max'].tolist(), level['mean'].tolist())
+    }
+
+
+def assert_level(level, expected):
+    actual = as_dict(level)
+    assert actual.keys() == expected.keys()
+    for key, (n, low, high, mean) in expected.items():
+        assert actual[key][:3] == (n, low, high)
+        assert np.isclose(actual[key][3], mean)
+
+
+def test_compute_rollups_matches_brute_force():
+    store = make_store()
+    rollups = compute_rollups(store)
+    assert_level(rollups['1s'], brute_force(store, SECOND))
+    assert_level(rollups['1min'], brute_force(store, 60 * SECOND))
+    assert rollups['1s']['count'].sum() == len(store)
+
+
+def test_compute_rollups_empty():
+    rollups = compute_rollups(SampleStore())
+    assert all(len(level['t_ns']) == 0 for level in rollups.values())
+
+
+def test_rollup_file_round_trip(tmp_path):
+    store = make_store()
+    rollups = compute_rollups(store)
+    path = os.path.join(tmp_path, 'a.qsr')
+    RollupFile.write(path, rollups, store.scale, {'port': 'COM3'})
+    assert not os.path.exists(path + '.tmp')
+
+    rollup = RollupFile(path)
+    assert rollup.scale == store.scale
+    assert rollup.metadata == {'port': 'COM3'}
+    for name, level in rollups.items():
+        for field, column in level.items():
+            assert np.array_equal(rollup.levels[name][field], column)
+
+    trend = rollup.to_store('1min')
+    assert trend.readonly
+    assert len(trend) == len(rollups['1min']['t_ns'])
+    assert np.array_equal(trend.column('raw'), np.round(rollups['1min']['mean']).astype(np.int32))
+
+
+def make_job(tmp_path, **options):
+    return RetentionJob(30, catalog_path=os.path.join(tmp_path, 'catalog.db'),
+                        recording_db=os.path.join(tmp_path, 'recordings.db'),
+                        sessions_dir=str(tmp_path), max_workers=1, **options)
+
+
+def add_session(tmp_path, name, store):
+    path = os.path.join(tmp_path, name + '.qsf')
+    SessionFile.write(path, store, {'port': 'COM1'})
+    catalog = SessionCatalog(os.path.join(tmp_path, 'catalog.db'))
+    try:
+        catalog.add_file(path)
+    finally:
+        catalog.close()
+    return path
+
+
+def catalog_entries(tmp_path):
+    catalog = SessionCatalog(os.path.join(tmp_path, 'catalog.db'))
+    try:
+        return catalog.query()
+    finally:
+        catalog.close()
+
+
+def test_run_compacts_sessions_and_reports_bytes(tmp_path):
+    path = add_session(tmp_path, 'old', make_store())
+    size = os.path.getsize(path)
+
+    report = make_job(tmp_path).run()
+
+    rollup_path = os.path.join(tmp_path, 'old.qsr')
+    assert report['sessions'] == 1 and not report['errors']
+    assert not os.path.exists(path)
+    assert report['reclaimed_bytes'] == size - os.path.getsize(rollup_path)
+    entry, = catalog_entries(tmp_path)
+    assert entry['compacted'] == 1 and entry['path'] == os.path.abspath(rollup_path)
+
+    # 再次运行不做任何事
+    assert make_job(tmp_path).run() == {'sessions': 0, 'reclaimed_bytes': 0, 'errors': []}
+
+
+def test_run_resumes_after_catalog_update(tmp_path):
+    """上次中断在“已更新目录、未删除会话文件”时补删会话文件"""
+    path = add_session(tmp_path, 'old', make_store())
+    size = os.path.getsize(path)
+    rollup_path, rollup_size = RetentionJob.compact_session(path)
+    catalog = SessionCatalog(os.path.join(tmp_path, 'catalog.db'))
+    try:
+        catalog.update(path, path=os.path.abspath(rollup_path), size_bytes=rollup_size, compacted=1)
+    finally:
+        catalog.close()
+
+    report = make_job(tmp_path).run()
+    assert report['sessions'] == 0
+    assert report['reclaimed_bytes'] == size
+    assert not os.path.exists(path) and os.path.exists(rollup_path)
+
+
+def test_run_resumes_after_rollup_written(tmp_path):
+    """上次中断在“已写汇总文件、未更新目录”时重新压缩"""
+    path = add_session(tmp_path, 'old', make_store())
+    RetentionJob.compact_session(path)
+
+    report = make_job(tmp_path).run()
+    assert report['sessions'] == 1
+    assert not os.path.exists(path)
+    assert catalog_entries(tmp_path)[0]['compacted'] == 1
+
+
+def record(tmp_path, store):
+    recorder = SqliteRecorder(os.path.join(tmp_path, 'recordings.db'), {'port': 'COM2', 'slave_ids': [1, 2]},
+                              scale=store.scale, commit_interval=60)
+    for chunk in store.iter_chunks():
+        for t_ns, raw, channel in zip(chunk['t_ns'].tolist(), chunk['raw'].tolist(), chunk['channel'].tolist()):
+            recorder.append(t_ns, raw, channel)
+    recorder.close()
+    return recorder.table_name
+
+
+def tables(tmp_path):
+    conn = sqlite3.connect(os.path.join(tmp_path, 'recordings.db'))
+    try:
+        return [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE name LIKE 'samples_%'")]
+    finally:
+        conn.close()
+
+
+def test_recording_db_without_session_file_is_rolled_up(tmp_path):
+    store = make_store()
+    table_name = record(tmp_path, store)
+
+    report = make_job(tmp_path).run()
+
+    assert tables(tmp_path) == []
+    rollup_path = os.path.join(tmp_path, f'recording_{table_name}.qsr')
+    entry, = catalog_entries(tmp_path)
+    assert entry['path'] == os.path.abspath(rollup_path)
+    assert entry['compacted'] == 1
+    assert entry['sample_count'] == len(store)
+    assert entry['port'] == 'COM2'
+    assert report['reclaimed_bytes'] > 0
+    assert_level(RollupFile(rollup_path).levels['1s'], brute_force(store, SECOND))
+
+
+def test_recording_db_covered_by_session_file_is_dropped(tmp_path):
+    store = make_store()
+    record(tmp_path, store)
+    add_session(tmp_path, 'old', store)
+    job = make_job(tmp_path)
+    job.running = True
+
+    job.compact_recording_db(T0 + 3600 * SECOND)
+
+    assert tables(tmp_path) == []
+    assert [entry['name'] for entry in catalog_entries(tmp_path)] == ['old']
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.qsr')] == []
+
+
+def test_recording_db_resumes_after_rollup_registered(tmp_path):
+    """上次中断在“已登记汇总、未删除样本表”时只删除样本表，不重复生成"""
+    store = make_store()
+    table_name = record(tmp_path, store)
+    job = make_job(tmp_path)
+    conn = sqlite3.connect(os.path.join(tmp_path, 'recordings.db'))
+    catalog = SessionCatalog(os.path.join(tmp_path, 'catalog.db'))
+    try:
+        job.rollup_table(conn, catalog, table_name, store.scale, {})
+    finally:
+        catalog.close()
+        conn.close()
+    rollup_path = os.path.join(tmp_path, f'recording_{table_name}.qsr')
+    written = os.path.getmtime(rollup_path)
+
+    job.running = True
+    job.compact_recording_db(T0 + 3600 * SECOND)
+
+    assert tables(tmp_path) == []
+    assert os.path.getmtime(rollup_path) == written
+    assert len(catalog_entries(tmp_path)) == 1
+
+
+def test_recent_recording_is_kept(tmp_path):
+    record(tmp_path, make_store())
+    job = make_job(tmp_path)
+    job.running = True
+    assert job.compact_recording_db(T0) == 0
+    assert len(tables(tmp_path)) == 1
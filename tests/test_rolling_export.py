@@ -0,0 +1,159 @@
+import csv
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from models.rolling_export import RollingExporter
+
+SECOND = 10 ** 9
+
+
+@pytest.fixture
+def local_timezone(monkeypatch):
+    """切换本地时区（非整点偏移，可以区分按本地时间和按 UTC 对齐）"""
+    def set_timezone(name):
+        monkeypatch.setenv('TZ', name)
+        time.tzset()
+    yield set_timezone
+    monkeypatch.undo()
+    time.tzset()
+
+
+def local_ns(*fields):
+    return int(time.mktime(datetime(*fields).timetuple())) * SECOND
+
+
+def append_all(exporter, t_ns, channel=1):
+    for i, t in enumerate(t_ns):
+        exporter.append(int(t), i, channel)
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        rows = list(csv.reader(f))
+    return rows[0], rows[1:]
+
+
+@pytest.mark.parametrize('zone, rotate_seconds, boundary', [
+    ('Asia/Kolkata', 86400, (2024, 3, 2)),  # UTC+5:30，每天本地零点
+    ('Asia/Kathmandu', 3600, (2024, 3, 1, 23)),  # UTC+5:45，每小时本地整点
+])
+def test_time_rotation_splits_batch_at_local_boundary(tmp_path, local_timezone, zone, rotate_seconds, boundary):
+    local_timezone(zone)
+    boundary_ns = local_ns(*boundary)
+    # 同一批样本跨越分段边界，其中一个恰好落在边界上
+    t_ns = boundary_ns + np.arange(-30, 30) * SECOND // 2
+    exporter = RollingExporter(str(tmp_path), 'csv', rotate_seconds=rotate_seconds, commit_interval=60)
+    append_all(exporter, t_ns)
+    exporter.close()
+
+    assert exporter.error is None and exporter.sample_count == len(t_ns)
+    first, second = exporter.segments
+    assert os.path.basename(first) == datetime.fromtimestamp(t_ns[0] / 1e9).strftime('千分表数据_%Y%m%d_%H%M%S.csv')
+    assert os.path.basename(second) == datetime(*boundary).strftime('千分表数据_%Y%m%d_%H%M%S.csv')
+
+    header, rows = read_csv(first)
+    assert header == ['时间', '数值(mm)', '从站']
+    assert len(rows) == 30
+    _, rows = read_csv(second)
+    assert len(rows) == 30
+    assert rows[0][0] == datetime(*boundary).strftime('%Y-%m-%d %H:%M:%S.000')
+
+
+def test_time_rotation_across_batches(tmp_path, local_timezone):
+    local_timezone('Asia/Kolkata')
+    start_ns = local_ns(2024, 3, 1, 10, 59, 50)
+    exporter = RollingExporter(str(tmp_path), 'csv', rotate_seconds=3600, commit_interval=60)
+    append_all(exporter, start_ns + np.arange(5) * SECOND)
+    exporter._commit()
+    # 下一批从边界之后开始：关闭上一个分段，不拆分这一批
+    append_all(exporter, start_ns + np.arange(20, 30) * SECOND)
+    exporter._commit()
+    append_all(exporter, start_ns + np.arange(40, 45) * SECOND)
+    exporter.close()
+
+    assert [os.path.basename(path) for path in exporter.segments] == [
+        '千分表数据_20240301_105950.csv', '千分表数据_20240301_110010.csv']
+    assert [len(read_csv(path)[1]) for path in exporter.segments] == [5, 15]
+
+
+def test_size_rotation(tmp_path):
+    start_ns = 1_700_000_000 * SECOND
+    exporter = RollingExporter(str(tmp_path), 'csv', rotate_seconds=None, rotate_bytes=2000, commit_interval=60)
+    batches = []
+    for batch in range(6):
+        t_ns = start_ns + (batch * 100 + np.arange(40)) * SECOND
+        append_all(exporter, t_ns)
+        exporter._commit()
+        batches.append(t_ns)
+    exporter.close()
+
+    # 每批 40 行约 1.4KB：第二批写入后超过上限，第三批写入新文件；一批不会被大小分段拆开
+    assert len(exporter.segments) == 3
+    for path, t_ns in zip(exporter.segments, batches[::2]):
+        assert os.path.basename(path) == datetime.fromtimestamp(t_ns[0] / 1e9).strftime('千分表数据_%Y%m%d_%H%M%S.csv')
+        assert len(read_csv(path)[1]) == 80
+        assert os.path.getsize(path) >= 2000
+
+
+def test_size_rotation_below_limit_keeps_file(tmp_path):
+    exporter = RollingExporter(str(tmp_path), 'csv', rotate_seconds=None, rotate_bytes=10 ** 6, commit_interval=60)
+    for batch in range(5):
+        append_all(exporter, 1_700_000_000 * SECOND + (batch * 10 + np.arange(10)) * SECOND)
+        exporter._commit()
+    exporter.close()
+    assert len(exporter.segments) == 1
+    assert len(read_csv(exporter.segments[0])[1]) == 50
+
+
+def test_filename_collision(tmp_path):
+    t0 = 1_700_000_000 * SECOND
+    stamp = datetime.fromtimestamp(t0 / 1e9).strftime('%Y%m%d_%H%M%S')
+    existing = os.path.join(tmp_path, f'千分表数据_{stamp}.csv')
+    with open(existing, 'w') as f:
+        f.write('keep')
+
+    # 按大小分段，同一秒内开始的多个分段
+    exporter = RollingExporter(str(tmp_path), 'csv', rotate_seconds=None, rotate_bytes=1, commit_interval=60)
+    for i in range(3):
+        exporter.append(t0 + i * 1000, i, 1)
+        exporter._commit()
+    exporter.close()
+
+    assert [os.path.basename(path) for path in exporter.segments] == [
+        f'千分表数据_{stamp}_2.csv', f'千分表数据_{stamp}_3.csv', f'千分表数据_{stamp}_4.csv']
+    with open(existing) as f:
+        assert f.read() == 'keep'
+
+
+def test_sqlite_segments(tmp_path, local_timezone):
+    local_timezone('Asia/Kolkata')
+    boundary_ns = local_ns(2024, 3, 1, 12)
+    t_ns = boundary_ns + np.arange(-10, 10) * SECOND
+    exporter = RollingExporter(str(tmp_path), 'sqlite', rotate_seconds=3600, metadata={'port': 'COM3'},
+                               commit_interval=60)
+    append_all(exporter, t_ns, channel=2)
+    exporter.close()
+
+    assert len(exporter.segments) == 2
+    for path, expected in zip(exporter.segments, (t_ns[:10], t_ns[10:])):
+        assert not os.path.exists(path + '-wal')
+        conn = sqlite3.connect(path)
+        try:
+            start, end, count = conn.execute('SELECT start_ns, end_ns, sample_count FROM sessions').fetchone()
+            stored = [row[0] for row in conn.execute('SELECT t_ns FROM gauge_data ORDER BY t_ns')]
+            slaves = {row[0] for row in conn.execute('SELECT slave_id FROM gauge_data')}
+        finally:
+            conn.close()
+        assert (start, end, count) == (expected[0], expected[-1], 10)
+        assert stored == expected.tolist()
+        assert slaves == {2}
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(Exception):
+        RollingExporter(str(tmp_path), 'xlsx')
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from models.rolling_stats import RollingWindowStats
+
+
+def make_series(n=3000, offset=0.0, seed=2):
+    """不等间隔采样（含偶尔的长间隔），数值带趋势和噪声"""
+    rng = np.random.default_rng(seed)
+    steps = rng.uniform(0.01, 0.03, n)
+    steps[rng.integers(0, n, 5)] = 2.5
+    times = 1_700_000_000.0 + np.cumsum(steps)
+    values = offset + np.sin(np.arange(n) / 200) + rng.normal(0, 0.01, n)
+    return times, values
+
+
+def brute_force(times, values, window):
+    result = np.empty((len(times), 4))
+    for i, t in enumerate(times):
+        inside = values[(times >= t - window) & (times <= t)]
+        result[i] = inside.mean(), inside.std(), inside.min(), inside.max()
+    return result
+
+
+@pytest.mark.parametrize('window', [0.001, 0.5, 5.0, 60.0])
+@pytest.mark.parametrize('offset', [0.0, 12345.678])
+def test_matches_brute_force(window, offset):
+    times, values = make_series(offset=offset)
+    stats = RollingWindowStats(window)
+    result = np.array([stats.update(t, v) for t, v in zip(times, values)])
+    expected = brute_force(times, values, window)
+
+    np.testing.assert_allclose(result[:, 0], expected[:, 0], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(result[:, 1], expected[:, 1], rtol=0, atol=1e-7)
+    assert np.array_equal(result[:, 2], expected[:, 2])
+    assert np.array_equal(result[:, 3], expected[:, 3])
+    assert len(stats) == ((times >= times[-1] - window) & (times <= times[-1])).sum()
+
+
+def test_reset_and_empty():
+    stats = RollingWindowStats(1.0)
+    assert all(np.isnan(stats.current()))
+    stats.update(0.0, 5.0)
+    stats.update(0.5, 7.0)
+    assert stats.current() == (6.0, 1.0, 5.0, 7.0)
+    # 1.5 秒时 0.0 的样本移出窗口
+    assert stats.update(1.5, 3.0) == (5.0, 2.0, 3.0, 7.0)
+
+    stats.reset()
+    assert len(stats) == 0 and all(np.isnan(stats.current()))
+    assert stats.update(10.0, -1.0) == (-1.0, 0.0, -1.0, -1.0)
+
+
+def test_equal_values_and_duplicate_timestamps():
+    stats = RollingWindowStats(1.0)
+    for t in (0.0, 0.0, 0.2, 0.2, 0.4):
+        mean, std, low, high = stats.update(t, 0.123)
+    assert (low, high) == (0.123, 0.123)
+    assert np.isclose(mean, 0.123) and std == 0.0
+    assert len(stats) == 5
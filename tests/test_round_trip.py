@@ -0,0 +1,125 @@
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+from models.exporters import CsvExporter, ExcelExporter, SqliteExporter, NpzExporter
+from models.importers import CsvImporter, ExcelImporter, SqliteImporter, NpzImporter, OPENPYXL_AVAILABLE
+from models.sample_store import SampleStore
+
+T0 = 1_700_000_000_000_000_000
+N = 5000
+
+needs_openpyxl = pytest.mark.skipif(not OPENPYXL_AVAILABLE, reason="需要 openpyxl")
+
+
+def make_store(scale=1000.0, chunk_size=512, **options):
+    """两个从站交替、时间戳为整毫秒（文本格式只保存到毫秒）、数值含负数和边界附近的值"""
+    rng = np.random.default_rng(2)
+    t_ns = T0 + np.cumsum(rng.integers(1, 20, N)) * 1_000_000
+    raw = rng.integers(-2_000_000, 2_000_000, N).astype(np.int32)
+    raw[:3] = [0, -1, 1999999]
+    channel = (np.arange(N) % 2 + 1).astype(np.int16)
+    store = SampleStore(scale, chunk_size=chunk_size, **options)
+    store.extend(t_ns, raw, channel)
+    return store
+
+
+def assert_same_samples(loaded, store):
+    assert len(loaded) == len(store)
+    for name in ('t_ns', 'raw', 'channel'):
+        assert np.array_equal(loaded.column(name), store.column(name)), name
+
+
+@pytest.mark.parametrize('exporter, importer', [
+    (CsvExporter, CsvImporter),
+    pytest.param(ExcelExporter, ExcelImporter, marks=needs_openpyxl),
+    (SqliteExporter, SqliteImporter),
+    (NpzExporter, NpzImporter),
+])
+def test_export_import_round_trip(tmp_path, exporter, importer):
+    store = make_store()
+    path = os.path.join(tmp_path, 'data' + exporter.SUFFIX)
+    progress = []
+    count = exporter.export(store, path, lambda done, total: progress.append((done, total)))
+    assert count == len(store)
+    assert progress and progress[-1] == (len(store), len(store))
+
+    loaded = importer.load(path)
+    assert_same_samples(loaded, store)
+    assert loaded.readonly
+
+
+@needs_openpyxl
+def test_excel_round_trip_across_sheets(tmp_path):
+    store = make_store()
+    path = os.path.join(tmp_path, 'sheets.xlsx')
+    ExcelExporter.export(store, path, max_rows=1000)
+    assert_same_samples(ExcelImporter.load(path), store)
+
+
+def test_sqlite_append_sessions(tmp_path):
+    store = make_store()
+    path = os.path.join(tmp_path, 'sessions.db')
+    SqliteExporter.export(store, path, name='a')
+    SqliteExporter.export(store, path, append=True, name='b')
+    sessions = SqliteImporter.sessions(path)
+    assert [name for _, name, _ in sessions] == ['a', 'b']
+    assert_same_samples(SqliteImporter.load(path, session_id=sessions[1][0]), store)
+
+
+def test_npz_metadata_and_scale(tmp_path):
+    store = make_store(scale=100.0)
+    path = os.path.join(tmp_path, 'meta.npz')
+    NpzExporter.export(store, path, metadata={'port': 'COM3', 'slave_ids': [1, 2]})
+    loaded = NpzImporter.load(path)
+    assert loaded.scale == 100.0
+    assert_same_samples(loaded, store)
+    assert NpzImporter.metadata(path)['slave_ids'] == [1, 2]
+
+
+def test_round_trip_from_spilled_store(tmp_path):
+    store = make_store(memory_budget=0, spill_dir=str(tmp_path))
+    assert store.spilled_chunks() > 0
+    reference = make_store()
+    path = os.path.join(tmp_path, 'spilled.npz')
+    NpzExporter.export(store, path)
+    assert_same_samples(NpzImporter.load(path), reference)
+    store.close()
+
+
+def test_sqlite_append_to_legacy_database(tmp_path):
+    """追加到旧版本导出的数据库（只有 timestamp / value 列）"""
+    path = os.path.join(tmp_path, 'legacy.db')
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE gauge_data (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        timestamp TEXT NOT NULL,
+                        value REAL NOT NULL,
+                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )''')
+    conn.executemany('INSERT INTO gauge_data (timestamp, value) VALUES (?, ?)',
+                     [('2024-01-01 00:00:00.000', 1.5), ('2024-01-01 00:00:01.000', -2.0)])
+    conn.execute("CREATE VIEW data_statistics AS SELECT COUNT(*) as total_records FROM gauge_data")
+    conn.commit()
+    conn.close()
+
+    store = make_store()
+    assert SqliteExporter.export(store, path, append=True, name='new') == len(store)
+
+    conn = sqlite3.connect(path)
+    try:
+        legacy = conn.execute('SELECT slave_id, t_ns, session_id FROM gauge_data WHERE id <= 2').fetchall()
+        total = conn.execute('SELECT total_records FROM data_statistics').fetchone()[0]
+    finally:
+        conn.close()
+    assert legacy == [(1, None, None), (1, None, None)]
+    assert total == len(store) + 2
+
+    (session_id, name, count), = SqliteImporter.sessions(path)
+    assert (name, count) == ('new', len(store))
+    assert_same_samples(SqliteImporter.load(path, session_id=session_id), store)
+    everything = SqliteImporter.load(path)
+    assert len(everything) == len(store) + 2
+    assert np.allclose(everything.values()[:2], [1.5, -2.0])
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from models.sample_codec import SampleCodec, zigzag_decode, zigzag_encode, varint_decode, varint_encode
+
+COLUMNS = ('t_ns', 'raw', 'channel', 'flags')
+N = 65536
+T0 = 1_700_000_000_000_000_000
+
+
+def make_cases():
+    """往返校验用例：(时间戳, 原始计数, 从站, 标志)"""
+    rng = np.random.default_rng(0)
+    jittered = T0 + np.cumsum(rng.normal(10_000_000, 200_000, N).astype(np.int64))
+    channel = (np.arange(N) % 3 + 1).astype(np.int16)
+    drift = np.cumsum(rng.integers(-2, 3, N))
+    raw = (drift + channel * 1000).astype(np.int32)
+    flags = np.zeros(N, dtype=np.uint8)
+    regular = T0 + np.arange(N, dtype=np.int64) * 10_000_000
+
+    return {
+        'regular': (regular, drift.astype(np.int32), np.ones(N, dtype=np.int16), flags),
+        'jittered': (jittered, raw, channel, flags),
+        'single': (jittered[:1], raw[:1], channel[:1], flags[:1]),
+        'empty': (jittered[:0], raw[:0], channel[:0], flags[:0]),
+        'extreme': (np.array([np.iinfo(np.int64).min, 0, np.iinfo(np.int64).max], dtype=np.int64),
+                    np.array([np.iinfo(np.int32).min, np.iinfo(np.int32).max, 0], dtype=np.int32),
+                    np.array([1, 247, 1], dtype=np.int16),
+                    np.array([0, 1, 255], dtype=np.uint8)),
+        'random_channels': (jittered,
+                            rng.integers(np.iinfo(np.int32).min, np.iinfo(np.int32).max, N).astype(np.int32),
+                            rng.integers(1, 248, N).astype(np.int16),
+                            rng.integers(0, 256, N).astype(np.uint8)),
+    }
+
+
+CASES = make_cases()
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_round_trip_exact(name):
+    columns = CASES[name]
+    decoded = SampleCodec.decode(SampleCodec.encode(*columns))
+    for key, original in zip(COLUMNS, columns):
+        assert decoded[key].dtype == original.dtype, key
+        assert np.array_equal(decoded[key], original), key
+
+
+@pytest.mark.parametrize('level', [0, 1, 9])
+def test_round_trip_compression_levels(level):
+    columns = CASES['jittered']
+    decoded = SampleCodec.decode(SampleCodec.encode(*columns, level=level))
+    for key, original in zip(COLUMNS, columns):
+        assert np.array_equal(decoded[key], original), key
+
+
+def test_regular_signal_compresses():
+    columns = CASES['regular']
+    assert len(SampleCodec.encode(*columns)) < N * 2
+
+
+def test_zigzag_round_trip():
+    values = np.array([0, -1, 1, -2, 2, np.iinfo(np.int64).min, np.iinfo(np.int64).max], dtype=np.int64)
+    assert np.array_equal(zigzag_decode(zigzag_encode(values)), values)
+
+
+def test_varint_round_trip():
+    values = np.array([0, 1, 127, 128, 16383, 16384, 2 ** 63, 2 ** 64 - 1], dtype=np.uint64)
+    assert np.array_equal(varint_decode(varint_encode(values), len(values)), values)
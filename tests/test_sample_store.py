@@ -0,0 +1,112 @@
+import os
+
+import numpy as np
+import pytest
+
+from models.sample_store import SampleStore, SampleSlice
+
+T0 = 1_700_000_000_000_000_000
+CHUNK = 256
+
+
+def make_columns(n=10_000, seed=3, duplicates=False):
+    rng = np.random.default_rng(seed)
+    steps = rng.integers(0, 3, n) if duplicates else rng.integers(1, 1000, n)
+    t_ns = T0 + np.cumsum(steps).astype(np.int64) * 1000
+    raw = rng.integers(-10 ** 6, 10 ** 6, n).astype(np.int32)
+    channel = rng.integers(1, 4, n).astype(np.int16)
+    return t_ns, raw, channel
+
+
+def fill(store, t_ns, raw, channel):
+    """前一半逐个追加，后一半分批追加（批大小不与分块对齐）"""
+    half = len(t_ns) // 2
+    for i in range(half):
+        store.append(int(t_ns[i]), int(raw[i]), int(channel[i]))
+    for begin in range(half, len(t_ns), 777):
+        end = begin + 777
+        store.extend(t_ns[begin:end], raw[begin:end], channel[begin:end])
+    return store
+
+
+def spilled_store(tmp_path, columns):
+    store = SampleStore(chunk_size=CHUNK, spill_dir=str(tmp_path))
+    store.set_memory_budget(4 * store.chunk_bytes)
+    return fill(store, *columns)
+
+
+def test_spill_keeps_data(tmp_path):
+    t_ns, raw, channel = columns = make_columns()
+    store = spilled_store(tmp_path, columns)
+
+    assert store.spilled_chunks() > 0
+    assert store.memory_usage() <= store.memory_budget + store.chunk_bytes
+    assert np.array_equal(store.column('t_ns'), t_ns)
+    assert np.array_equal(store.column('raw'), raw)
+    assert np.array_equal(store.column('channel'), channel)
+    assert np.array_equal(store.column('raw', 1000, 5000), raw[1000:5000])
+    for index in (0, CHUNK - 1, CHUNK, 5555, len(t_ns) - 1):
+        assert store.row(index) == (t_ns[index], raw[index], channel[index], 0)
+    assert store.time_range() == (t_ns[0], t_ns[-1])
+    assert store.channels() == [1, 2, 3]
+
+    spill_files = os.listdir(tmp_path)
+    assert spill_files
+    store.close()
+    assert len(store) == 0
+    assert not any(os.path.exists(os.path.join(tmp_path, name)) for name in spill_files)
+
+
+@pytest.mark.parametrize('duplicates', [False, True])
+def test_index_range_matches_searchsorted(tmp_path, duplicates):
+    columns = make_columns(duplicates=duplicates)
+    t_ns = columns[0]
+    store = spilled_store(tmp_path, columns)
+    assert store.is_sorted
+
+    rng = np.random.default_rng(4)
+    bounds = list(rng.integers(t_ns[0] - 10 ** 6, t_ns[-1] + 10 ** 6, 200))
+    bounds += [t_ns[0], t_ns[-1], t_ns[CHUNK], t_ns[CHUNK] + 1, t_ns[-1] + 1, t_ns[0] - 1]
+    for start_ns in bounds + [None]:
+        for end_ns in bounds[:20] + [None]:
+            start = 0 if start_ns is None else np.searchsorted(t_ns, start_ns, side='left')
+            stop = len(t_ns) if end_ns is None else np.searchsorted(t_ns, end_ns, side='left')
+            assert store.index_range(start_ns, end_ns) == (start, max(start, stop))
+    store.close()
+
+
+def test_index_range_unsorted(tmp_path):
+    t_ns, raw, channel = make_columns()
+    t_ns = t_ns.copy()
+    t_ns[3000], t_ns[7000] = t_ns[7000], t_ns[3000]
+    store = spilled_store(tmp_path, (t_ns, raw, channel))
+    assert not store.is_sorted
+
+    start_ns, end_ns = int(t_ns[6990]), int(t_ns[7010])
+    inside = np.flatnonzero((t_ns >= start_ns) & (t_ns < end_ns))
+    assert store.index_range(start_ns, end_ns) == (inside[0], inside[-1] + 1)
+    assert store.index_range(t_ns[-1] + 1, None) == (0, 0)
+
+    subset = SampleSlice(store, start_ns, end_ns)
+    assert np.array_equal(subset.column('t_ns'), t_ns[inside])
+    store.close()
+
+
+def test_slice_matches_mask(tmp_path):
+    t_ns, raw, channel = columns = make_columns()
+    store = spilled_store(tmp_path, columns)
+    start_ns, end_ns = int(t_ns[1234]) + 1, int(t_ns[8765])
+    mask = (t_ns >= start_ns) & (t_ns < end_ns) & np.isin(channel, [1, 3])
+
+    subset = SampleSlice(store, start_ns, end_ns, channels=[1, 3])
+    assert len(subset) == mask.sum()
+    assert np.array_equal(subset.column('t_ns'), t_ns[mask])
+    assert np.array_equal(subset.column('raw', 10, 500), raw[mask][10:500])
+    assert subset.row(7) == (t_ns[mask][7], raw[mask][7], channel[mask][7], 0)
+    assert subset.channels() == [1, 3]
+    assert subset.time_range() == (t_ns[mask][0], t_ns[mask][-1])
+
+    everything = SampleSlice(store, start_ns, end_ns, channels=[1, 2, 3])
+    assert not everything.filtered
+    assert np.array_equal(everything.column('raw'), raw[(t_ns >= start_ns) & (t_ns < end_ns)])
+    store.close()
@@ -0,0 +1,154 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from models.recording_log import RecordingLog
+from models.sample_store import FLAG_RECOVERED, SampleStore
+from models.session_catalog import SessionCatalog, summarize
+from models.session_file import SessionFile
+
+T0 = 1_700_000_000_000_000_000
+HOUR = 3600 * 10 ** 9
+
+
+def make_store(start_ns, channels, n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    store = SampleStore(1000.0, chunk_size=1024)
+    store.extend(start_ns + np.arange(n, dtype=np.int64) * 1_000_000,
+                 rng.integers(-50_000, 50_000, n).astype(np.int32),
+                 np.resize(np.array(channels, dtype=np.int16), n))
+    return store
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = SessionCatalog(os.path.join(tmp_path, 'catalog.db'))
+    yield catalog
+    catalog.close()
+
+
+def add_session(catalog, tmp_path, name, start_ns, channels, port='COM1', seed=0):
+    path = os.path.join(tmp_path, name + '.qsf')
+    store = make_store(start_ns, channels, seed=seed)
+    SessionFile.write(path, store, {'port': port, 'baudrate': 9600, 'slave_ids': channels})
+    return catalog.add_file(path), store
+
+
+def test_add_file_summary(catalog, tmp_path):
+    entry, store = add_session(catalog, tmp_path, 'a', T0, [1, 12])
+    values = store.values()
+    channel = store.column('channel')
+
+    row, = catalog.query()
+    assert row['path'] == entry['path'] == os.path.abspath(os.path.join(tmp_path, 'a.qsf'))
+    assert (row['port'], row['baudrate'], row['slave_ids']) == ('COM1', 9600, '1,12')
+    assert (row['start_ns'], row['end_ns'], row['sample_count']) == (T0, store.column('t_ns')[-1], len(store))
+    assert np.isclose(row['min'], values.min()) and np.isclose(row['max'], values.max())
+    assert np.isclose(row['mean'], values.mean()) and np.isclose(row['std'], values.std())
+    assert row['compacted'] == 0
+    stats = json.loads(row['channel_stats'])
+    assert np.isclose(stats['12']['mean'], values[channel == 12].mean())
+    assert summarize(store)['count'] == len(store)
+
+    # 重复登记只更新条目
+    catalog.add_file(entry['path'], {'port': 'COM9'})
+    row, = catalog.query()
+    assert row['port'] == 'COM9' and catalog.count() == 1
+
+
+def test_query_filters_and_order(catalog, tmp_path):
+    add_session(catalog, tmp_path, 'a', T0, [1, 12], 'COM1')
+    add_session(catalog, tmp_path, 'b', T0 + HOUR, [2], 'COM2', seed=1)
+    add_session(catalog, tmp_path, 'c', T0 + 2 * HOUR, [1, 2], 'COM3', seed=2)
+
+    def names(**kwargs):
+        return [row['name'] for row in catalog.query(**kwargs)]
+
+    assert names() == ['c', 'b', 'a']
+    assert names(descending=False, limit=2) == ['a', 'b']
+    assert names(order_by='port; DROP TABLE sessions', descending=False) == ['a', 'b', 'c']
+    assert names(text='COM2') == ['b']
+
+    # 从站地址精确匹配（1 不匹配 12）
+    assert names(channel=1) == ['c', 'a']
+    assert names(channel=12) == ['a']
+    assert names(channel=2, text='COM3') == ['c']
+    assert names(channel=7) == []
+
+    # 与时间范围有重叠的会话
+    assert names(start_ns=T0 + 10 ** 9, end_ns=T0 + HOUR + 1) == ['b', 'a']
+    assert names(start_ns=T0 + HOUR + 10 * 10 ** 9, end_ns=T0 + 2 * HOUR) == []
+    assert names(start_ns=T0 + 2 * HOUR) == ['c']
+    assert names(end_ns=T0) == []
+    assert names(before_ns=T0 + HOUR) == ['a']
+
+
+def test_finalize_recording(catalog, tmp_path):
+    log_path = os.path.join(tmp_path, 'rec.qlog')
+    log = RecordingLog(log_path, {'port': 'COM5', 'baudrate': 19200, 'slave_ids': [3], 'scale': 1000.0},
+                       sync_interval=60)
+    for i in range(1000):
+        log.append(T0 + i * 1_000_000, i, 3)
+    log.close()
+    assert SessionCatalog.pending_recordings(str(tmp_path)) == [log_path]
+
+    entry = catalog.finalize_recording(log_path, sessions_dir=str(tmp_path))
+
+    assert not os.path.exists(log_path)
+    assert SessionCatalog.pending_recordings(str(tmp_path)) == []
+    assert entry['path'] == os.path.abspath(os.path.join(tmp_path, 'rec.qsf'))
+    row, = catalog.query(channel=3)
+    assert (row['port'], row['sample_count'], row['end_ns']) == ('COM5', 1000, T0 + 999 * 1_000_000)
+    session = SessionFile(entry['path'])
+    try:
+        assert np.array_equal(session.column('raw'), np.arange(1000))
+        assert not session.column('flags').any()
+        assert 'recovered' not in session.metadata
+    finally:
+        session.close()
+
+    # 日志已被转换（例如另一个窗口）时不做任何事
+    assert catalog.finalize_recording(log_path, sessions_dir=str(tmp_path)) is None
+
+
+def test_finalize_recovered_recording(catalog, tmp_path):
+    log_path = os.path.join(tmp_path, 'rec.qlog')
+    log = RecordingLog(log_path, {'port': 'COM5'}, sync_interval=60)
+    log.append(T0, 1, 1)
+    log.close()
+
+    entry = catalog.finalize_recording(log_path, sessions_dir=str(tmp_path), recovered=True)
+
+    assert json.loads(entry['metadata'])['recovered'] is True
+    session = SessionFile(entry['path'])
+    try:
+        assert (session.column('flags') == FLAG_RECOVERED).all()
+    finally:
+        session.close()
+
+
+def test_rebuild(catalog, tmp_path):
+    a, _ = add_session(catalog, tmp_path, 'a', T0, [1])
+    b, _ = add_session(catalog, tmp_path, 'b', T0 + HOUR, [2])
+    # c 写入后未登记（例如目录数据库被删除后重建），d 是已压缩会话残留的 .qsf
+    SessionFile.write(os.path.join(tmp_path, 'c.qsf'), make_store(T0 + 2 * HOUR, [3]), {'port': 'COM3'})
+    d, _ = add_session(catalog, tmp_path, 'd', T0 + 3 * HOUR, [4])
+    rollup_path = os.path.join(tmp_path, 'd.qsr')
+    with open(rollup_path, 'wb') as f:
+        f.write(b'rollup')
+    catalog.update(d['path'], path=os.path.abspath(rollup_path), compacted=1)
+    os.remove(a['path'])
+
+    added, removed = catalog.rebuild(str(tmp_path))
+
+    assert removed == 1
+    assert [entry['name'] for entry in added] == ['c']
+    assert added[0]['port'] == 'COM3' and added[0]['slave_ids'] == '3'
+    assert sorted(row['name'] for row in catalog.query()) == ['b', 'c', 'd']
+    assert catalog.query(text='d')[0]['compacted'] == 1
+
+    # 再次执行没有变化
+    assert catalog.rebuild(str(tmp_path)) == ([], 0)
+    assert catalog.count() == 3
@@ -0,0 +1,149 @@
+import os
+
+import numpy as np
+import pytest
+
+from models.sample_store import FLAG_RECOVERED, SampleStore
+from models.session_file import HEADER, HEADER_SIZE, SESSION_VERSION, SessionFile
+
+T0 = 1_700_000_000_000_000_000
+
+
+def make_store(n=200_000, shuffled=False, seed=5):
+    """跨越多个 memmap 块、三个从站；shuffled 时时间戳局部乱序"""
+    rng = np.random.default_rng(seed)
+    t_ns = T0 + np.cumsum(rng.integers(1, 1000, n)).astype(np.int64) * 1000
+    if shuffled:
+        t_ns[1::50], t_ns[::50] = t_ns[::50].copy(), t_ns[1::50].copy()
+    raw = rng.integers(-10 ** 6, 10 ** 6, n).astype(np.int32)
+    channel = rng.integers(1, 4, n).astype(np.int16)
+    flags = np.where(np.arange(n) % 7 == 0, FLAG_RECOVERED, 0).astype(np.uint8)
+    store = SampleStore(2000.0, chunk_size=4096)
+    store.extend(t_ns, raw, channel, flags)
+    return store
+
+
+def write(tmp_path, store, metadata=None):
+    path = os.path.join(tmp_path, 'session.qsf')
+    assert SessionFile.write(path, store, metadata) == len(store)
+    assert not os.path.exists(path + '.tmp')
+    return path
+
+
+@pytest.mark.parametrize('shuffled', [False, True])
+def test_round_trip(tmp_path, shuffled):
+    store = make_store(shuffled=shuffled)
+    path = write(tmp_path, store, {'port': 'COM7', 'baudrate': 115200})
+
+    session = SessionFile(path)
+    try:
+        assert len(session) == len(store)
+        assert session.scale == store.scale
+        assert session.is_sorted == (not shuffled)
+        for name in ('t_ns', 'raw', 'channel', 'flags'):
+            assert np.array_equal(session.column(name), store.column(name))
+        assert np.array_equal(np.concatenate([chunk['raw'] for chunk in session.iter_chunks(1000, 150_000)]),
+                              store.column('raw', 1000, 150_000))
+        assert session.row(12345) == store.row(12345)
+        assert np.allclose(session.values(10, 20), store.values(10, 20))
+        assert session.metadata['port'] == 'COM7' and session.metadata['baudrate'] == 115200
+        assert session.channels() == [1, 2, 3]
+        t_ns = store.column('t_ns')
+        assert session.time_range() == (t_ns.min(), t_ns.max())
+
+        for start_ns, end_ns in ((None, None), (t_ns[1000], t_ns[90_000]), (t_ns[500] + 1, None),
+                                 (None, t_ns[0]), (t_ns.max() + 1, None)):
+            assert session.index_range(start_ns, end_ns) == store.index_range(start_ns, end_ns)
+    finally:
+        session.close()
+    assert len(session) == 0
+
+
+def test_index_range_bounds(tmp_path):
+    store = SampleStore()
+    store.extend(np.array([10, 20, 20, 30], dtype=np.int64), np.arange(4, dtype=np.int32))
+    session = SessionFile(write(tmp_path, store))
+    try:
+        assert session.index_range(20, 30) == (1, 3)  # 含起点、不含终点
+        assert session.index_range(21, 30) == (3, 3)
+        assert session.index_range(30, 10) == (3, 3)
+        assert session.index_range(None, 11) == (0, 1)
+    finally:
+        session.close()
+
+
+def test_empty_session(tmp_path):
+    session = SessionFile(write(tmp_path, SampleStore(), {'port': 'COM1'}))
+    assert len(session) == 0
+    assert session.time_range() is None
+    assert session.index_range() == (0, 0)
+    assert list(session.iter_chunks()) == []
+    session.close()
+
+
+def test_rewrite_from_session_file(tmp_path):
+    store = make_store(20_000)
+    session = SessionFile(write(tmp_path, store, {'port': 'COM2'}))
+    copy_path = os.path.join(tmp_path, 'copy.qsf')
+    try:
+        SessionFile.write(copy_path, session, session.metadata)
+    finally:
+        session.close()
+    copy = SessionFile(copy_path)
+    try:
+        assert np.array_equal(copy.column('t_ns'), store.column('t_ns'))
+        assert copy.metadata['port'] == 'COM2'
+    finally:
+        copy.close()
+
+
+def corrupt(path, offset, data):
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        f.write(data)
+
+
+def test_rejects_bad_magic(tmp_path):
+    path = write(tmp_path, make_store(1000))
+    corrupt(path, 0, b'XXXX')
+    with pytest.raises(Exception, match="格式错误"):
+        SessionFile(path)
+
+
+def test_rejects_newer_version(tmp_path):
+    path = write(tmp_path, make_store(1000))
+    corrupt(path, 4, (SESSION_VERSION + 1).to_bytes(2, 'little'))
+    with pytest.raises(Exception, match="版本"):
+        SessionFile(path)
+
+
+@pytest.mark.parametrize('size', [0, 3, HEADER.size, HEADER_SIZE, HEADER_SIZE + 1000])
+def test_rejects_truncated_file(tmp_path, size):
+    path = write(tmp_path, make_store(100_000))
+    with open(path, 'r+b') as f:
+        f.truncate(size)
+    with pytest.raises(Exception, match="会话文件"):
+        SessionFile(path)
+
+
+def test_rejects_corrupted_metadata(tmp_path):
+    path = write(tmp_path, make_store(1000), {'port': 'COM1'})
+    with open(path, 'rb') as f:
+        metadata_offset = HEADER.unpack(f.read(HEADER.size))[7]
+    corrupt(path, metadata_offset, b'\xff{')
+    with pytest.raises(Exception, match="格式错误"):
+        SessionFile(path)
+
+
+def test_interrupted_write_keeps_previous_file(tmp_path):
+    path = write(tmp_path, make_store(1000), {'port': 'COM1'})
+
+    def cancel(written, total):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        SessionFile.write(path, make_store(20_000), progress=cancel)
+    assert not os.path.exists(path + '.tmp')
+    session = SessionFile(path)
+    assert len(session) == 1000
+    session.close()
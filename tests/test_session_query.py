@@ -0,0 +1,132 @@
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+from models.session_query import SessionQuery
+from models.sqlite_recorder import SqliteRecorder
+
+T0 = 1_700_000_000_000_000_000
+N = 3000
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """两个从站交替，每 1 ms 一个样本"""
+    path = os.path.join(tmp_path, 'recordings.db')
+    rng = np.random.default_rng(6)
+    t_ns = T0 + np.arange(N, dtype=np.int64) * 1_000_000
+    raw = rng.integers(-10 ** 6, 10 ** 6, N)
+    channel = np.arange(N) % 2 + 1
+    recorder = SqliteRecorder(path, {'port': 'COM4', 'slave_ids': [1, 2]}, scale=1000.0, commit_interval=60)
+    for row in zip(t_ns.tolist(), raw.tolist(), channel.tolist()):
+        recorder.append(*row)
+    recorder.close()
+
+    query = SessionQuery(path)
+    yield query, recorder.session_id, t_ns, raw, channel
+    query.close()
+
+
+def test_sessions(recording):
+    query, session_id, t_ns, _, _ = recording
+    session, = query.sessions()
+    assert session['id'] == session_id
+    assert session['slave_ids'] == [1, 2]
+    assert session['metadata']['port'] == 'COM4'
+    assert (session['start_ns'], session['end_ns'], session['sample_count']) == (t_ns[0], t_ns[-1], N)
+    with pytest.raises(Exception):
+        query.session(session_id + 1)
+
+
+def test_fetch_range_and_channel(recording):
+    query, session_id, t_ns, raw, channel = recording
+    start_ns, end_ns = int(t_ns[100]), int(t_ns[200])
+
+    data = query.fetch(session_id, start_ns, end_ns)
+    assert np.array_equal(data['t_ns'], t_ns[100:200])  # 含起点、不含终点
+    assert np.array_equal(data['raw'], raw[100:200])
+    assert np.allclose(data['value'], raw[100:200] / 1000.0)
+
+    data = query.fetch(session_id, start_ns, end_ns, channel=2)
+    mask = (t_ns >= start_ns) & (t_ns < end_ns) & (channel == 2)
+    assert np.array_equal(data['t_ns'], t_ns[mask])
+    assert set(data['channel'].tolist()) == {2}
+
+    assert len(query.fetch(session_id)['t_ns']) == N
+
+
+def test_fetch_empty_range(recording):
+    query, session_id, t_ns, _, _ = recording
+    for start_ns, end_ns in ((t_ns[-1] + 1, None), (t_ns[10], t_ns[10]), (None, t_ns[0])):
+        data = query.fetch(session_id, start_ns, end_ns)
+        assert all(len(column) == 0 for column in data.values())
+        assert data['t_ns'].dtype == np.int64 and data['raw'].dtype == np.int32
+    assert len(query.fetch(session_id, channel=9)['t_ns']) == 0
+
+
+def test_aggregate_buckets(recording):
+    query, session_id, t_ns, raw, channel = recording
+    start_ns, end_ns, buckets = int(t_ns[0]) + 500_000, int(t_ns[-1]), 7
+    width = -(-(end_ns - start_ns) // buckets)
+
+    result = query.aggregate(session_id, start_ns, end_ns, buckets)
+
+    expected = {}
+    for t, r, c in zip(t_ns.tolist(), raw.tolist(), channel.tolist()):
+        if start_ns <= t < end_ns:
+            expected.setdefault((start_ns + (t - start_ns) // width * width, c), []).append(r)
+    keys = list(zip(result['t_ns'].tolist(), result['channel'].tolist()))
+    assert keys == sorted(expected)
+    assert keys[0][0] == start_ns
+    for i, key in enumerate(keys):
+        values = np.array(expected[key])
+        assert result['count'][i] == len(values)
+        assert result['min'][i] == values.min() / 1000.0
+        assert result['max'][i] == values.max() / 1000.0
+        assert np.isclose(result['mean'][i], values.mean() / 1000.0)
+    assert result['count'].sum() == ((t_ns >= start_ns) & (t_ns < end_ns)).sum()
+
+
+def test_aggregate_bucket_boundary(recording):
+    """恰好落在桶边界上的样本属于后一个桶"""
+    query, session_id, t_ns, _, _ = recording
+    result = query.aggregate(session_id, t_ns[0], t_ns[4], 2, channel=1)
+    # 桶宽 2 ms：t0 (从站1) -> 桶 0，t2 (从站1) -> 桶 1
+    assert result['t_ns'].tolist() == [t_ns[0], t_ns[2]]
+    assert result['count'].tolist() == [1, 1]
+
+
+def test_aggregate_empty_range(recording):
+    query, session_id, t_ns, _, _ = recording
+    result = query.aggregate(session_id, t_ns[-1] + 1, t_ns[-1] + 10 ** 9, 10)
+    assert all(len(column) == 0 for column in result.values())
+
+
+def test_summary(recording):
+    query, session_id, t_ns, raw, channel = recording
+    start_ns, end_ns = int(t_ns[10]), int(t_ns[2500])
+    summary = query.summary(session_id, start_ns, end_ns)
+    assert sorted(summary) == [1, 2]
+    for slave, stats in summary.items():
+        mask = (t_ns >= start_ns) & (t_ns < end_ns) & (channel == slave)
+        values = raw[mask] / 1000.0
+        assert stats['count'] == mask.sum()
+        assert (stats['start_ns'], stats['end_ns']) == (t_ns[mask][0], t_ns[mask][-1])
+        assert np.isclose(stats['min'], values.min()) and np.isclose(stats['max'], values.max())
+        assert np.isclose(stats['mean'], values.mean())
+        assert np.isclose(stats['std'], values.std(), rtol=1e-6)
+
+    assert list(query.summary(session_id, channel=2)) == [2]
+    assert query.summary(session_id, t_ns[-1] + 1) == {}
+
+
+def test_cleaned_session_raises(recording, tmp_path):
+    query, session_id, _, _, _ = recording
+    conn = sqlite3.connect(os.path.join(tmp_path, 'recordings.db'))
+    with conn:
+        conn.execute('UPDATE sessions SET table_name = NULL WHERE id = ?', (session_id,))
+    conn.close()
+    with pytest.raises(Exception, match="清理"):
+        query.fetch(session_id)
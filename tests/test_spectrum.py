@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from models.spectrum import SpectrumAnalyzer, WINDOW_FUNCTIONS
+
+SAMPLE_RATE = 50.0
+N = 1024
+
+
+def sine(frequency, amplitude=0.02, n=N, offset=1.5, noise=0.0):
+    t = np.arange(n) / SAMPLE_RATE
+    values = offset + amplitude * np.sin(2 * np.pi * frequency * t + 0.3)
+    if noise:
+        values = values + np.random.default_rng(4).normal(0, noise, n)
+    return values
+
+
+@pytest.mark.parametrize('window', list(WINDOW_FUNCTIONS))
+def test_on_bin_sine_peak(window):
+    frequency = 100 * SAMPLE_RATE / N  # 恰好落在第 100 个频点
+    freqs, spectrum = SpectrumAnalyzer.amplitude_spectrum(sine(frequency), SAMPLE_RATE, window)
+
+    assert len(freqs) == N // 2 + 1 and freqs[-1] == SAMPLE_RATE / 2
+    peak_frequency, peak = SpectrumAnalyzer.find_peak(freqs, spectrum)
+    assert peak_frequency == frequency
+    assert peak == pytest.approx(0.02, rel=1e-3)
+    assert spectrum[0] < 1e-9  # 去除了直流分量
+
+
+@pytest.mark.parametrize('window, tolerance', [("汉宁窗", 0.16), ("汉明窗", 0.19), ("布莱克曼窗", 0.12), ("矩形窗", 0.37)])
+def test_off_bin_sine_peak(window, tolerance):
+    """频率落在两个频点之间时，峰值频率误差不超过半个频点，幅值误差不超过窗函数的扇贝损失"""
+    frequency = 7.3
+    freqs, spectrum = SpectrumAnalyzer.amplitude_spectrum(sine(frequency), SAMPLE_RATE, window)
+    peak_frequency, peak = SpectrumAnalyzer.find_peak(freqs, spectrum)
+    assert abs(peak_frequency - frequency) <= SAMPLE_RATE / N / 2
+    assert 0.02 * (1 - tolerance) <= peak <= 0.02 * 1.001
+
+
+@pytest.mark.parametrize('window', list(WINDOW_FUNCTIONS))
+def test_welch_psd_power(window):
+    """PSD 积分等于正弦功率 A²/2，峰值在正弦频率处"""
+    values = sine(5.0, amplitude=0.02, n=8192, noise=0.0005)
+    freqs, psd = SpectrumAnalyzer.welch_psd(values, SAMPLE_RATE, segment_length=512, window=window)
+
+    assert len(freqs) == 257
+    peak_frequency, _ = SpectrumAnalyzer.find_peak(freqs, psd)
+    assert abs(peak_frequency - 5.0) <= SAMPLE_RATE / 512
+    power = psd.sum() * (freqs[1] - freqs[0])
+    assert power == pytest.approx(0.02 ** 2 / 2 + 0.0005 ** 2, rel=0.05)
+
+
+def test_welch_short_input_uses_single_segment():
+    values = sine(5.0, n=100)
+    freqs, psd = SpectrumAnalyzer.welch_psd(values, SAMPLE_RATE, segment_length=256)
+    assert len(freqs) == len(psd) == 51
+
+
+def test_sampling_and_resample():
+    rng = np.random.default_rng(0)
+    times = np.cumsum(rng.uniform(0.018, 0.022, 2000))
+    info = SpectrumAnalyzer.analyze_sampling(times)
+    assert info['sample_rate'] == pytest.approx(50.0, rel=0.01)
+    assert 0 < info['jitter'] < 0.002 and info['max_interval'] <= 0.022
+    assert SpectrumAnalyzer.analyze_sampling(times[:1]) is None
+    assert SpectrumAnalyzer.analyze_sampling(np.zeros(5)) is None
+
+    # 抖动采样插值到等间隔后，频谱峰值仍在原频率
+    values = 0.01 * np.sin(2 * np.pi * 3.0 * times)
+    uniform = SpectrumAnalyzer.resample_uniform(times, values, info['sample_rate'])
+    assert len(uniform) == int((times[-1] - times[0]) * info['sample_rate']) + 1
+    freqs, spectrum = SpectrumAnalyzer.amplitude_spectrum(uniform, info['sample_rate'])
+    peak_frequency, peak = SpectrumAnalyzer.find_peak(freqs, spectrum)
+    assert abs(peak_frequency - 3.0) <= info['sample_rate'] / len(uniform)
+    assert peak == pytest.approx(0.01, rel=0.2)
+    assert SpectrumAnalyzer.find_peak(freqs[:1], spectrum[:1]) is None
@@ -0,0 +1,32 @@
+import os
+import sqlite3
+
+from models.sqlite_recorder import SqliteRecorder
+
+
+def test_sample_count_excludes_duplicates(tmp_path):
+    path = os.path.join(tmp_path, 'recordings.db')
+    recorder = SqliteRecorder(path, {'slave_ids': [1, 2]}, commit_interval=60)
+    for i in range(100):
+        recorder.append(1000 + i, i, 1)
+    recorder._commit()
+    # 与上一批重叠 50 条，同一批内再重复 1 条
+    for i in range(50, 150):
+        recorder.append(1000 + i, -i, 1)
+    recorder.append(5000, 1, 2)
+    recorder.append(5000, 2, 2)
+    recorder.close()
+
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute(f'SELECT COUNT(*) FROM {recorder.table_name}').fetchone()[0]
+        count, closed = conn.execute('SELECT sample_count, closed FROM sessions WHERE id = ?',
+                                     (recorder.session_id,)).fetchone()
+        first = conn.execute(f'SELECT raw FROM {recorder.table_name} WHERE t_ns = 1060').fetchone()[0]
+    finally:
+        conn.close()
+
+    assert rows == 151
+    assert count == rows == recorder.sample_count
+    assert closed == 1
+    assert first == 60
@@ -1,22 +1,420 @@
 import sys
 from datetime import datetime, timedelta
-from collections import deque
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
+import numpy as np
 import pyqtgraph as pg
 
+from models.histogram import StreamingHistogram
+from models.rolling_stats import RollingWindowStats
+
+
+# 通道配色（按添加顺序循环使用）
+CHANNEL_COLORS = [
+    '#2E86AB', '#E4572E', '#76B041', '#9B5DE5',
+    '#F18F01', '#17BEBB', '#C73E1D', '#555555'
+]
+
+# 通道缓冲区的列：时间、数值，以及叠加分析的滑动均值、标准差、最小值、最大值
+COL_TIME, COL_VALUE, COL_MEAN, COL_STD, COL_MIN, COL_MAX = range(6)
+CHANNEL_COLUMNS = 6
+
+# 细节视图超出缓冲区时从会话存储读取：超过该行数时均匀读取若干段连续样本
+DETAIL_FETCH_ROWS = 1_000_000
+DETAIL_FETCH_BLOCK = 4096
+
+# 只读会话每帧扫描的行数（用于由整个会话构建概览包络）
+SCAN_ROWS_PER_FRAME = 1_000_000
+
+# 叠加分析窗口选项（秒）
+OVERLAY_WINDOWS = {
+    "10秒": 10,
+    "30秒": 30,
+    "1分钟": 60,
+    "5分钟": 300,
+    "10分钟": 600,
+}
+
+
+class ChannelBuffer:
+    """单通道环形缓冲区
+
+    每个样本同时写入 i 和 i + capacity 两个位置（双写镜像），
+    因此任意时刻都能直接取得按时间排序的连续视图，无需拷贝。
+    第 0 列为时间，第 1 列为数值，其余列用于叠加分析等附加数据。
+    """
+
+    def __init__(self, capacity, columns=2):
+        self.capacity = capacity
+        self.columns = columns
+        self._data = np.zeros((columns, capacity * 2))
+        self._head = 0  # 最早样本的位置
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, value, *extra):
+        """追加单个样本（extra 为附加列的值）"""
+        if self._count < self.capacity:
+            pos = (self._head + self._count) % self.capacity
+            self._count += 1
+        else:
+            # 缓冲区已满，覆盖最早的样本
+            pos = self._head
+            self._head = (self._head + 1) % self.capacity
+
+        row = (timestamp, value) + extra
+        self._data[:len(row), pos] = row
+        self._data[:len(row), pos + self.capacity] = row
+
+    def extend(self, timestamps, values, *extra):
+        """批量追加样本"""
+        rows = np.array([timestamps, values] + list(extra), dtype=float)[:, -self.capacity:]
+        n = rows.shape[1]
+        if n == 0:
+            return
+
+        pos = (self._head + self._count + np.arange(n)) % self.capacity
+        self._data[:len(rows), pos] = rows
+        self._data[:len(rows), pos + self.capacity] = rows
+
+        overflow = max(0, self._count + n - self.capacity)
+        self._head = (self._head + overflow) % self.capacity
+        self._count = min(self.capacity, self._count + n)
+
+    def view(self):
+        """返回按时间排序的 (时间, 数值) 连续视图"""
+        columns = self.view_columns()
+        return columns[0], columns[1]
+
+    def view_columns(self):
+        """返回按时间排序的全部列 (columns x count)"""
+        start = self._head
+        return self._data[:, start:start + self._count]
+
+    def latest(self):
+        """返回最新样本 (时间, 数值)"""
+        if self._count == 0:
+            return None
+        pos = (self._head + self._count - 1) % self.capacity
+        return self._data[0, pos], self._data[1, pos]
+
+    def set_column(self, index, values):
+        """覆盖写入某一列的全部数据（长度需与当前样本数一致）"""
+        pos = (self._head + np.arange(self._count)) % self.capacity
+        self._data[index, pos] = values
+        self._data[index, pos + self.capacity] = values
+
+    def clear(self):
+        """清空缓冲区"""
+        self._head = 0
+        self._count = 0
+
+    def resize(self, capacity):
+        """修改容量，保留最新的数据"""
+        old = self.view_columns().copy()
+
+        self.capacity = capacity
+        self._data = np.zeros((self.columns, capacity * 2))
+        self._head = 0
+        self._count = 0
+        self.extend(*old)
+
+
+class OverviewEnvelope:
+    """整段会话的粗粒度最小/最大值包络（用于概览条）
+
+    桶数有固定上限：桶满时相邻两桶合并、桶容量翻倍。
+    每个样本的摊还代价为 O(1)，绘制代价只与桶数有关，与会话长度无关。
+    """
+
+    def __init__(self, max_buckets=1024):
+        self.max_buckets = max_buckets - max_buckets % 2
+        self.reset()
+
+    def reset(self):
+        """清空包络"""
+        self.bucket_size = 1
+        self._time = np.zeros(self.max_buckets)
+        self._min = np.zeros(self.max_buckets)
+        self._max = np.zeros(self.max_buckets)
+        self._count = 0  # 已使用的桶数（含最后一个未满的桶）
+        self._fill = 0  # 最后一个桶中的样本数
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, value):
+        """追加单个样本"""
+        self.extend(np.array([timestamp], dtype=float), np.array([value], dtype=float))
+
+    def extend(self, timestamps, values):
+        """批量追加样本"""
+        timestamps = np.asarray(timestamps, dtype=float)
+        values = np.asarray(values, dtype=float)
+        i, n = 0, len(values)
+
+        while i < n:
+            # 先填满最后一个未满的桶
+            if self._count and self._fill < self.bucket_size:
+                k = min(self.bucket_size - self._fill, n - i)
+                last = self._count - 1
+                self._time[last] = timestamps[i + k - 1]
+                self._min[last] = min(self._min[last], values[i:i + k].min())
+                self._max[last] = max(self._max[last], values[i:i + k].max())
+                self._fill += k
+                i += k
+                continue
+
+            if self._count == self.max_buckets:
+                self._merge()
+                continue
+
+            # 整桶批量写入，剩余不足一个桶的样本开一个新桶
+            free = self.max_buckets - self._count
+            k = min((n - i) // self.bucket_size, free)
+            if k == 0:
+                k, size = 1, n - i
+            else:
+                size = self.bucket_size
+
+            block = slice(i, i + k * size)
+            t = timestamps[block].reshape(k, size)
+            v = values[block].reshape(k, size)
+            buckets = slice(self._count, self._count + k)
+            self._time[buckets] = t[:, -1]
+            self._min[buckets] = v.min(axis=1)
+            self._max[buckets] = v.max(axis=1)
+            self._count += k
+            self._fill = size
+            i += k * size
+
+    def _merge(self):
+        """相邻两桶合并，桶容量翻倍"""
+        half = self._count // 2
+        self._time[:half] = self._time[1:self._count:2]
+        self._min[:half] = np.minimum(self._min[0:self._count:2], self._min[1:self._count:2])
+        self._max[:half] = np.maximum(self._max[0:self._count:2], self._max[1:self._count:2])
+        self._count = half
+        self.bucket_size *= 2
+        self._fill = self.bucket_size
+
+    def envelope(self):
+        """返回交错排列的 (时间, 数值) 包络折线"""
+        count = self._count
+        times = np.repeat(self._time[:count], 2)
+        values = np.column_stack((self._min[:count], self._max[:count])).ravel()
+        return times, values
+
+
+class ChartChannel:
+    """图表通道 - 每个千分表/从站对应一个通道"""
+
+    def __init__(self, channel_id, name, color, capacity, overlay_window):
+        self.channel_id = channel_id
+        self.name = name
+        self.color = color
+        self.buffer = ChannelBuffer(capacity, CHANNEL_COLUMNS)
+        self.overview = OverviewEnvelope()
+        self.histogram = StreamingHistogram()
+        self.stats = RollingWindowStats(overlay_window)
+        self.visible = True
+
+        # 由图表组件创建
+        self.curve = None
+        self.overview_curve = None
+        self.checkbox = None
+        self.symbols_shown = True
+        self.overlay_items = {}  # 叠加项名称 -> 图形项列表
+
+    def append(self, timestamp, value):
+        """追加样本，同时增量更新滑动窗口统计、概览包络和分布直方图"""
+        self.buffer.append(timestamp, value, *self.stats.update(timestamp, value))
+        self.overview.append(timestamp, value)
+        self.histogram.add(value)
+
+    def extend(self, timestamps, values, summary=True):
+        """批量追加样本
+
+        Args:
+            summary: 是否同时更新概览包络和分布直方图（只读会话的整段统计单独扫描，这里不重复计入）
+        """
+        overlay = np.array([self.stats.update(t, v) for t, v in zip(timestamps, values)]).reshape(-1, 4)
+        self.buffer.extend(timestamps, values, *overlay.T)
+        if summary:
+            self.add_summary(timestamps, values)
+
+    def add_summary(self, timestamps, values):
+        """只更新整段会话的概览包络和分布直方图"""
+        self.overview.extend(timestamps, values)
+        self.histogram.extend(values)
+
+    def reset_summary(self):
+        """清空整段会话的概览包络和分布直方图"""
+        self.overview.reset()
+        self.histogram.reset()
+
+    def recompute_overlays(self, window):
+        """修改窗口长度后，对缓冲区内的历史数据重新计算统计"""
+        self.stats = RollingWindowStats(window)
+        times, values = self.buffer.view()
+        overlay = np.array([self.stats.update(t, v) for t, v in zip(times, values)]).reshape(-1, 4)
+        for offset, column in enumerate((COL_MEAN, COL_STD, COL_MIN, COL_MAX)):
+            self.buffer.set_column(column, overlay[:, offset])
+
+
+def decimate_minmax(times, values, max_points):
+    """最小/最大值抽取
+
+    将数据等分为 max_points / 2 个桶，每个桶保留最小值和最大值两个点，
+    绘制点数有上限的同时保证峰值不会丢失。
+
+    Args:
+        times: 时间数组（升序）
+        values: 数值数组
+        max_points: 最多输出的点数
+
+    Returns:
+        tuple: (抽取后的时间数组, 抽取后的数值数组)
+    """
+    n = len(values)
+    if n <= max_points:
+        return times, values
+
+    buckets = max_points // 2
+    size = n // buckets
+    # 丢弃最早的不足一个桶的样本，保证最新数据完整
+    start = n - buckets * size
+
+    t = times[start:].reshape(buckets, size)
+    v = values[start:].reshape(buckets, size)
+
+    imin = v.argmin(axis=1)
+    imax = v.argmax(axis=1)
+    first = np.minimum(imin, imax)
+    second = np.maximum(imin, imax)
+    rows = np.arange(buckets)
+
+    out_t = np.column_stack((t[rows, first], t[rows, second])).ravel()
+    out_v = np.column_stack((v[rows, first], v[rows, second])).ravel()
+    return out_t, out_v
+
+
+def decimate_reduce(times, values, max_points, reducer):
+    """按桶聚合抽取（用于叠加曲线）
+
+    Args:
+        times: 时间数组（升序）
+        values: 数值数组
+        max_points: 最多输出的点数
+        reducer: 桶内聚合函数，如 np.mean / np.min / np.max
+
+    Returns:
+        tuple: (每个桶末尾的时间, 桶内聚合值)
+    """
+    n = len(values)
+    if n <= max_points:
+        return times, values
+
+    size = -(-n // max_points)
+    buckets = n // size
+    start = n - buckets * size
+
+    out_t = times[start:].reshape(buckets, size)[:, -1]
+    out_v = reducer(values[start:].reshape(buckets, size), axis=1)
+    return out_t, out_v
+
+
+def read_store_window(store, start_ns, end_ns, max_rows=DETAIL_FETCH_ROWS, block=DETAIL_FETCH_BLOCK):
+    """从会话样本存储读取时间范围 [start_ns, end_ns) 内的样本，按通道分组
+
+    通过 index_range 二分定位行号范围，只读取范围内的分块。
+    行数超过 max_rows 时在范围内均匀读取若干段（每段 block 行）连续样本，读取量有上限。
+
+    Returns:
+        dict: 通道ID -> (时间数组（秒）, 数值数组（毫米）)
+    """
+    first, stop = store.index_range(start_ns, end_ns)
+    rows = stop - first
+    if rows <= 0:
+        return {}
+    if rows <= max_rows:
+        ranges = [(first, stop)]
+    else:
+        count = max(max_rows // block, 2)
+        starts = first + np.arange(count, dtype=np.int64) * (rows - block) // (count - 1)
+        ranges = [(int(begin), int(begin) + block) for begin in starts]
+
+    parts = {}
+    for begin, end in ranges:
+        for chunk in store.iter_chunks(begin, end):
+            t_ns = chunk['t_ns']
+            # 时间戳无序时行号范围内可能夹杂范围外的样本
+            mask = (t_ns >= start_ns) & (t_ns < end_ns)
+            times = t_ns[mask] / 1e9
+            values = chunk['raw'][mask] / store.scale
+            channels = chunk['channel'][mask]
+            for channel_id in np.unique(channels):
+                selected = channels == channel_id
+                parts.setdefault(int(channel_id), []).append((times[selected], values[selected]))
+
+    window = {}
+    for channel_id, pieces in parts.items():
+        times = np.concatenate([piece[0] for piece in pieces])
+        values = np.concatenate([piece[1] for piece in pieces])
+        if not store.is_sorted:
+            order = np.argsort(times, kind='stable')
+            times, values = times[order], values[order]
+        window[channel_id] = (times, values)
+    return window
+
+
+def sync_channel_combo(combo, channels):
+    """使通道下拉框与图表的通道列表保持同步（保留当前选择，不触发选择变化信号）
+
+    Args:
+        combo: 通道下拉框，各项数据为从站地址
+        channels: 图表的通道字典 {从站地址: ChartChannel}
+    """
+    channel_ids = list(channels.keys())
+    current_ids = [combo.itemData(i) for i in range(combo.count())]
+    if channel_ids == current_ids:
+        return
+
+    current = combo.currentData()
+    combo.blockSignals(True)
+    combo.clear()
+    for channel_id in channel_ids:
+        combo.addItem(channels[channel_id].name, channel_id)
+    if current in channel_ids:
+        combo.setCurrentIndex(channel_ids.index(current))
+    combo.blockSignals(False)
+
 
 class GaugeChartWidget(QWidget):
-    """千分表数据动态折线图组件"""
+    """千分表数据动态折线图组件（多通道，共享时间轴）"""
 
     def __init__(self, parent=None):
         super().__init__(parent)
 
-        # 数据存储 - 使用双端队列提高性能
-        self.max_points = 1000  # 最大显示点数
-        self.time_data = deque(maxlen=self.max_points)
-        self.value_data = deque(maxlen=self.max_points)
+        # 数据存储 - 每个通道一个环形缓冲区
+        self.max_points = 100000  # 每个通道的最大缓存点数
+        self.max_render_points = 2000  # 每条曲线最多绘制的点数
+        self.channels = {}  # 通道ID -> ChartChannel
+        self.store = None  # 会话样本存储（数据来源）
+        self._store_cursor = 0  # 已读取到的存储行号
+        self._scan_cursor = None  # 只读会话构建整段概览时已扫描到的行号，None 表示没有扫描任务
+        self._store_window_key = None  # 细节视图从存储读取的 (起始行, 结束行)
+        self._store_window = {}
+        self._last_channel = None  # 最近一次更新的通道
+        self._display_range = None  # 当前显示窗口内的 (最小值, 最大值)
+        self._dirty = False
+
+        # 细节视图范围：None 表示跟随最新数据，否则为概览条选中的 (起始, 结束) 时间
+        self.detail_range = None
+        self._updating_region = False
 
         # 设置界面
         self.setup_ui()
@@ -30,6 +428,11 @@ class GaugeChartWidget(QWidget):
         # 时间轴显示范围（秒）
         self.time_range = 60  # 默认显示最近60秒
 
+        # 统一渲染循环：数据到达时只标记，由定时器按帧率刷新所有通道
+        self.render_timer = QTimer(self)
+        self.render_timer.timeout.connect(self.render)
+        self.render_timer.start(33)
+
     def setup_ui(self):
         """设置用户界面"""
         layout = QVBoxLayout(self)
@@ -43,6 +446,11 @@ class GaugeChartWidget(QWidget):
         self.plot_widget = pg.PlotWidget()
         layout.addWidget(self.plot_widget)
 
+        # 概览条：显示整段会话，拖动选区控制上方细节图
+        self.overview_widget = pg.PlotWidget()
+        self.overview_widget.setFixedHeight(90)
+        layout.addWidget(self.overview_widget)
+
         # 状态标签
         self.status_label = QLabel("等待数据...")
         self.status_label.setStyleSheet("color: #666; font-size: 11px;")
@@ -85,6 +493,41 @@ class GaugeChartWidget(QWidget):
         self.time_range_combo.currentTextChanged.connect(self.change_time_range)
         time_layout.addWidget(self.time_range_combo)
 
+        # 叠加分析组
+        overlay_group = QGroupBox("叠加分析")
+        overlay_layout = QHBoxLayout(overlay_group)
+
+        self.mean_checkbox = QCheckBox("均值")
+        self.mean_checkbox.toggled.connect(self.update_overlay_visibility)
+        overlay_layout.addWidget(self.mean_checkbox)
+
+        self.band_checkbox = QCheckBox("±kσ")
+        self.band_checkbox.toggled.connect(self.update_overlay_visibility)
+        overlay_layout.addWidget(self.band_checkbox)
+
+        self.sigma_spinbox = QDoubleSpinBox()
+        self.sigma_spinbox.setRange(0.5, 6.0)
+        self.sigma_spinbox.setSingleStep(0.5)
+        self.sigma_spinbox.setValue(3.0)
+        self.sigma_spinbox.setPrefix("k=")
+        self.sigma_spinbox.valueChanged.connect(self.mark_dirty)
+        overlay_layout.addWidget(self.sigma_spinbox)
+
+        self.envelope_checkbox = QCheckBox("包络")
+        self.envelope_checkbox.toggled.connect(self.update_overlay_visibility)
+        overlay_layout.addWidget(self.envelope_checkbox)
+
+        overlay_layout.addWidget(QLabel("窗口:"))
+        self.overlay_window_combo = QComboBox()
+        self.overlay_window_combo.addItems(list(OVERLAY_WINDOWS.keys()))
+        self.overlay_window_combo.setCurrentText("1分钟")
+        self.overlay_window_combo.currentTextChanged.connect(self.change_overlay_window)
+        overlay_layout.addWidget(self.overlay_window_combo)
+
+        # 通道显示组（通道复选框在收到数据时动态添加）
+        channel_group = QGroupBox("通道")
+        self.channel_layout = QHBoxLayout(channel_group)
+
         # 数据统计组
         stats_group = QGroupBox("数据统计")
         stats_layout = QVBoxLayout(stats_group)
@@ -96,6 +539,8 @@ class GaugeChartWidget(QWidget):
         # 布局
         layout.addWidget(chart_group)
         layout.addWidget(time_group)
+        layout.addWidget(overlay_group)
+        layout.addWidget(channel_group)
         layout.addWidget(stats_group)
         layout.addStretch()
 
@@ -119,14 +564,8 @@ class GaugeChartWidget(QWidget):
         bottom_axis = self.plot_widget.getAxis('bottom')
         bottom_axis.setTicks([])  # 清空刻度标签
 
-        # 创建曲线
-        self.curve = self.plot_widget.plot(
-            pen=pg.mkPen(color='#2E86AB', width=2),
-            symbol='o',
-            symbolSize=4,
-            symbolBrush='#2E86AB',
-            name='位移数据'
-        )
+        # 图例（显示各通道名称）
+        self.plot_widget.addLegend(offset=(10, 10))
 
         # 添加零线参考
         self.zero_line = pg.InfiniteLine(
@@ -141,6 +580,68 @@ class GaugeChartWidget(QWidget):
         self.plot_widget.setMouseEnabled(x=True, y=True)
         self.plot_widget.enableAutoRange()
 
+        # 设置概览条
+        self.setup_overview()
+
+    def setup_overview(self):
+        """设置概览条"""
+        self.overview_widget.setBackground('white')
+        self.overview_widget.setMouseEnabled(x=False, y=False)
+        self.overview_widget.hideButtons()
+        self.overview_widget.getAxis('bottom').setStyle(showValues=False)
+        self.overview_widget.getAxis('left').setStyle(showValues=False)
+        self.overview_widget.getAxis('left').setWidth(self.plot_widget.getAxis('left').width())
+
+        # 细节视图选区
+        self.overview_region = pg.LinearRegionItem(
+            brush=pg.mkBrush(46, 134, 171, 50),
+            pen=pg.mkPen('#2E86AB', width=1)
+        )
+        self.overview_region.setZValue(10)
+        self.overview_region.sigRegionChanged.connect(self.on_overview_region_changed)
+        self.overview_widget.addItem(self.overview_region)
+
+        # 双击概览条恢复跟随最新数据
+        self.overview_widget.scene().sigMouseClicked.connect(self.on_overview_clicked)
+
+        # 细节图被鼠标缩放/平移时同步选区
+        self.plot_widget.sigXRangeChanged.connect(self.on_detail_range_changed)
+
+    def on_overview_region_changed(self):
+        """拖动概览选区：停止跟随并让细节图显示选区内的数据"""
+        if self._updating_region:
+            return
+
+        self.detail_range = self.overview_region.getRegion()
+        if self.auto_scale_checkbox.isChecked():
+            # 取消自动缩放（不触发 toggle_auto_scale 中的重置）
+            self.auto_scale_checkbox.blockSignals(True)
+            self.auto_scale_checkbox.setChecked(False)
+            self.auto_scale_checkbox.blockSignals(False)
+            self.auto_scale_enabled = False
+
+        self._updating_region = True
+        self.plot_widget.setXRange(*self.detail_range, padding=0)
+        self._updating_region = False
+        self.mark_dirty()
+
+    def on_overview_clicked(self, event):
+        """双击概览条：恢复跟随最新数据"""
+        if event.double():
+            self.auto_scale_checkbox.setChecked(True)
+
+    def on_detail_range_changed(self, view_box, x_range):
+        """细节图范围变化时同步概览选区"""
+        if self._updating_region:
+            return
+        self.set_overview_region(*x_range)
+
+    def set_overview_region(self, start, end):
+        """设置概览选区（不触发细节图联动）"""
+        self._updating_region = True
+        self.overview_region.setRegion((start, end))
+        self._updating_region = False
+
     def setup_axes(self):
         """设置坐标轴"""
         # 配置时间轴
@@ -164,8 +665,204 @@ class GaugeChartWidget(QWidget):
         axis.setTicks([])  # 清空所有刻度标签
         axis.setStyle(showValues=False)  # 隐藏数值显示
 
-    def add_data_point(self, timestamp, value):
-        """添加数据点"""
+    # ========== 通道管理 ==========
+    def add_channel(self, channel_id, name=None):
+        """添加通道
+
+        Args:
+            channel_id: 通道ID（一般为从站地址）
+            name: 显示名称，默认为"从站 N"
+
+        Returns:
+            ChartChannel: 新建（或已存在）的通道
+        """
+        if channel_id in self.channels:
+            return self.channels[channel_id]
+
+        color = CHANNEL_COLORS[len(self.channels) % len(CHANNEL_COLORS)]
+        channel = ChartChannel(
+            channel_id, name or f"从站 {channel_id}", color,
+            self.max_points, self.get_overlay_window()
+        )
+
+        # 创建曲线
+        channel.curve = self.plot_widget.plot(
+            pen=pg.mkPen(color=color, width=2),
+            symbol='o',
+            symbolSize=4,
+            symbolBrush=color,
+            name=channel.name
+        )
+
+        # 概览条曲线
+        channel.overview_curve = self.overview_widget.plot(pen=pg.mkPen(color=color, width=1))
+
+        # 创建叠加曲线
+        self.create_overlay_items(channel)
+
+        # 创建显示开关
+        channel.checkbox = QCheckBox(channel.name)
+        channel.checkbox.setChecked(True)
+        channel.checkbox.setStyleSheet(f"color: {color}; font-weight: bold;")
+        channel.checkbox.toggled.connect(
+            lambda checked, cid=channel_id: self.set_channel_visible(cid, checked)
+        )
+        self.channel_layout.addWidget(channel.checkbox)
+
+        self.channels[channel_id] = channel
+        self.update_overlay_visibility()
+        return channel
+
+    def create_overlay_items(self, channel):
+        """为通道创建叠加分析图形项（默认隐藏）"""
+        qcolor = QColor(channel.color)
+
+        mean_curve = pg.PlotDataItem(pen=pg.mkPen(color=qcolor, width=1.5, style=Qt.DashLine))
+
+        band_pen = pg.mkPen(color=qcolor, width=1, style=Qt.DotLine)
+        upper_curve = pg.PlotDataItem(pen=band_pen)
+        lower_curve = pg.PlotDataItem(pen=band_pen)
+        fill_color = QColor(qcolor)
+        fill_color.setAlpha(40)
+        band_fill = pg.FillBetweenItem(upper_curve, lower_curve, brush=pg.mkBrush(fill_color))
+
+        envelope_pen = pg.mkPen(color=qcolor.darker(150), width=1)
+        max_curve = pg.PlotDataItem(pen=envelope_pen)
+        min_curve = pg.PlotDataItem(pen=envelope_pen)
+
+        channel.overlay_items = {
+            'mean': [mean_curve],
+            'band': [upper_curve, lower_curve, band_fill],
+            'envelope': [max_curve, min_curve],
+        }
+        for items in channel.overlay_items.values():
+            for item in items:
+                item.setVisible(False)
+                self.plot_widget.addItem(item)
+
+    def get_enabled_overlays(self):
+        """获取已启用的叠加项名称"""
+        enabled = []
+        if self.mean_checkbox.isChecked():
+            enabled.append('mean')
+        if self.band_checkbox.isChecked():
+            enabled.append('band')
+        if self.envelope_checkbox.isChecked():
+            enabled.append('envelope')
+        return enabled
+
+    def update_overlay_visibility(self, *args):
+        """根据开关和通道可见性显示/隐藏叠加项"""
+        enabled = self.get_enabled_overlays()
+        for channel in self.channels.values():
+            for name, items in channel.overlay_items.items():
+                for item in items:
+                    item.setVisible(channel.visible and name in enabled)
+        self.mark_dirty()
+
+    def get_overlay_window(self):
+        """获取叠加分析窗口长度（秒）"""
+        return OVERLAY_WINDOWS.get(self.overlay_window_combo.currentText(), 60)
+
+    def change_overlay_window(self, text):
+        """修改叠加分析窗口，重新计算缓冲区内的统计"""
+        window = self.get_overlay_window()
+        for channel in self.channels.values():
+            channel.recompute_overlays(window)
+        self.mark_dirty()
+
+    def mark_dirty(self, *args):
+        """标记需要在下一帧重绘"""
+        self._dirty = True
+
+    def set_channel_visible(self, channel_id, visible):
+        """设置通道是否显示"""
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            return
+        channel.visible = visible
+        channel.curve.setVisible(visible)
+        channel.overview_curve.setVisible(visible)
+        self.update_overlay_visibility()
+        self.update_chart()
+        self.update_status()
+
+    def get_visible_channels(self):
+        """获取所有可见且有数据的通道（只读会话中只出现在缓冲区之前的通道也包括在内）"""
+        return [ch for ch in self.channels.values() if ch.visible and (len(ch.buffer) > 0 or len(ch.overview) > 0)]
+
+    # ========== 数据输入 ==========
+    def set_store(self, store):
+        """设置会话样本存储，渲染循环每帧从中批量拉取新样本
+
+        只读的会话文件只把最后 max_points 个样本拉入缓冲区；
+        整段会话的概览包络和分布直方图由渲染循环分帧扫描整个存储构建（每帧最多 SCAN_ROWS_PER_FRAME 行）。
+        """
+        self.store = store
+        self.clear_chart()
+        self.reset_summary()
+        if getattr(store, 'readonly', False):
+            self._store_cursor = max(0, len(store) - self.max_points)
+            self._scan_cursor = 0
+        else:
+            self._store_cursor = 0
+            self._scan_cursor = None
+
+    def reset_summary(self):
+        """清空各通道整段会话的概览包络和分布直方图"""
+        for channel in self.channels.values():
+            channel.reset_summary()
+            channel.overview_curve.setData([], [])
+        self._dirty = True
+
+    def scan_store(self):
+        """分帧扫描只读会话，构建各通道整段会话的概览包络和分布直方图"""
+        if self._scan_cursor is None or self.store is None:
+            return
+
+        stop = min(len(self.store), self._scan_cursor + SCAN_ROWS_PER_FRAME)
+        for chunk in self.store.iter_chunks(self._scan_cursor, stop):
+            times = chunk['t_ns'] / 1e9
+            values = chunk['raw'] / self.store.scale
+            channels = chunk['channel']
+            for channel_id in np.unique(channels):
+                mask = channels == channel_id
+                self.add_channel(int(channel_id)).add_summary(times[mask], values[mask])
+
+        self._scan_cursor = None if stop >= len(self.store) else stop
+        self._dirty = True
+
+    def pull_from_store(self):
+        """从会话样本存储批量读取新样本，按通道分组写入缓冲区"""
+        if self.store is None:
+            return
+
+        size = len(self.store)
+        if size < self._store_cursor:
+            # 存储已被清空，整段会话统计随之清空
+            self._store_cursor = 0
+            self.reset_summary()
+        if size == self._store_cursor:
+            return
+
+        # 只读会话的整段统计由 scan_store 扫描，拉入缓冲区的尾部样本不重复计入
+        summary = not getattr(self.store, 'readonly', False)
+        for chunk in self.store.iter_chunks(self._store_cursor, size):
+            times = chunk['t_ns'] / 1e9
+            values = chunk['raw'] / self.store.scale
+            channels = chunk['channel']
+            for channel_id in np.unique(channels):
+                mask = channels == channel_id
+                self.add_data_points(times[mask], values[mask], int(channel_id), summary)
+            self._last_channel = int(channels[-1])
+
+        self._store_cursor = size
+
+    def add_data_point(self, timestamp, value, channel=1):
+        """添加数据点
+
+        数据只写入通道缓冲区，实际绘制由渲染定时器统一完成。
+        """
         # 转换时间戳
         if isinstance(timestamp, str):
             # 如果是字符串格式 "HH:MM:SS.fff"
@@ -180,59 +877,201 @@ class GaugeChartWidget(QWidget):
         elif isinstance(timestamp, datetime):
             timestamp = timestamp.timestamp()
 
-        # 添加数据
-        self.time_data.append(timestamp)
-        self.value_data.append(value)
+        chart_channel = self.add_channel(channel)
+        chart_channel.append(timestamp, value)
+        self._last_channel = channel
+        self._dirty = True
 
-        # 更新图表
+    def add_data_points(self, timestamps, values, channel=1, summary=True):
+        """批量添加数据点（时间戳为秒级浮点数组）"""
+        if len(timestamps) == 0:
+            return
+        chart_channel = self.add_channel(channel)
+        chart_channel.extend(timestamps, values, summary)
+        self._last_channel = channel
+        self._dirty = True
+
+    # ========== 渲染 ==========
+    def render(self):
+        """渲染循环：仅在有新数据时刷新"""
+        self.scan_store()
+        self.pull_from_store()
+        if not self._dirty:
+            return
+        self._dirty = False
         self.update_chart()
-
-        # 更新状态
         self.update_status()
 
     def update_chart(self):
         """更新图表显示"""
-        if len(self.time_data) == 0:
-            return
+        display = self.get_display_data()
 
-        # 获取要显示的数据
-        time_array, value_array = self.get_display_data()
+        for channel_id, channel in self.channels.items():
+            if channel_id not in display:
+                if not channel.visible or len(channel.buffer) == 0:
+                    channel.curve.setData([], [])
+                continue
 
-        if len(time_array) == 0:
-            return
+            time_array, value_array = display[channel_id]
 
-        # 更新曲线数据
-        self.curve.setData(time_array, value_array)
+            # 数据点较多时不绘制符号
+            show_symbols = len(time_array) <= 500
+            if show_symbols != channel.symbols_shown:
+                channel.curve.setSymbol('o' if show_symbols else None)
+                channel.symbols_shown = show_symbols
 
-        # 自动缩放
-        if self.auto_scale_enabled:
-            self.auto_scale()
+            channel.curve.setData(time_array, value_array)
 
-    def get_display_data(self):
-        """获取要显示的数据"""
-        if len(self.time_data) == 0:
-            return [], []
+        # 概览条（包络桶数固定，绘制代价与会话长度无关）
+        for channel in self.get_visible_channels():
+            channel.overview_curve.setData(*channel.overview.envelope())
 
-        time_list = list(self.time_data)
-        value_list = list(self.value_data)
+        # 叠加分析曲线
+        enabled_overlays = self.get_enabled_overlays()
+        if enabled_overlays:
+            self.update_overlays(display, enabled_overlays)
 
-        # 根据时间范围过滤数据
-        if self.time_range_combo.currentText() != "全部":
-            current_time = time_list[-1]
-            time_window = self.get_time_window()
+        # 所有可见通道合并计算显示范围
+        self._display_range = self.compute_display_range(display)
 
-            # 过滤在时间窗口内的数据
-            filtered_time = []
-            filtered_value = []
+        # 自动缩放
+        if self.auto_scale_enabled:
+            self.auto_scale(display)
+
+    def get_display_bounds(self):
+        """获取细节视图的时间范围
+
+        跟随模式下以最新时间为终点、时间范围设置为长度；
+        通过概览条选区导航时使用选区范围。
+
+        Returns:
+            tuple: (起始时间, 结束时间)，无数据时返回 None
+        """
+        if self.detail_range is not None:
+            return self.detail_range
+
+        latest = self.get_latest_time()
+        if latest is None:
+            return None
+        return latest - self.get_time_window(), latest
+
+    def get_selected_range(self):
+        """获取当前选中的时间范围（概览条选区或细节视图显示的范围）
+
+        Returns:
+            tuple: (起始时间, 结束时间) 秒级时间戳，无数据时返回 None
+        """
+        bounds = self.get_display_bounds()
+        if bounds is None:
+            return None
+        start, end = bounds
+        if not np.isfinite(start):
+            # "全部" 模式下从最早的数据开始
+            earliest = [ch.buffer.view()[0][0] for ch in self.channels.values() if len(ch.buffer) > 0]
+            start = min(earliest)
+        return float(start), float(end)
+
+    @staticmethod
+    def slice_window(times, bounds):
+        """通过二分查找定位时间范围对应的下标区间"""
+        start, end = bounds
+        return (
+            np.searchsorted(times, start, side='left'),
+            np.searchsorted(times, end, side='right')
+        )
 
-            for i, t in enumerate(time_list):
-                if current_time - t <= time_window:
-                    filtered_time.append(t)
-                    filtered_value.append(value_list[i])
+    def get_display_data(self):
+        """获取要显示的数据
+
+        所有通道共用同一个时间范围，范围的起止位置通过二分查找定位，
+        随后对每个通道做最小/最大值抽取。
+        概览选区拖到缓冲区之前的部分时，从会话存储读取选区内的数据。
+
+        Returns:
+            dict: 通道ID -> (时间数组, 数值数组)
+        """
+        bounds = self.get_display_bounds()
+        if bounds is None:
+            return {}
+
+        store_window = self.get_store_window(bounds)
+        display = {}
+        for channel in self.get_visible_channels():
+            if store_window is not None:
+                empty = np.zeros(0)
+                time_array, value_array = store_window.get(channel.channel_id, (empty, empty))
+            else:
+                time_array, value_array = channel.buffer.view()
+            start, stop = self.slice_window(time_array, bounds)
+            display[channel.channel_id] = decimate_minmax(
+                time_array[start:stop], value_array[start:stop], self.max_render_points
+            )
 
-            return filtered_time, filtered_value
-        else:
-            return time_list, value_list
+        return display
+
+    def get_store_window(self, bounds):
+        """概览选区超出缓冲区时从会话存储读取选区内的数据
+
+        跟随最新数据时只使用缓冲区。读取结果按行号范围缓存，
+        连续读取时新数据追加在选区之后不会触发重新读取。
+
+        Returns:
+            dict: 通道ID -> (时间数组, 数值数组)；缓冲区已覆盖选区时返回 None
+        """
+        if self.detail_range is None or self.store is None or len(self.store) == 0:
+            return None
+
+        starts = [ch.buffer.view()[0][0] for ch in self.channels.values() if len(ch.buffer) > 0]
+        time_range = self.store.time_range()
+        if starts and (bounds[0] >= min(starts) or time_range[0] / 1e9 >= min(starts)):
+            return None
+
+        start_ns = int(max(bounds[0], time_range[0] / 1e9 - 1) * 1e9)
+        end_ns = int(min(bounds[1], time_range[1] / 1e9 + 1) * 1e9) + 1
+        key = self.store.index_range(start_ns, end_ns)
+        if key != self._store_window_key:
+            self._store_window = read_store_window(self.store, start_ns, end_ns)
+            self._store_window_key = key
+        return self._store_window
+
+    def update_overlays(self, display, enabled_overlays):
+        """更新叠加分析曲线
+
+        统计值已在数据到达时增量算好并存放在缓冲区中，
+        这里只需对显示窗口内的列做切片和抽取，代价与统计窗口长度无关。
+        """
+        bounds = self.get_display_bounds()
+        max_points = self.max_render_points // 2
+        k = self.sigma_spinbox.value()
+
+        for channel_id in display:
+            channel = self.channels[channel_id]
+            columns = channel.buffer.view_columns()
+            start, stop = self.slice_window(columns[COL_TIME], bounds)
+            columns = columns[:, start:stop]
+            times = columns[COL_TIME]
+
+            if 'mean' in enabled_overlays:
+                channel.overlay_items['mean'][0].setData(
+                    *decimate_reduce(times, columns[COL_MEAN], max_points, np.mean)
+                )
+
+            if 'band' in enabled_overlays:
+                upper = columns[COL_MEAN] + k * columns[COL_STD]
+                lower = columns[COL_MEAN] - k * columns[COL_STD]
+                upper_curve, lower_curve, _ = channel.overlay_items['band']
+                upper_curve.setData(*decimate_reduce(times, upper, max_points, np.max))
+                lower_curve.setData(*decimate_reduce(times, lower, max_points, np.min))
+
+            if 'envelope' in enabled_overlays:
+                max_curve, min_curve = channel.overlay_items['envelope']
+                max_curve.setData(*decimate_reduce(times, columns[COL_MAX], max_points, np.max))
+                min_curve.setData(*decimate_reduce(times, columns[COL_MIN], max_points, np.min))
+
+    def get_latest_time(self):
+        """获取所有通道中的最新时间"""
+        latest = [ch.buffer.latest()[0] for ch in self.channels.values() if len(ch.buffer) > 0]
+        return max(latest) if latest else None
 
     def get_time_window(self):
         """获取时间窗口大小（秒）"""
@@ -250,20 +1089,32 @@ class GaugeChartWidget(QWidget):
         else:
             return float('inf')  # 全部
 
-    def auto_scale(self):
-        """自动缩放"""
-        if len(self.value_data) == 0:
-            return
+    @staticmethod
+    def compute_display_range(display):
+        """合并计算所有通道显示数据的 (最小值, 最大值, 起始时间, 结束时间)"""
+        if not display:
+            return None
+
+        values = np.concatenate([v for _, v in display.values()])
+        if len(values) == 0:
+            return None
+
+        starts = [t[0] for t, _ in display.values() if len(t)]
+        ends = [t[-1] for t, _ in display.values() if len(t)]
+        return values.min(), values.max(), min(starts), max(ends)
 
-        time_array, value_array = self.get_display_data()
+    def auto_scale(self, display=None):
+        """自动缩放"""
+        if display is None:
+            display = self.get_display_data()
+            self._display_range = self.compute_display_range(display)
 
-        if len(value_array) == 0:
+        if self._display_range is None:
             return
 
-        # Y轴自动缩放（添加5%边距）
-        min_val = min(value_array)
-        max_val = max(value_array)
+        min_val, max_val, t_start, t_end = self._display_range
 
+        # Y轴自动缩放（添加5%边距）
         if min_val == max_val:
             # 如果所有值相同，设置合理的范围
             center = min_val
@@ -280,67 +1131,108 @@ class GaugeChartWidget(QWidget):
         self.plot_widget.setYRange(min_val, max_val, padding=0)
 
         # X轴自动缩放
-        if len(time_array) > 1:
-            self.plot_widget.setXRange(time_array[0], time_array[-1], padding=0.02)
+        if t_end > t_start:
+            self.plot_widget.setXRange(t_start, t_end, padding=0.02)
 
     def toggle_auto_scale(self, enabled):
         """切换自动缩放"""
         self.auto_scale_enabled = enabled
         if enabled:
-            self.auto_scale()
+            # 恢复跟随最新数据
+            self.detail_range = None
+            self.update_chart()
 
     def change_time_range(self, text):
         """改变时间范围"""
         self.update_chart()
+        self.update_status()
 
     def clear_chart(self):
-        """清空图表"""
-        self.time_data.clear()
-        self.value_data.clear()
-        self.curve.setData([], [])
+        """清空图表（存储中已有的数据不再显示）
+
+        只清空显示缓冲区；整段会话的概览包络和分布直方图来自样本存储，
+        仅在存储本身为空时清空，只读会话的后台扫描也继续进行。
+        """
+        if self.store is not None:
+            self._store_cursor = len(self.store)
+        self._store_window_key = None
+        self._store_window = {}
+        if self.store is None or len(self.store) == 0:
+            self.reset_summary()
+        for channel in self.channels.values():
+            channel.buffer.clear()
+            channel.stats.reset()
+            channel.curve.setData([], [])
+            for items in channel.overlay_items.values():
+                for item in items:
+                    if isinstance(item, pg.PlotDataItem):
+                        item.setData([], [])
+        self._display_range = None
         self.update_status()
 
     def update_status(self):
         """更新状态信息"""
-        count = len(self.value_data)
+        count = self.get_point_count()
 
         if count == 0:
             self.status_label.setText("等待数据...")
             self.stats_label.setText("点数: 0 | 最新: -- | 范围: --")
-        else:
-            # 获取最新值
-            latest = self.value_data[-1]
+            return
 
-            # 计算范围
-            values = list(self.value_data)
-            min_val = min(values)
-            max_val = max(values)
+        # 获取最新值
+        latest_text = "--"
+        last_channel = self.channels.get(self._last_channel)
+        if last_channel is not None and len(last_channel.buffer) > 0:
+            latest = last_channel.buffer.latest()[1]
+            latest_text = f"{latest:+.4f}mm"
+            if len(self.channels) > 1:
+                latest_text = f"{last_channel.name} {latest_text}"
+
+        # 显示窗口内的范围
+        range_text = "--"
+        if self._display_range is not None:
+            min_val, max_val = self._display_range[0], self._display_range[1]
             range_val = max_val - min_val
-
-            # 更新状态
-            self.status_label.setText(f"已接收 {count} 个数据点")
-            self.stats_label.setText(
-                f"点数: {count} | 最新: {latest:+.4f}mm | "
-                f"范围: {min_val:+.4f} ~ {max_val:+.4f}mm (±{range_val:.4f})"
+            range_text = f"{min_val:+.4f} ~ {max_val:+.4f}mm (±{range_val:.4f})"
+
+        # 整段会话的统计（来自增量直方图，不受缓冲区长度限制）
+        session_text = ""
+        if last_channel is not None and last_channel.histogram.count > 0:
+            histogram = last_channel.histogram
+            session_text = (
+                f" | 会话: {histogram.count} 点, {histogram.min:+.4f} ~ {histogram.max:+.4f}mm, "
+                f"均值 {histogram.mean:+.4f}mm, σ {histogram.std:.4f}mm"
             )
 
+        # 更新状态
+        self.status_label.setText(f"已接收 {count} 个数据点（{len(self.channels)} 个通道）{session_text}")
+        self.stats_label.setText(f"点数: {count} | 最新: {latest_text} | 范围: {range_text}")
+
+    def get_point_count(self):
+        """获取所有通道缓存的数据点总数"""
+        return sum(len(ch.buffer) for ch in self.channels.values())
+
     def get_chart_data(self):
         """获取图表数据（用于导出等）"""
+        times, values, channels = [], [], []
+        for channel_id, channel in self.channels.items():
+            time_array, value_array = channel.buffer.view()
+            times.extend(time_array.tolist())
+            values.extend(value_array.tolist())
+            channels.extend([channel_id] * len(time_array))
+
         return {
-            'time': list(self.time_data),
-            'value': list(self.value_data),
-            'count': len(self.value_data)
+            'time': times,
+            'value': values,
+            'channel': channels,
+            'count': len(values)
         }
 
     def set_max_points(self, max_points):
-        """设置最大数据点数"""
+        """设置每个通道的最大数据点数"""
         self.max_points = max_points
-        # 重新创建队列
-        old_time = list(self.time_data)
-        old_value = list(self.value_data)
-
-        self.time_data = deque(old_time[-max_points:], maxlen=max_points)
-        self.value_data = deque(old_value[-max_points:], maxlen=max_points)
+        for channel in self.channels.values():
+            channel.buffer.resize(max_points)
 
         self.update_chart()
 
@@ -392,7 +1284,7 @@ class ChartTestWindow(QMainWindow):
         self.timer.stop()
 
     def add_test_data(self):
-        """添加测试数据"""
+        """添加测试数据（模拟两个从站）"""
         import math
         import random
 
@@ -404,7 +1296,8 @@ class ChartTestWindow(QMainWindow):
 
         # 添加到图表
         timestamp = datetime.now()
-        self.chart.add_data_point(timestamp, value)
+        self.chart.add_data_point(timestamp, value, channel=1)
+        self.chart.add_data_point(timestamp, value * 0.5 + 0.3, channel=2)
 
         self.test_counter += 1
 
@@ -416,4 +1309,4 @@ if __name__ == "__main__":
     window = ChartTestWindow()
     window.show()
 
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
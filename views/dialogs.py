@@ -695,4 +695,423 @@ class AboutDialog(QDialog):
         button_layout.addWidget(ok_btn)
         button_layout.addStretch()
 
-        layout.addLayout(button_layout)
\ No newline at end of file
+        layout.addLayout(button_layout)
+
+# ==================== 会话记录对话框 ====================
+class SessionCatalogModel(QAbstractTableModel):
+    """会话目录表格模型 - 排序和筛选交给目录数据库完成"""
+
+    COLUMNS = [
+        ("开始时间", 'start_ns'),
+        ("时长", 'end_ns'),
+        ("串口", 'port'),
+        ("波特率", 'baudrate'),
+        ("从站", 'slave_ids'),
+        ("点数", 'sample_count'),
+        ("最小(mm)", 'min'),
+        ("最大(mm)", 'max'),
+        ("均值(mm)", 'mean'),
+        ("σ(mm)", 'std'),
+        ("大小", 'size_bytes'),
+        ("数据", 'compacted'),
+        ("名称", 'name'),
+    ]
+
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.rows = []
+        self.filter_text = ''
+        self.order_by = 'start_ns'
+        self.descending = True
+        self.refresh()
+
+    def refresh(self):
+        """重新查询目录"""
+        self.beginResetModel()
+        self.rows = self.catalog.query(self.filter_text, self.order_by, self.descending)
+        self.endResetModel()
+
+    def set_filter(self, text):
+        self.filter_text = text.strip()
+        self.refresh()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        key = self.COLUMNS[index.column()][1]
+
+        if role == Qt.ToolTipRole:
+            return row['path']
+        if role != Qt.DisplayRole:
+            return None
+
+        value = row[key]
+        if key == 'start_ns':
+            return datetime.fromtimestamp(value / 1e9).strftime("%Y-%m-%d %H:%M:%S") if value else ""
+        if key == 'end_ns':
+            if not value or not row['start_ns']:
+                return ""
+            seconds = int((value - row['start_ns']) / 1e9)
+            return f"{seconds // 3600:d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+        if key in ('min', 'max', 'mean'):
+            return f"{value:+.4f}" if value is not None else ""
+        if key == 'std':
+            return f"{value:.4f}" if value is not None else ""
+        if key == 'size_bytes':
+            return f"{value / 1024 / 1024:.1f} MB"
+        if key == 'compacted':
+            return "汇总" if value else "全速率"
+        return "" if value is None else str(value)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.order_by = self.COLUMNS[column][1]
+        self.descending = order == Qt.DescendingOrder
+        self.refresh()
+
+
+class SessionBrowserDialog(QDialog):
+    """会话记录浏览对话框 - 列出、筛选、排序已记录的会话"""
+
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.selected_path = None
+        self.setup_ui()
+
+    def setup_ui(self):
+        """设置对话框UI"""
+        self.setWindowTitle("会话记录")
+        self.resize(1000, 500)
+
+        layout = QVBoxLayout(self)
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("筛选:"))
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("名称、串口或从站地址")
+        filter_layout.addWidget(self.filter_edit)
+        self.count_label = QLabel()
+        filter_layout.addWidget(self.count_label)
+        layout.addLayout(filter_layout)
+
+        self.model = SessionCatalogModel(self.catalog, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.setAlternatingRowColors(True)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSortIndicator(0, Qt.DescendingOrder)
+        self.table.doubleClicked.connect(self.open_selected)
+        layout.addWidget(self.table)
+
+        # 筛选输入稍作延迟，避免每个字符都查询一次
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(200)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        self.filter_edit.textChanged.connect(self.filter_timer.start)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        open_btn = QPushButton("打开")
+        open_btn.clicked.connect(self.open_selected)
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.reject)
+        button_layout.addWidget(open_btn)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+
+        self.update_count()
+
+    def apply_filter(self):
+        self.model.set_filter(self.filter_edit.text())
+        self.update_count()
+
+    def update_count(self):
+        self.count_label.setText(f"{self.model.rowCount()} / {self.catalog.count()} 个会话")
+
+    def open_selected(self, *args):
+        """打开选中的会话"""
+        rows = self.table.selectionModel().selectedRows()
+        if not rows:
+            return
+        self.selected_path = self.model.rows[rows[0].row()]['path']
+        self.accept()
+
+
+# ==================== 自动导出对话框 ====================
+class AutoExportDialog(QDialog):
+    """自动导出设置对话框 - 连续读取时把数据持续写入分段导出文件"""
+
+    FORMATS = [("CSV 文件", 'csv'), ("SQLite 数据库", 'sqlite')]
+
+    def __init__(self, settings, parent=None):
+        """
+        Args:
+            settings: 当前设置 {'enabled', 'format', 'directory', 'rotate_minutes', 'rotate_mb'}
+        """
+        super().__init__(parent)
+        self.settings = dict(settings)
+        self.setup_ui()
+
+    def setup_ui(self):
+        """设置对话框UI"""
+        self.setWindowTitle("自动导出")
+        self.setMinimumWidth(460)
+
+        layout = QVBoxLayout(self)
+
+        self.enabled_checkbox = QCheckBox("连续读取时自动导出数据")
+        self.enabled_checkbox.setChecked(self.settings['enabled'])
+        layout.addWidget(self.enabled_checkbox)
+
+        form = QFormLayout()
+
+        self.format_combo = QComboBox()
+        for text, value in self.FORMATS:
+            self.format_combo.addItem(text, value)
+        self.format_combo.setCurrentIndex([value for _, value in self.FORMATS].index(self.settings['format']))
+        form.addRow("格式:", self.format_combo)
+
+        directory_layout = QHBoxLayout()
+        self.directory_edit = QLineEdit(self.settings['directory'])
+        browse_btn = QPushButton("浏览...")
+        browse_btn.clicked.connect(self.browse_directory)
+        directory_layout.addWidget(self.directory_edit)
+        directory_layout.addWidget(browse_btn)
+        form.addRow("目录:", directory_layout)
+
+        self.rotate_minutes_spin = QSpinBox()
+        self.rotate_minutes_spin.setRange(0, 7 * 24 * 60)
+        self.rotate_minutes_spin.setSuffix(" 分钟")
+        self.rotate_minutes_spin.setSpecialValueText("不按时间分段")
+        self.rotate_minutes_spin.setValue(self.settings['rotate_minutes'])
+        form.addRow("按时间分段:", self.rotate_minutes_spin)
+
+        self.rotate_mb_spin = QSpinBox()
+        self.rotate_mb_spin.setRange(0, 100 * 1024)
+        self.rotate_mb_spin.setSuffix(" MB")
+        self.rotate_mb_spin.setSpecialValueText("不按大小分段")
+        self.rotate_mb_spin.setValue(self.settings['rotate_mb'])
+        form.addRow("按大小分段:", self.rotate_mb_spin)
+
+        layout.addLayout(form)
+
+        hint_label = QLabel("数据每秒成批写入磁盘，程序异常退出时已写入的数据不会丢失。\n"
+                            "设置在下一次开始连续读取时生效。")
+        hint_label.setStyleSheet("color: #666;")
+        layout.addWidget(hint_label)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+    def browse_directory(self):
+        """选择导出目录"""
+        directory = QFileDialog.getExistingDirectory(self, "选择自动导出目录", self.directory_edit.text())
+        if directory:
+            self.directory_edit.setText(directory)
+
+    def get_settings(self):
+        """获取设置"""
+        return {
+            'enabled': self.enabled_checkbox.isChecked(),
+            'format': self.format_combo.currentData(),
+            'directory': self.directory_edit.text().strip() or self.settings['directory'],
+            'rotate_minutes': self.rotate_minutes_spin.value(),
+            'rotate_mb': self.rotate_mb_spin.value(),
+        }
+
+
+# ==================== 范围导出对话框 ====================
+class ExportRangeDialog(QDialog):
+    """范围导出对话框 - 只导出一段时间内、指定从站的数据，可选重采样到等间隔网格"""
+
+    TIME_FORMAT = "yyyy-MM-dd HH:mm:ss.zzz"
+
+    RESAMPLE_METHODS = [("线性插值", 'linear'), ("零阶保持（阶跃信号）", 'hold')]
+
+    def __init__(self, store, formats, chart_range=None, parent=None):
+        """
+        Args:
+            store: 样本来源（用于显示时间范围和统计行数）
+            formats: 可选格式 [(显示名称, 格式键), ...]
+            chart_range: 图表当前选中的 (起始, 结束) 秒级时间戳，没有时为 None
+        """
+        super().__init__(parent)
+        self.store = store
+        self.formats = formats
+        self.chart_range = chart_range
+        self.time_range = store.time_range()
+        self.setup_ui()
+
+    def setup_ui(self):
+        """设置对话框UI"""
+        self.setWindowTitle("导出选定范围")
+        self.setMinimumWidth(460)
+
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+
+        self.start_edit = QDateTimeEdit()
+        self.start_edit.setDisplayFormat(self.TIME_FORMAT)
+        self.end_edit = QDateTimeEdit()
+        self.end_edit.setDisplayFormat(self.TIME_FORMAT)
+        form.addRow("起始时间:", self.start_edit)
+        form.addRow("结束时间:", self.end_edit)
+
+        range_layout = QHBoxLayout()
+        chart_btn = QPushButton("使用图表选区")
+        chart_btn.setEnabled(self.chart_range is not None)
+        chart_btn.clicked.connect(self.use_chart_range)
+        all_btn = QPushButton("整个会话")
+        all_btn.clicked.connect(self.use_full_range)
+        range_layout.addWidget(chart_btn)
+        range_layout.addWidget(all_btn)
+        range_layout.addStretch()
+        form.addRow("", range_layout)
+
+        # 从站选择
+        channel_layout = QHBoxLayout()
+        self.channel_checkboxes = {}
+        for channel in self.store.channels():
+            checkbox = QCheckBox(str(channel))
+            checkbox.setChecked(True)
+            checkbox.toggled.connect(self.update_buttons)
+            self.channel_checkboxes[channel] = checkbox
+            channel_layout.addWidget(checkbox)
+        channel_layout.addStretch()
+        form.addRow("从站:", channel_layout)
+
+        self.format_combo = QComboBox()
+        for text, value in self.formats:
+            self.format_combo.addItem(text, value)
+        form.addRow("格式:", self.format_combo)
+
+        layout.addLayout(form)
+
+        # 重采样：各从站插值到同一等间隔网格，导出为每个从站一列的 CSV
+        self.resample_group = QGroupBox("重采样到等间隔网格（每个从站一列，CSV）")
+        self.resample_group.setCheckable(True)
+        self.resample_group.setChecked(False)
+        self.resample_group.toggled.connect(self.on_resample_toggled)
+        resample_form = QFormLayout(self.resample_group)
+
+        self.period_spin = QDoubleSpinBox()
+        self.period_spin.setRange(0.1, 60000.0)
+        self.period_spin.setDecimals(1)
+        self.period_spin.setValue(10.0)
+        self.period_spin.setSuffix(" ms")
+        resample_form.addRow("网格间隔:", self.period_spin)
+
+        self.method_combo = QComboBox()
+        for text, value in self.RESAMPLE_METHODS:
+            self.method_combo.addItem(text, value)
+        resample_form.addRow("插值方式:", self.method_combo)
+
+        self.max_gap_spin = QDoubleSpinBox()
+        self.max_gap_spin.setRange(0.0, 3600.0)
+        self.max_gap_spin.setDecimals(1)
+        self.max_gap_spin.setValue(1.0)
+        self.max_gap_spin.setSuffix(" 秒")
+        self.max_gap_spin.setSpecialValueText("不限制")
+        resample_form.addRow("中断超过此时长留空:", self.max_gap_spin)
+
+        layout.addWidget(self.resample_group)
+
+        self.count_label = QLabel()
+        self.count_label.setStyleSheet("color: #666;")
+        layout.addWidget(self.count_label)
+
+        self.button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.button_box.button(QDialogButtonBox.Ok).setText("导出...")
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+        layout.addWidget(self.button_box)
+
+        self.start_edit.dateTimeChanged.connect(self.update_buttons)
+        self.end_edit.dateTimeChanged.connect(self.update_buttons)
+
+        if self.chart_range is not None:
+            self.use_chart_range()
+        else:
+            self.use_full_range()
+
+    def set_range_ms(self, start_ms, end_ms):
+        self.start_edit.setDateTime(QDateTime.fromMSecsSinceEpoch(int(start_ms)))
+        self.end_edit.setDateTime(QDateTime.fromMSecsSinceEpoch(int(end_ms)))
+
+    def use_chart_range(self):
+        """使用图表的选区（概览条选区或当前显示范围）"""
+        start, end = self.chart_range
+        self.set_range_ms(int(start * 1000), int(end * 1000))
+
+    def use_full_range(self):
+        """使用整个会话的时间范围"""
+        if self.time_range is not None:
+            start_ns, end_ns = self.time_range
+            self.set_range_ms(start_ns // 1000000, end_ns // 1000000)
+
+    def get_time_range_ns(self):
+        """获取 [起始, 结束) 纳秒时间范围（结束时间所在的毫秒包含在内）"""
+        start_ms = self.start_edit.dateTime().toMSecsSinceEpoch()
+        end_ms = self.end_edit.dateTime().toMSecsSinceEpoch()
+        return start_ms * 1000000, (end_ms + 1) * 1000000
+
+    def on_resample_toggled(self, checked):
+        """重采样结果只能导出为 CSV"""
+        if checked:
+            self.format_combo.setCurrentIndex(self.format_combo.findData('csv'))
+        self.format_combo.setEnabled(not checked)
+
+    def get_resample(self):
+        """获取重采样设置，未启用时返回 None"""
+        if not self.resample_group.isChecked():
+            return None
+        max_gap = self.max_gap_spin.value()
+        return {
+            'period_ns': int(round(self.period_spin.value() * 1e6)),
+            'method': self.method_combo.currentData(),
+            'max_gap_ns': int(max_gap * 1e9) if max_gap > 0 else None,
+        }
+
+    def get_channels(self):
+        """获取选中的从站地址（全部选中时返回 None）"""
+        selected = [channel for channel, checkbox in self.channel_checkboxes.items() if checkbox.isChecked()]
+        return None if len(selected) == len(self.channel_checkboxes) else selected
+
+    def update_buttons(self, *args):
+        """更新时间范围内的行数（索引定位，不遍历数据）"""
+        start_ns, end_ns = self.get_time_range_ns()
+        start, stop = self.store.index_range(start_ns, end_ns)
+        has_channels = any(checkbox.isChecked() for checkbox in self.channel_checkboxes.values())
+        self.count_label.setText(f"时间范围内共 {stop - start} 条数据（筛选从站前）")
+        self.button_box.button(QDialogButtonBox.Ok).setEnabled(stop > start and has_channels)
+
+    def get_selection(self):
+        """获取导出选项"""
+        start_ns, end_ns = self.get_time_range_ns()
+        return {
+            'start_ns': start_ns,
+            'end_ns': end_ns,
+            'channels': self.get_channels(),
+            'format': self.format_combo.currentData(),
+            'resample': self.get_resample(),
+        }
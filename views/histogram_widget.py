@@ -0,0 +1,157 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+import numpy as np
+import pyqtgraph as pg
+
+from .chart_widget import sync_channel_combo
+
+
+class HistogramWidget(QWidget):
+    """测量值分布组件 - 显示整段会话的直方图、百分位数和超差比例"""
+
+    PERCENTILES = [1, 5, 25, 50, 75, 95, 99]
+
+    def __init__(self, chart_widget, parent=None):
+        super().__init__(parent)
+        self.chart_widget = chart_widget
+
+        self.setup_ui()
+        self.setup_plot()
+
+        # 直方图已随数据增量更新，这里只按帧率刷新显示
+        self.update_timer = QTimer(self)
+        self.update_timer.timeout.connect(self.update_histogram)
+        self.update_timer.start(200)
+
+    def setup_ui(self):
+        """设置用户界面"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        panel = QFrame()
+        panel.setFrameStyle(QFrame.StyledPanel)
+        panel_layout = QHBoxLayout(panel)
+
+        # 设置组
+        settings_group = QGroupBox("分布设置")
+        settings_layout = QHBoxLayout(settings_group)
+
+        settings_layout.addWidget(QLabel("通道:"))
+        self.channel_combo = QComboBox()
+        settings_layout.addWidget(self.channel_combo)
+
+        self.tolerance_checkbox = QCheckBox("公差")
+        self.tolerance_checkbox.toggled.connect(self.update_tolerance_lines)
+        settings_layout.addWidget(self.tolerance_checkbox)
+
+        settings_layout.addWidget(QLabel("下限:"))
+        self.lower_spinbox = self.create_tolerance_spinbox(-0.05)
+        settings_layout.addWidget(self.lower_spinbox)
+
+        settings_layout.addWidget(QLabel("上限:"))
+        self.upper_spinbox = self.create_tolerance_spinbox(0.05)
+        settings_layout.addWidget(self.upper_spinbox)
+
+        # 结果组
+        result_group = QGroupBox("会话统计")
+        result_layout = QVBoxLayout(result_group)
+
+        self.summary_label = QLabel("点数: 0 | 均值: -- | σ: -- | 范围: --")
+        self.summary_label.setStyleSheet("font-size: 16px; color: #555;")
+        result_layout.addWidget(self.summary_label)
+
+        self.percentile_label = QLabel("百分位: --")
+        self.percentile_label.setStyleSheet("color: #666; font-size: 11px;")
+        result_layout.addWidget(self.percentile_label)
+
+        self.tolerance_label = QLabel("超差: --")
+        self.tolerance_label.setStyleSheet("color: #666; font-size: 11px;")
+        result_layout.addWidget(self.tolerance_label)
+
+        panel_layout.addWidget(settings_group)
+        panel_layout.addWidget(result_group)
+        panel_layout.addStretch()
+        layout.addWidget(panel)
+
+        self.plot_widget = pg.PlotWidget()
+        layout.addWidget(self.plot_widget)
+
+    def create_tolerance_spinbox(self, value):
+        """创建公差输入框"""
+        spinbox = QDoubleSpinBox()
+        spinbox.setRange(-1000.0, 1000.0)
+        spinbox.setDecimals(3)
+        spinbox.setSingleStep(0.01)
+        spinbox.setSuffix(" mm")
+        spinbox.setValue(value)
+        spinbox.valueChanged.connect(self.update_tolerance_lines)
+        return spinbox
+
+    def setup_plot(self):
+        """设置直方图"""
+        self.plot_widget.setBackground('white')
+        self.plot_widget.setLabel('bottom', '位移', units='mm')
+        self.plot_widget.setLabel('left', '样本数')
+        self.plot_widget.showGrid(x=True, y=True, alpha=0.3)
+        self.plot_widget.setTitle('测量值分布', color='#333', size='12pt')
+
+        self.curve = self.plot_widget.plot(
+            stepMode="center",
+            fillLevel=0,
+            pen=pg.mkPen(color='#2E86AB', width=1),
+            brush=pg.mkBrush(46, 134, 171, 120)
+        )
+
+        # 公差线
+        tolerance_pen = pg.mkPen('red', width=1, style=Qt.DashLine)
+        self.lower_line = pg.InfiniteLine(angle=90, pen=tolerance_pen, label='下限')
+        self.upper_line = pg.InfiniteLine(angle=90, pen=tolerance_pen, label='上限')
+        self.plot_widget.addItem(self.lower_line)
+        self.plot_widget.addItem(self.upper_line)
+        self.update_tolerance_lines()
+
+    def update_tolerance_lines(self, *args):
+        """更新公差线"""
+        enabled = self.tolerance_checkbox.isChecked()
+        self.lower_line.setPos(self.lower_spinbox.value())
+        self.upper_line.setPos(self.upper_spinbox.value())
+        self.lower_line.setVisible(enabled)
+        self.upper_line.setVisible(enabled)
+
+    def update_histogram(self):
+        """刷新直方图显示"""
+        if not self.isVisible():
+            return
+
+        sync_channel_combo(self.channel_combo, self.chart_widget.channels)
+        channel = self.chart_widget.channels.get(self.channel_combo.currentData())
+        if channel is None or channel.histogram.count == 0:
+            self.curve.setData([0, 1], [0])
+            self.summary_label.setText("点数: 0 | 均值: -- | σ: -- | 范围: --")
+            return
+
+        histogram = channel.histogram
+        edges, counts = histogram.occupied()
+        self.curve.setData(edges, counts)
+
+        self.summary_label.setText(
+            f"点数: {histogram.count} | 均值: {histogram.mean:+.4f}mm | σ: {histogram.std:.4f}mm | "
+            f"范围: {histogram.min:+.4f} ~ {histogram.max:+.4f}mm"
+        )
+
+        values = histogram.percentile(self.PERCENTILES)
+        self.percentile_label.setText(
+            "百分位: " + " | ".join(f"P{p}: {v:+.4f}" for p, v in zip(self.PERCENTILES, values))
+            + f"  (分辨率 {histogram.width:.4f}mm)"
+        )
+
+        if self.tolerance_checkbox.isChecked():
+            below = histogram.fraction_below(self.lower_spinbox.value())
+            above = histogram.fraction_above(self.upper_spinbox.value())
+            self.tolerance_label.setText(
+                f"超差: 低于下限 {below * 100:.2f}% | 高于上限 {above * 100:.2f}% | "
+                f"合计 {(below + above) * 100:.2f}%"
+            )
+        else:
+            self.tolerance_label.setText("超差: 未设置公差")
@@ -9,6 +9,9 @@ from .ui.MainWindow import Ui_MainWindow
 from .dialogs import *
 # 导入图表组件
 from .chart_widget import GaugeChartWidget
+from .spectrum_widget import SpectrumWidget
+from .histogram_widget import HistogramWidget
+from .sample_table_model import SampleTableModel
 
 
 class MainWindow(QMainWindow, Ui_MainWindow):
@@ -35,6 +38,15 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # 设置图表组件
         self.setup_chart()
 
+        # 设置数据表格
+        self.setup_table()
+
+        # 设置从站地址输入
+        self.setup_slave_input()
+
+        # 设置会话文件菜单
+        self.setup_session_menu()
+
         # 设置连接和初始值
         self.setup_connections()
         self.setup_initial_values()
@@ -92,6 +104,121 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # 添加图表组件
         self.verticalLayout_2.addWidget(self.chart_widget)
 
+        # 频谱标签页（紧跟图表标签页，读取图表的通道缓冲区）
+        self.spectrum_widget = SpectrumWidget(self.chart_widget)
+        self.tabWidget.insertTab(1, self.spectrum_widget, "频谱")
+
+        # 分布标签页（整段会话的直方图）
+        self.histogram_widget = HistogramWidget(self.chart_widget)
+        self.tabWidget.insertTab(2, self.histogram_widget, "分布")
+
+    def setup_table(self):
+        """设置数据表格
+
+        用基于列式数组的虚拟模型替换设计器中的 QTableWidget，
+        新数据按帧批量插入，跟随模式下每帧只滚动一次。
+        """
+        self.verticalLayout_3.removeWidget(self.tableWidget)
+        self.tableWidget.deleteLater()
+        del self.tableWidget
+
+        self.follow_tail_checkbox = QCheckBox("自动滚动到最新数据")
+        self.follow_tail_checkbox.setChecked(True)
+        self.verticalLayout_3.addWidget(self.follow_tail_checkbox)
+
+        self.table_model = None
+        self.tableView = QTableView(self.data_tab)
+        self.tableView.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tableView.setAlternatingRowColors(True)
+        # 固定行高，避免视图逐行计算尺寸
+        self.tableView.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.tableView.verticalHeader().setDefaultSectionSize(22)
+        self.verticalLayout_3.addWidget(self.tableView)
+        self.tableView.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
+        self.table_timer = QTimer(self)
+        self.table_timer.timeout.connect(self.flush_table)
+        self.table_timer.start(33)
+
+    def set_sample_store(self, store):
+        """设置会话样本存储，表格和图表都从中读取数据"""
+        self.sample_store = store
+        self.table_model = SampleTableModel(store, self)
+        self.tableView.setModel(self.table_model)
+        self.tableView.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.chart_widget.set_store(store)
+
+    def flush_table(self):
+        """把存储中的新数据批量显示到表格"""
+        if self.table_model is None:
+            return
+        if self.table_model.flush() and self.follow_tail_checkbox.isChecked():
+            self.tableView.scrollToBottom()
+
+    def setup_session_menu(self):
+        """添加打开/保存会话文件的菜单项"""
+        self.open_session_action = QAction("打开会话...", self)
+        self.menu.insertAction(self.menu_2.menuAction(), self.open_session_action)
+
+        self.import_file_action = QAction("打开数据文件...", self)
+        self.menu.insertAction(self.menu_2.menuAction(), self.import_file_action)
+
+        self.browse_sessions_action = QAction("会话记录...", self)
+        self.menu.insertAction(self.menu_2.menuAction(), self.browse_sessions_action)
+
+        self.retention_action = QAction("压缩旧会话...", self)
+        self.menu.insertAction(self.menu_2.menuAction(), self.retention_action)
+
+        self.auto_export_action = QAction("自动导出...", self)
+        self.menu.insertAction(self.menu_2.menuAction(), self.auto_export_action)
+
+        self.actionSession = QAction("会话文件(.qsf)", self)
+        self.menu_2.addAction(self.actionSession)
+
+        self.actionNpz = QAction("NumPy数组(.npz)", self)
+        self.menu_2.addAction(self.actionNpz)
+
+        self.menu_2.addSeparator()
+        self.actionRange = QAction("导出选定范围...", self)
+        self.menu_2.addAction(self.actionRange)
+
+    def setup_slave_input(self):
+        """设置从站地址输入框（多个千分表共用一条485总线时使用）"""
+        slave_layout = QHBoxLayout()
+        slave_label = QLabel("从站地址:")
+        self.slave_lineEdit = QLineEdit("1")
+        self.slave_lineEdit.setToolTip("多个从站用逗号分隔，或使用范围，例如 1,2,3 或 1-4")
+        slave_layout.addWidget(slave_label)
+        slave_layout.addWidget(self.slave_lineEdit)
+
+        # 插入到读取间隔设置之后
+        index = self.verticalLayout_6.indexOf(self.auto_detect_pushButton)
+        self.verticalLayout_6.insertLayout(index, slave_layout)
+
+    def get_slave_ids(self):
+        """解析从站地址列表
+
+        Returns:
+            list: 从站地址列表，输入无效时返回 [1]
+        """
+        slave_ids = []
+        for part in self.slave_lineEdit.text().replace("，", ",").split(","):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                if "-" in part:
+                    start, end = (int(x) for x in part.split("-", 1))
+                    slave_ids.extend(range(start, end + 1))
+                else:
+                    slave_ids.append(int(part))
+            except ValueError:
+                continue
+
+        # Modbus从站地址范围 1-247，去重并保持顺序
+        slave_ids = [sid for sid in dict.fromkeys(slave_ids) if 1 <= sid <= 247]
+        return slave_ids or [1]
+
     def setup_connections(self):
         """连接信号和槽"""
         # 连接按钮信号
@@ -124,10 +251,6 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # 串口选项（初始为空，由控制器填充）
         self.port_comboBox.addItems(["请选择串口"])
 
-        # 设置表格列标题
-        self.tableWidget.setColumnCount(2)
-        self.tableWidget.setHorizontalHeaderLabels(["时间", "数值(mm)"])
-
         # 初始状态设置
         self.set_operation_buttons_enabled(False)
 
@@ -240,6 +363,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.read_once_pushButton.setEnabled(False)
             self.clear_pushButton.setEnabled(False)
             self.read_interval_doubleSpinBox.setEnabled(False)
+            self.slave_lineEdit.setEnabled(False)
             # 添加这行：禁用连接按钮
             self.connect_pushButton.setEnabled(False)
         else:
@@ -251,25 +375,16 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 # 添加这行：恢复连接按钮
                 self.connect_pushButton.setEnabled(True)
             self.read_interval_doubleSpinBox.setEnabled(True)
+            self.slave_lineEdit.setEnabled(True)
 
-    def add_data_to_table(self, timestamp, value):
-        """向数据表格添加数据"""
-        row_count = self.tableWidget.rowCount()
-        self.tableWidget.insertRow(row_count)
-
-        self.tableWidget.setItem(row_count, 0, QTableWidgetItem(timestamp))
-        self.tableWidget.setItem(row_count, 1, QTableWidgetItem(f"{value:+8.4f}"))
-
-        # 自动滚动到最新数据
-        self.tableWidget.scrollToBottom()
-
-    def add_data_to_chart(self, timestamp, value):
+    def add_data_to_chart(self, timestamp, value, channel=1):
         """向图表添加数据"""
-        self.chart_widget.add_data_point(timestamp, value)
+        self.chart_widget.add_data_point(timestamp, value, channel)
 
     def clear_data_table(self):
-        """清空数据表格"""
-        self.tableWidget.setRowCount(0)
+        """清空数据表格（同时清空表格显示的样本存储）"""
+        if self.table_model is not None:
+            self.table_model.clear()
 
     def clear_chart(self):
         """清空图表"""
@@ -302,11 +417,11 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     def get_data_count(self):
         """获取表格中的数据行数"""
-        return self.tableWidget.rowCount()
+        return len(self.sample_store) if self.table_model is not None else 0
 
     def get_chart_data_count(self):
         """获取图表中的数据点数"""
-        return len(self.chart_widget.value_data)
+        return self.chart_widget.get_point_count()
 
     def export_chart_data(self):
         """导出图表数据"""
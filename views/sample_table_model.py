@@ -0,0 +1,95 @@
+from datetime import datetime
+
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+
+
+class SampleTableModel(QAbstractTableModel):
+    """数据表格模型 - 会话样本存储之上的虚拟表格
+
+    数据只存在于 SampleStore 中，单元格文本在视图请求可见行时才格式化。
+    新样本由 flush() 按帧批量通知视图插入行。
+    """
+
+    HEADERS = ["时间", "数值(mm)", "从站"]
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self._count = 0  # 已通知视图的行数
+
+    # ========== Qt 模型接口 ==========
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._count
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= min(self._count, len(self.store)):
+            return None
+
+        if role == Qt.DisplayRole:
+            return self.format_cell(index.row(), index.column())
+        if role == Qt.TextAlignmentRole and index.column() > 0:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    # ========== 数据操作 ==========
+    def format_cell(self, row, column):
+        """格式化单元格文本"""
+        t_ns, raw, channel, _ = self.store.row(row)
+        if column == 0:
+            return datetime.fromtimestamp(t_ns / 1e9).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        if column == 1:
+            return f"{raw / self.store.scale:+8.4f}"
+        return str(channel)
+
+    def flush(self):
+        """把存储中的新样本一次性通知给视图
+
+        Returns:
+            int: 本次新增的行数
+        """
+        size = len(self.store)
+        if size < self._count:
+            # 存储已被清空
+            self.reset()
+            return 0
+
+        pending = size - self._count
+        if pending <= 0:
+            return 0
+        self.beginInsertRows(QModelIndex(), self._count, size - 1)
+        self._count = size
+        self.endInsertRows()
+        return pending
+
+    def clear(self):
+        """清空存储并重置视图
+
+        只重置视图而不清空存储时，下一次 flush 会把存储中的全部样本重新插入表格，
+        因此清空表格都应通过这里。
+        """
+        if self.store.readonly:
+            raise Exception("打开的会话文件是只读的，不能清空")
+        self.store.clear()
+        self.reset()
+
+    def reset(self):
+        """存储清空后重置视图"""
+        self.beginResetModel()
+        self._count = 0
+        self.endResetModel()
@@ -0,0 +1,159 @@
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+import numpy as np
+import pyqtgraph as pg
+
+from models.spectrum import SpectrumAnalyzer, WINDOW_FUNCTIONS
+from .chart_widget import sync_channel_combo
+
+
+class SpectrumWidget(QWidget):
+    """频谱分析组件 - 读取图表通道缓冲区的最新数据做 FFT / Welch 分析"""
+
+    def __init__(self, chart_widget, parent=None):
+        super().__init__(parent)
+        self.chart_widget = chart_widget
+
+        self.setup_ui()
+        self.setup_plot()
+
+        # 按显示帧率刷新（仅在标签页可见时计算）
+        self.update_timer = QTimer(self)
+        self.update_timer.timeout.connect(self.update_spectrum)
+        self.update_timer.start(100)
+
+    def setup_ui(self):
+        """设置用户界面"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        # 控制面板
+        panel = QFrame()
+        panel.setFrameStyle(QFrame.StyledPanel)
+        panel_layout = QHBoxLayout(panel)
+
+        settings_group = QGroupBox("分析设置")
+        settings_layout = QHBoxLayout(settings_group)
+
+        settings_layout.addWidget(QLabel("通道:"))
+        self.channel_combo = QComboBox()
+        settings_layout.addWidget(self.channel_combo)
+
+        settings_layout.addWidget(QLabel("样本数:"))
+        self.samples_combo = QComboBox()
+        self.samples_combo.addItems(["256", "512", "1024", "2048", "4096", "8192"])
+        self.samples_combo.setCurrentText("1024")
+        settings_layout.addWidget(self.samples_combo)
+
+        settings_layout.addWidget(QLabel("方法:"))
+        self.method_combo = QComboBox()
+        self.method_combo.addItems(["幅值谱(FFT)", "功率谱密度(Welch)"])
+        self.method_combo.currentTextChanged.connect(self.change_method)
+        settings_layout.addWidget(self.method_combo)
+
+        settings_layout.addWidget(QLabel("窗函数:"))
+        self.window_combo = QComboBox()
+        self.window_combo.addItems(list(WINDOW_FUNCTIONS.keys()))
+        settings_layout.addWidget(self.window_combo)
+
+        self.log_checkbox = QCheckBox("对数坐标")
+        self.log_checkbox.toggled.connect(lambda checked: self.plot_widget.setLogMode(y=checked))
+        settings_layout.addWidget(self.log_checkbox)
+
+        # 结果显示组
+        result_group = QGroupBox("分析结果")
+        result_layout = QVBoxLayout(result_group)
+
+        self.peak_label = QLabel("峰值: --")
+        self.peak_label.setStyleSheet("font-size: 20px; color: #555;")
+        result_layout.addWidget(self.peak_label)
+
+        self.sampling_label = QLabel("采样率: -- | 抖动: --")
+        self.sampling_label.setStyleSheet("color: #666; font-size: 11px;")
+        result_layout.addWidget(self.sampling_label)
+
+        panel_layout.addWidget(settings_group)
+        panel_layout.addWidget(result_group)
+        panel_layout.addStretch()
+        layout.addWidget(panel)
+
+        # 图表区域
+        self.plot_widget = pg.PlotWidget()
+        layout.addWidget(self.plot_widget)
+
+    def setup_plot(self):
+        """设置频谱图"""
+        self.plot_widget.setBackground('white')
+        self.plot_widget.setLabel('bottom', '频率', units='Hz')
+        self.plot_widget.showGrid(x=True, y=True, alpha=0.3)
+        self.plot_widget.setTitle('频谱分析', color='#333', size='12pt')
+
+        self.curve = self.plot_widget.plot(pen=pg.mkPen(color='#2E86AB', width=1.5))
+
+        # 峰值标记
+        self.peak_marker = pg.ScatterPlotItem(size=10, brush=pg.mkBrush('#E4572E'))
+        self.plot_widget.addItem(self.peak_marker)
+
+        self.change_method(self.method_combo.currentText())
+
+    def change_method(self, text):
+        """切换分析方法"""
+        if text.startswith("功率谱"):
+            self.plot_widget.setLabel('left', '功率谱密度', units='mm²/Hz')
+        else:
+            self.plot_widget.setLabel('left', '幅值', units='mm')
+
+    def update_spectrum(self):
+        """刷新频谱"""
+        if not self.isVisible():
+            return
+
+        sync_channel_combo(self.channel_combo, self.chart_widget.channels)
+        channel = self.chart_widget.channels.get(self.channel_combo.currentData())
+        if channel is None:
+            return
+
+        # 取通道缓冲区中最新的 N 个样本
+        sample_count = int(self.samples_combo.currentText())
+        times, values = channel.buffer.view()
+        times, values = times[-sample_count:], values[-sample_count:]
+        if len(times) < 16:
+            self.peak_label.setText("峰值: --（数据不足）")
+            return
+
+        # 采样间隔不均匀，按实际时间戳插值到等间隔网格后再分析
+        sampling = SpectrumAnalyzer.analyze_sampling(times)
+        if sampling is None:
+            return
+        sample_rate = sampling['sample_rate']
+        uniform = SpectrumAnalyzer.resample_uniform(times, values, sample_rate)
+
+        window = self.window_combo.currentText()
+        if self.method_combo.currentText().startswith("功率谱"):
+            freqs, spectrum = SpectrumAnalyzer.welch_psd(uniform, sample_rate, window=window)
+            unit = "mm²/Hz"
+        else:
+            freqs, spectrum = SpectrumAnalyzer.amplitude_spectrum(uniform, sample_rate, window=window)
+            unit = "mm"
+
+        # 对数坐标下避免零值
+        if self.log_checkbox.isChecked():
+            spectrum = np.maximum(spectrum, 1e-12)
+
+        self.curve.setData(freqs, spectrum)
+
+        peak = SpectrumAnalyzer.find_peak(freqs, spectrum)
+        if peak is not None:
+            peak_freq, peak_value = peak
+            marker_y = np.log10(peak_value) if self.log_checkbox.isChecked() else peak_value
+            self.peak_marker.setData([peak_freq], [marker_y])
+            self.peak_label.setText(f"峰值: {peak_freq:.3f} Hz | {peak_value:.4g} {unit}")
+
+        jitter_ratio = sampling['jitter'] / sampling['mean_interval'] * 100
+        self.sampling_label.setText(
+            f"样本: {len(times)} | 采样率: {sample_rate:.2f} Hz | "
+            f"平均间隔: {sampling['mean_interval'] * 1000:.2f} ms | "
+            f"抖动: {sampling['jitter'] * 1000:.2f} ms ({jitter_ratio:.1f}%) | "
+            f"最大间隔: {sampling['max_interval'] * 1000:.2f} ms"
+        )